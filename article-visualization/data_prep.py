@@ -0,0 +1,102 @@
+import pandas as pd
+from sqlalchemy import bindparam, text
+
+# how scrapers/dates.py stores publication dates: UTC, second precision
+STORED_SUFFIX = "+00:00"
+STORED_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+def parse_stored_dates(values):
+    """Parse publication dates as normalized at ingest into tz-aware UTC timestamps.
+
+    The dates all have one known format, so this is a fixed-format parse (the
+    UTC suffix is checked, then dropped) with no per-row format inference. A
+    value in any other format (one that predates normalization, say) becomes
+    NaT; callers decide whether to drop it.
+    """
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        values = values.astype(str)
+        normalized = values.str.endswith(STORED_SUFFIX)
+        values = pd.to_datetime(
+            values.str.slice(0, -len(STORED_SUFFIX)).where(normalized),
+            format=STORED_FORMAT, errors="coerce",
+        )
+    return values.dt.tz_localize("UTC") if values.dt.tz is None else values.dt.tz_convert("UTC")
+
+
+def prepare_articles(df):
+    """Turn the raw articles query result into the frame the dashboard charts use.
+
+    Expects the dashboard's column names (source, url, pub_date, ...), which
+    load_data selects as aliases. Kept free of streamlit and the database so it
+    can be benchmarked on its own.
+    """
+    # the source names are already in the correct format, no mapping needed
+    # just ensure they're properly set
+    df['source'] = df['source'].fillna('Unknown')
+    
+    # dates were normalized to UTC at ingest; unparseable ones are NULL (and
+    # quarantined), which the query already excludes. Rows still holding a
+    # pre-normalization date are dropped, and counted so the dashboard can say so
+    df["pub_date"] = parse_stored_dates(df["pub_date"])
+    unnormalized = df["pub_date"].isna()
+    if unnormalized.any():
+        df = df[~unnormalized].copy()
+    df.attrs["excluded_dates"] = int(unnormalized.sum())
+    
+    # ensure numeric columns are properly typed
+    numeric_columns = ['headline_len', 'word_count', 'internal_links', 'external_links']
+    for col in numeric_columns:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    
+    # calculate total links
+    df['num_links'] = df['internal_links'].fillna(0) + df['external_links'].fillna(0)
+    
+    return df
+
+
+def article_page_query(sources, start_date, end_date, keywords, cursor, page_size):
+    """The drill-down table's keyset page query and its parameters.
+
+    Rows come newest first, ordered by (publication_date, article_url) so the
+    cursor (those two values of the previous page's last row) is unambiguous;
+    one row more than `page_size` is asked for so the caller can tell whether
+    an older page exists. The keywords are matched with ILIKE, so Postgres only.
+    """
+    conditions = [
+        "headline_text IS NOT NULL",
+        "publication_date IS NOT NULL",
+        "headline_word_count > 0",
+        "article_word_count > 0",
+        "source_name IN :sources",
+        "publication_date >= :start_date",
+        "publication_date < :end_date",
+    ]
+    params = {"sources": list(sources), "start_date": start_date, "end_date": end_date, "limit": page_size + 1}
+
+    # same headline keyword filter as the charts, pushed down into the query
+    if keywords:
+        keyword_conditions = []
+        for i, kw in enumerate(keywords):
+            escaped = kw.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params[f"kw{i}"] = f"%{escaped}%"
+            keyword_conditions.append(f"headline_text ILIKE :kw{i}")
+        conditions.append("(" + " OR ".join(keyword_conditions) + ")")
+
+    if cursor is not None:
+        conditions.append("(publication_date, article_url) < (:cursor_date, :cursor_url)")
+        params["cursor_date"], params["cursor_url"] = cursor
+
+    query = text(f"""
+    SELECT
+        source_name AS source, article_url AS url, article_section AS section,
+        publication_date AS pub_date, headline_text AS headline,
+        article_word_count AS word_count,
+        num_internal_links AS internal_links, num_external_links AS external_links
+    FROM articles
+    WHERE {" AND ".join(conditions)}
+    ORDER BY publication_date DESC, article_url DESC
+    LIMIT :limit
+    """).bindparams(bindparam("sources", expanding=True))
+    return query, params
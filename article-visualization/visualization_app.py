@@ -1,14 +1,41 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text, bindparam, inspect
+import contextlib
 import datetime
 import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
 
+from data_prep import STORED_FORMAT, STORED_SUFFIX, article_page_query, parse_stored_dates, prepare_articles
+
+# the scrapers' modules: stored bodies are decoded with their codec
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scrapers"))
+from bodies import BodyCodec
+
 # load environment variables
 load_dotenv()
 
+# DASHBOARD_PROFILE=sample|cprofile profiles every rerun into DASHBOARD_PROFILE_DIR
+# (default profiles/), using the scrapers' profiler; unset, the stage markers do nothing
+profiler = None
+if os.getenv("DASHBOARD_PROFILE"):
+    import profiling
+    if profiling.active() is not None:
+        # the previous rerun was cut short (st.rerun or an exception); keep what it recorded
+        profiling.active().stop()
+    run_dir = Path(os.getenv("DASHBOARD_PROFILE_DIR", "profiles")) / f"dashboard-{datetime.datetime.now():%Y%m%d-%H%M%S-%f}"
+    profiler = profiling.Profiler(run_dir, name="rerun", mode=os.getenv("DASHBOARD_PROFILE")).start()
+_profile_stages = contextlib.ExitStack()
+
+def profile_stage(name):
+    """End the current dashboard stage and start the next one (only when profiling)."""
+    if profiler is not None:
+        _profile_stages.close()
+        _profile_stages.enter_context(profiler.stage(name))
+
 # streamlit config
 st.set_page_config(page_title="News Visualizer", layout="wide")
 st.title("News Articles Visualization Dashboard")
@@ -19,9 +46,14 @@ st.markdown("""
 **Contributors:** Justin Lee, Sivani Dronamraju, Sean Gunshenan  
 """)
 
-# load data from postgresql
-@st.cache_data(ttl=600)  # refresh every 10 minutes instead of 5
-def load_data():
+# page size for the article drill-down table
+ARTICLE_PAGE_SIZE = 25
+# terms per source in the trending terms chart
+TRENDING_TERMS = 10
+
+# one engine (and connection pool) shared by every query in the session
+@st.cache_resource
+def get_engine():
     # get database credentials from environment variables
     db_host = os.getenv('DB_HOST')
     db_port = os.getenv('DB_PORT')
@@ -32,12 +64,29 @@ def load_data():
     # create database connection string
     connection_string = f"postgresql+psycopg2://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
     
-    engine = create_engine(connection_string)
+    return create_engine(connection_string)
+
+# dictionaries for compressed article bodies, read the first time one is decoded
+@st.cache_resource
+def get_body_codec():
+    return BodyCodec(get_engine())
+
+# load data from postgresql
+@st.cache_data(ttl=600)  # refresh every 10 minutes instead of 5
+def load_data():
+    engine = get_engine()
     
     # optimized query - only select needed columns and add basic filtering
+    # (article bodies are loaded one at a time by the drill-down table);
+    # the aliases are the column names the charts use
     query = """
     SELECT 
-        *
+        source_name AS source, article_url AS url, article_section AS section,
+        publication_date AS pub_date, headline_text AS headline,
+        headline_word_count AS headline_len, article_word_count AS word_count,
+        num_internal_links AS internal_links, num_external_links AS external_links,
+        num_internal_links_within_body, num_external_links_within_body,
+        scrape_date
     FROM articles 
     WHERE headline_text IS NOT NULL 
     AND publication_date IS NOT NULL
@@ -47,50 +96,78 @@ def load_data():
     """
     
     df = pd.read_sql_query(query, engine)
-    
-    # map the actual column names to standard format
-    column_mapping = {
-        'source_name': 'source',
-        'article_url': 'url',
-        'article_section': 'section',
-        'publication_date': 'pub_date',
-        'headline_text': 'headline',
-        'headline_word_count': 'headline_len',
-        'article_word_count': 'word_count',
-        'num_internal_links': 'internal_links',
-        'num_external_links': 'external_links',
-        'num_internal_links_within_body': 'num_internal_links_within_body',
-        'num_external_links_within_body': 'num_external_links_within_body',
-        'scrape_date': 'scrape_date'
-    }
-    
-    # rename columns to match expected format
-    df.rename(columns=column_mapping, inplace=True)
-    
-    # the source names are already in the correct format, no mapping needed
-    # just ensure they're properly set
-    df['source'] = df['source'].fillna('Unknown')
-    
-    # clean and standardize data - much faster now with pre-filtered data
-    df["pub_date"] = pd.to_datetime(df["pub_date"], errors="coerce")
-    df = df.dropna(subset=["pub_date"])
-    
-    # ensure numeric columns are properly typed
-    numeric_columns = ['headline_len', 'word_count', 'internal_links', 'external_links']
-    for col in numeric_columns:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-    
-    # calculate total links
-    df['num_links'] = df['internal_links'].fillna(0) + df['external_links'].fillna(0)
-    
-    return df
+    return prepare_articles(df)
+
+def stored_date(ts):
+    """A UTC timestamp in the articles table's publication_date format."""
+    return ts.strftime(STORED_FORMAT) + STORED_SUFFIX
+
+@st.cache_data(ttl=600)
+def load_article_page(sources, start_date, end_date, keywords, cursor=None, page_size=ARTICLE_PAGE_SIZE):
+    """Fetch one page of article metadata, newest first, strictly after the keyset cursor.
 
+    The cursor is the (publication_date, article_url) of the last row of the previous
+    page, so each page is an index range scan instead of an ever-growing OFFSET.
+    One extra row is fetched so the caller can tell whether an older page exists.
+    Dates are stored-format UTC strings (see data_prep.py), which compare correctly
+    as text; the range is [start_date, end_date).
+    """
+    if not sources:
+        return pd.DataFrame(columns=["source", "url", "section", "pub_date", "stored_date", "headline", "word_count", "internal_links", "external_links"])
+
+    query, params = article_page_query(sources, start_date, end_date, keywords, cursor, page_size)
+    with get_engine().connect() as conn:
+        page = pd.read_sql_query(query, conn, params=params)
+    # the cursor is taken from the stored text, which un-normalized rows also have
+    page["stored_date"] = page["pub_date"]
+    page["pub_date"] = parse_stored_dates(page["pub_date"])
+    return page
+
+@st.cache_data(ttl=600)
+def load_article_body(url):
+    """Fetch the full text of a single article, only when its row is expanded."""
+    query = text("SELECT article_full_text FROM articles WHERE article_url = :url LIMIT 1")
+    with get_engine().connect() as conn:
+        row = conn.execute(query, {"url": url}).fetchone()
+    return get_body_codec().decode(row[0]) if row and row[0] else ""
+
+@st.cache_data(ttl=600)
+def load_trending_terms(sources, start_date, end_date, section="", per_source=TRENDING_TERMS):
+    """Top terms per source over the date range, from the scores cached at ingest (scrapers/terms.py).
+
+    Reads only term_scores and term_vocab, never article bodies: burst is the
+    term's strongest day in the range, tfidf its average over the days it ranked.
+    """
+    columns = ["source", "term", "articles", "burst", "tfidf"]
+    engine = get_engine()
+    if not sources or not inspect(engine).has_table("term_scores"):
+        return pd.DataFrame(columns=columns)
+    query = text("""
+    SELECT s.source, v.term, SUM(s.df) AS articles, MAX(s.burst) AS burst, AVG(s.tfidf) AS tfidf
+    FROM term_scores s
+    JOIN term_vocab v ON v.term_id = s.term_id
+    WHERE s.source IN :sources AND s.section = :section
+      AND s.day >= :start_date AND s.day <= :end_date
+    GROUP BY s.source, v.term
+    """).bindparams(bindparam("sources", expanding=True))
+    params = {"sources": list(sources), "section": section,
+              "start_date": str(start_date), "end_date": str(end_date)}
+    with engine.connect() as conn:
+        terms = pd.read_sql_query(query, conn, params=params)
+    return terms
+
+profile_stage("load_data")
 df = load_data()
+if df.attrs.get("excluded_dates"):
+    st.warning(
+        f"{df.attrs['excluded_dates']:,} articles have a publication date that was never "
+        "normalized to UTC and are left out of the charts. Run scrapers/dates.py normalize to include them."
+    )
 
 # data is already filtered in the query, no need for additional filtering
 
 # sidebar filters
+profile_stage("filters")
 st.sidebar.header("🔎 Filters")
 
 sources = st.sidebar.multiselect(
@@ -120,25 +197,74 @@ headline_keywords = st.sidebar.text_input(
 # note: article text filtering removed for performance
 # if needed, can be added back with a separate query
 
+# the selected days as a UTC range, end day included: [start, end)
+range_start = pd.Timestamp(date_range[0], tz="UTC")
+range_end = pd.Timestamp(date_range[1], tz="UTC") + pd.Timedelta(days=1)
+
 # filtered data
 filtered = df[
     (df["source"].isin(sources)) &
-    (df["pub_date"] >= pd.to_datetime(date_range[0])) &
-    (df["pub_date"] <= pd.to_datetime(date_range[1]))
+    (df["pub_date"] >= range_start) &
+    (df["pub_date"] < range_end)
 ]
 
 # apply headline keyword filter
-if headline_keywords:
-    keywords = [kw.strip() for kw in headline_keywords.split(",") if kw.strip()]
-    if keywords:
-        filtered = filtered[
-            filtered["headline"].str.contains("|".join(keywords), case=False, na=False)
-        ]
+keywords = [kw.strip() for kw in headline_keywords.split(",") if kw.strip()] if headline_keywords else []
+if keywords:
+    filtered = filtered[
+        filtered["headline"].str.contains("|".join(keywords), case=False, na=False)
+    ]
 
 # note: article text filtering removed since we don't load article_full_text anymore
 # to improve performance. if needed, can be added back with a separate query
 
+# 🗂️ article drill-down (keyset-paginated, bodies loaded on demand)
+profile_stage("drilldown")
+st.subheader("🗂️ Article Drill-Down")
+st.markdown("Browse the articles behind the charts. Expand a row and toggle the switch to load its full text.")
+
+# a stack of keyset cursors, one per page visited; reset whenever the filters change
+drilldown_filters = (tuple(sorted(sources)), str(date_range[0]), str(date_range[1]), tuple(keywords))
+if st.session_state.get("drilldown_filters") != drilldown_filters:
+    st.session_state["drilldown_filters"] = drilldown_filters
+    st.session_state["drilldown_cursors"] = [None]
+drilldown_cursors = st.session_state["drilldown_cursors"]
+
+article_page = load_article_page(
+    tuple(sources),
+    stored_date(range_start),
+    stored_date(range_end),
+    tuple(keywords),
+    cursor=drilldown_cursors[-1],
+)
+has_older_page = len(article_page) > ARTICLE_PAGE_SIZE
+article_page = article_page.iloc[:ARTICLE_PAGE_SIZE]
+
+if article_page.empty:
+    st.info("No articles match the current filters.")
+for row in article_page.itertuples(index=False):
+    pub_label = row.pub_date.strftime("%Y-%m-%d %H:%M UTC") if pd.notna(row.pub_date) else "unknown date"
+    with st.expander(f"{pub_label} · {row.source} · {row.headline}"):
+        st.markdown(f"[{row.url}]({row.url})")
+        st.caption(
+            f"Section: {row.section} · {row.word_count} words · "
+            f"{row.internal_links} internal / {row.external_links} external links"
+        )
+        if st.toggle("Load article text", key=f"drilldown_body_{row.url}"):
+            st.write(load_article_body(row.url) or "_No article text stored._")
+
+newer_col, page_col, older_col = st.columns([1, 2, 1])
+page_col.markdown(f"Page {len(drilldown_cursors)}")
+if newer_col.button("← Newer", disabled=len(drilldown_cursors) == 1):
+    drilldown_cursors.pop()
+    st.rerun()
+if older_col.button("Older →", disabled=not has_older_page):
+    last_row = article_page.iloc[-1]
+    drilldown_cursors.append((last_row["stored_date"], last_row["url"]))
+    st.rerun()
+
 # 📅 articles Over Time (Bar Chart, Daily, Side-by-Side)
+profile_stage("chart_articles_over_time")
 st.subheader("📅 Articles Over Time (Bar Chart, Daily)")
 articles_over_time_daily = (
     filtered.groupby([pd.Grouper(key="pub_date", freq="D"), "source"]).size().reset_index(name="count")
@@ -154,6 +280,7 @@ fig_time_bar_daily = px.bar(
 )
 st.plotly_chart(fig_time_bar_daily, use_container_width=True)
 
+profile_stage("chart_headline_length")
 st.subheader("✍️ Headline Length Box Plot")
 fig_headline = px.box(
     filtered,
@@ -166,6 +293,7 @@ fig_headline = px.box(
 st.plotly_chart(fig_headline, use_container_width=True)
 
 # New Visualization for Links
+profile_stage("chart_link_types")
 st.subheader("🔗 Internal vs. External Links Analysis")
 st.markdown("Use the checkboxes to compare different link types across articles.")
 
@@ -203,6 +331,7 @@ if plot_data_links:
 else:
     st.info("Please select at least one link type to visualize.")
 
+profile_stage("chart_word_count")
 st.subheader("📝 Word Count Box Plot")
 fig_word = px.box(
     filtered,
@@ -214,6 +343,7 @@ fig_word = px.box(
 )
 st.plotly_chart(fig_word, use_container_width=True)
 
+profile_stage("chart_links_per_article")
 st.subheader("🔗 Number of Links per Article by Source")
 fig_links = px.box(
     filtered,
@@ -226,6 +356,7 @@ fig_links = px.box(
 st.plotly_chart(fig_links, use_container_width=True)
 
 # 📚 section Popularity Over Time (Line Chart, Daily)
+profile_stage("chart_section_popularity")
 st.subheader("📚 Section Popularity Over Time (Line Chart, Daily)")
 section_over_time_daily = (
     filtered.groupby([pd.Grouper(key="pub_date", freq="D"), "section"]).size().reset_index(name="count")
@@ -243,6 +374,7 @@ fig_section_line_daily.update_traces(line=dict(width=3))
 st.plotly_chart(fig_section_line_daily, use_container_width=True)
 
 # 🧮 average Article Length by Section (Side-by-Side by News Site)
+profile_stage("chart_avg_length")
 st.subheader("🧮 Average Article Length by Section (by News Site)")
 avg_lengths_all = (
     filtered.groupby(["source", "section"])["word_count"]
@@ -261,6 +393,7 @@ fig_avg_length_grouped = px.bar(
 st.plotly_chart(fig_avg_length_grouped, use_container_width=True)
 
 # visualization: number of articles by day of the week, separated by source
+profile_stage("chart_weekday")
 st.subheader("📅 Articles by Day of the Week (by Source)")
 
 # add a toggle button for relative/absolute bar chart
@@ -297,6 +430,44 @@ else:
 
 st.plotly_chart(fig_weekday_source, use_container_width=True)
 
+# 🔥 trending terms, from the per-day term tables kept by the scrapers (--terms)
+profile_stage("chart_trending_terms")
+st.subheader("🔥 Trending Terms")
+trend_cols = st.columns(2)
+trend_metric = trend_cols[0].radio(
+    "Rank terms by",
+    options=["burst", "tfidf"],
+    format_func={"burst": "Burst (rising vs. the previous 4 weeks)", "tfidf": "TF-IDF (distinctive that day)"}.get,
+    horizontal=True,
+)
+trend_section = trend_cols[1].selectbox(
+    "Section",
+    options=[""] + sorted(filtered["section"].dropna().unique()),
+    format_func=lambda s: s or "All sections",
+)
+trending = load_trending_terms(tuple(sorted(sources)), date_range[0], date_range[1], trend_section)
+if trending.empty:
+    st.info("No term counts for this selection yet. Crawl with --terms or run scrapers/terms.py ingest.")
+else:
+    top_terms = trending.sort_values(trend_metric, ascending=False).groupby("source").head(TRENDING_TERMS)
+    fig_trending = px.bar(
+        top_terms.sort_values(trend_metric),
+        x=trend_metric,
+        y="term",
+        color="source",
+        orientation="h",
+        hover_data=["articles"],
+        title=f"Top {TRENDING_TERMS} Terms per Source by {'Burst' if trend_metric == 'burst' else 'TF-IDF'}",
+        labels={"burst": "Burst Score (z)", "tfidf": "TF-IDF", "term": "Term", "source": "News Source",
+                "articles": "Articles"},
+    )
+    fig_trending.update_layout(height=max(400, 22 * top_terms["term"].nunique()))
+    st.plotly_chart(fig_trending, use_container_width=True)
+
 # footer
 st.markdown("---")
-st.markdown("Data sourced from ABC News, CBS News, The Tab, and BuzzFeed.") 
\ No newline at end of file
+st.markdown("Data sourced from ABC News, CBS News, The Tab, and BuzzFeed.") 
+
+if profiler is not None:
+    _profile_stages.close()
+    profiler.stop()
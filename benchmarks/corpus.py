@@ -0,0 +1,60 @@
+"""Recorded page corpus for the benchmarks, and a local HTTP stand-in that serves it.
+
+`fixtures/manifest.json` lists every recorded page as
+{"source", "kind" ("article" | "section"), "path", "url"}; `path` is relative
+to `fixtures/`. The stand-in serves each page at `/<path>`, so code that
+fetches a URL can be pointed at `standin.url_for(entry)` instead of the live site.
+"""
+from __future__ import annotations
+import json
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+MANIFEST = FIXTURES / "manifest.json"
+
+
+def load_manifest() -> list[dict]:
+    with open(MANIFEST, encoding="utf-8") as fp:
+        return json.load(fp)
+
+
+def pages(source: str | None = None, kind: str = "article") -> list[tuple[dict, bytes]]:
+    """(manifest entry, raw bytes) for every recorded page of a source and kind."""
+    return [
+        (entry, (FIXTURES / entry["path"]).read_bytes())
+        for entry in load_manifest()
+        if entry["kind"] == kind and (source is None or entry["source"] == source)
+    ]
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer:
+    """Serves the fixtures directory on localhost from a background thread."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        handler = partial(_QuietHandler, directory=str(FIXTURES))
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url_for(self, entry: dict) -> str:
+        return f"{self.base_url}/{entry['path']}"
+
+    def __enter__(self) -> "StandInServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Record live pages into the benchmark corpus.
+
+    python benchmarks/record.py --sources abc buzzfeed thetab --per-source 5
+
+Uses each source's adapter to discover article links, fetches a handful of
+them plus the first section page, and writes them under `fixtures/<source>/`,
+replacing that source's entries in `fixtures/manifest.json`. CBS section pages
+are rendered by a browser, so only CBS article pages are recorded.
+"""
+from __future__ import annotations
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scrapers"))
+
+from adapters import ADAPTERS, load_adapter  # noqa: E402
+from fetcher import Fetcher  # noqa: E402
+
+from corpus import FIXTURES, MANIFEST, load_manifest  # noqa: E402
+
+
+def record_source(name: str, fetcher: Fetcher, per_source: int) -> list[dict]:
+    adapter = load_adapter(name)
+    session = fetcher.session_for(adapter)
+    out_dir = FIXTURES / name
+    out_dir.mkdir(parents=True, exist_ok=True)
+    entries = []
+
+    section, section_url = next(iter(adapter.sections.items()))
+    if name != "cbs":
+        path = f"{name}/section-{section.lower()}.html"
+        (FIXTURES / path).write_bytes(adapter.fetch(session, section_url))
+        entries.append({"source": name, "kind": "section", "path": path, "url": section_url})
+
+    links = sorted(adapter.discover_section(session, section, section_url))[:per_source]
+    for i, (_, url) in enumerate(links):
+        path = f"{name}/article-{i}.html"
+        (FIXTURES / path).write_bytes(adapter.fetch(session, url))
+        entries.append({"source": name, "kind": "article", "path": path, "url": url})
+    print(f"{name}: recorded {len(entries)} pages")
+    return entries
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sources", nargs="+", choices=sorted(ADAPTERS), default=list(ADAPTERS))
+    parser.add_argument("--per-source", type=int, default=5, help="article pages per source")
+    args = parser.parse_args(argv)
+
+    manifest = load_manifest() if MANIFEST.exists() else []
+    fetcher = Fetcher()
+    for name in args.sources:
+        manifest = [e for e in manifest if e["source"] != name] + record_source(name, fetcher, args.per_source)
+    with open(MANIFEST, "w", encoding="utf-8") as fp:
+        json.dump(manifest, fp, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""Offline benchmark suite for the scrapers' extractors and the dashboard's data prep.
+
+    python benchmarks/run.py                                   # run everything, save JSON
+    python benchmarks/run.py --filter abc --quick
+    python benchmarks/run.py --compare benchmarks/results/<earlier>.json
+
+Extractors run against the recorded pages in `fixtures/` (network-touching
+benchmarks go through a local HTTP stand-in), and the dashboard's
+`prepare_articles` and the ingest-time date normalization run on synthetic
+100k / 1M row frames. Each run is saved to
+`results/<utc time>-<git sha>.json`; `--compare` prints the change in median
+time per benchmark against an earlier file and exits non-zero if anything got
+slower than `--threshold`.
+"""
+from __future__ import annotations
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scrapers"))
+sys.path.insert(0, str(ROOT / "article-visualization"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from bs4 import BeautifulSoup  # noqa: E402
+
+import abc_news_scraper  # noqa: E402
+import buzzfeed  # noqa: E402
+import cbs_news_scraper  # noqa: E402
+import links  # noqa: E402
+import the_tab_scraper  # noqa: E402
+from dates import normalize_dates  # noqa: E402
+from metadata import scan_metadata  # noqa: E402
+from data_prep import prepare_articles  # noqa: E402
+
+from corpus import StandInServer, pages  # noqa: E402
+
+RESULTS = Path(__file__).resolve().parent / "results"
+
+# name -> (setup, fn, number); setup() returns the state passed to fn(state),
+# and is re-run before every timed repeat, outside the timing
+BENCHMARKS: dict[str, tuple[Callable, Callable, int]] = {}
+
+
+def benchmark(name: str, number: int = 1, setup: Callable = lambda: None):
+    def register(fn):
+        BENCHMARKS[name] = (setup, fn, number)
+        return fn
+    return register
+
+
+# ——— SCRAPER MICRO-BENCHMARKS ————————————————————————————
+ABC = pages("abc")
+CBS = pages("cbs")
+BUZZFEED = pages("buzzfeed")
+THETAB = pages("thetab")
+
+
+@benchmark("abc.parse_article_html", number=5)
+def _(state):
+    for entry, html in ABC:
+        abc_news_scraper.parse_article_html("Politics", entry["url"], html)
+
+
+@benchmark("abc.get_article_links[standin]", number=5)
+def _(state):
+    for entry, _ in pages("abc", kind="section"):
+        abc_news_scraper.get_article_links(STANDIN.url_for(entry), "Politics")
+
+
+@benchmark("abc.extract_article_data[standin]", number=5)
+def _(state):
+    for entry, _ in ABC:
+        abc_news_scraper.extract_article_data("Politics", STANDIN.url_for(entry))
+
+
+@benchmark("cbs.parse_article_html", number=5)
+def _(state):
+    for entry, html in CBS:
+        cbs_news_scraper.parse_article_html("Politics", entry["url"], html)
+
+
+def _cbs_bodies():
+    bodies = []
+    for _, html in CBS:
+        soup = BeautifulSoup(html, "html.parser")
+        bodies.append((soup, soup.select_one("div.article__body, div.content__body, article")))
+    return bodies
+
+
+@benchmark("cbs.clean_article_text", number=5, setup=_cbs_bodies)
+def _(bodies):
+    for soup, body in bodies:
+        cbs_news_scraper.clean_article_text(soup, body)
+
+
+@benchmark("buzzfeed.parse_article", number=5)
+def _(state):
+    for entry, html in BUZZFEED:
+        buzzfeed.parse_article_soup(BeautifulSoup(html, "html.parser"), entry["url"])
+
+
+@benchmark("links.count_links", number=20,
+           setup=lambda: [(BeautifulSoup(h, "html.parser"), e["url"]) for e, h in BUZZFEED])
+def _(soups):
+    for soup, url in soups:
+        article = soup.select_one("article")
+        links.count_links(soup, url, body=[article] if article else [])
+
+
+@benchmark("thetab.parse_article_html", number=5)
+def _(state):
+    for entry, html in THETAB:
+        the_tab_scraper.parse_article_html("news", entry["url"], html)
+
+
+@benchmark("metadata.scan_metadata", number=20)
+def _(state):
+    for entry, html in ABC + CBS + BUZZFEED + THETAB:
+        scan_metadata(html)
+
+
+# ——— DASHBOARD ———————————————————————————————————————————
+SOURCES = np.array(["ABC News", "CBS News", "BuzzFeed", "The Tab"])
+SECTIONS = np.array(["Politics", "World", "US", "Health", "Entertainment", "news", "tasty"])
+# the publication date formats each source (in SOURCES order) sends, before dates.py normalizes them
+DATE_FORMATS = ["%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S-0400", "%Y-%m-%dT%H:%M:%S.000Z", "%Y-%m-%dT%H:%M:%S+00:00"]
+
+
+def raw_dates(rows: int, seed: int = 0) -> tuple[pd.Series, pd.Series]:
+    """(source, raw publication date) columns as the sinks receive them."""
+    rng = np.random.default_rng(seed)
+    source_idx = rng.integers(0, len(SOURCES), rows)
+    stamps = pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 180 * 86400, rows), unit="s")
+    pub_dates = np.empty(rows, dtype=object)
+    for i, fmt in enumerate(DATE_FORMATS):
+        mask = source_idx == i
+        pub_dates[mask] = stamps[mask].strftime(fmt)
+    return pd.Series(SOURCES[source_idx], dtype=object), pd.Series(pub_dates)
+
+
+def synthetic_articles(rows: int, seed: int = 0) -> pd.DataFrame:
+    """A frame shaped like the dashboard's articles query result."""
+    rng = np.random.default_rng(seed)
+    source_idx = rng.integers(0, len(SOURCES), rows)
+    stamps = pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 180 * 86400, rows), unit="s")
+    return pd.DataFrame({
+        "source": SOURCES[source_idx],
+        "url": [f"https://example.com/a/{i}" for i in range(rows)],
+        "section": SECTIONS[rng.integers(0, len(SECTIONS), rows)],
+        "pub_date": stamps.strftime("%Y-%m-%dT%H:%M:%S+00:00"),  # as stored by dates.py
+        "headline": "Synthetic headline for benchmarking",
+        "headline_len": rng.integers(3, 25, rows),
+        "word_count": rng.integers(50, 3000, rows),
+        "internal_links": rng.integers(0, 40, rows),
+        "external_links": rng.integers(0, 20, rows),
+        "num_internal_links_within_body": rng.integers(0, 20, rows),
+        "num_external_links_within_body": rng.integers(0, 10, rows),
+        "scrape_date": stamps.strftime("%Y-%m-%dT%H:%M:%S.%f"),
+    })
+
+
+def _register_dashboard(rows: list[int]) -> None:
+    for n in rows:
+        frame = synthetic_articles(n)
+        label = f"{n // 1_000_000}m" if n >= 1_000_000 else f"{n // 1000}k"
+        # prepare_articles converts columns in place, so every repeat gets a fresh copy
+        benchmark(f"dashboard.prepare_articles[{label}]", setup=lambda f=frame: f.copy())(prepare_articles)
+        sources, dates = raw_dates(n)
+        benchmark(f"dates.normalize_dates[{label}]",
+                  setup=lambda s=sources, d=dates: (s, d))(lambda columns: normalize_dates(*columns))
+
+
+# ——— HARNESS —————————————————————————————————————————————
+def run_benchmark(setup: Callable, fn: Callable, number: int, repeat: int) -> list[float]:
+    """Seconds per call for each repeat."""
+    timings = []
+    sink = io.StringIO()
+    for _ in range(repeat):
+        state = setup()
+        # the extractors print progress and pandas may warn; keep both out
+        # of the timings and the terminal
+        with contextlib.redirect_stdout(sink), warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            started = time.perf_counter()
+            for _ in range(number):
+                fn(state)
+            elapsed = time.perf_counter() - started
+        sink.seek(0)
+        sink.truncate()
+        timings.append(elapsed / number)
+    return timings
+
+
+def git_sha() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(current: dict, baseline_path: str, threshold: float) -> bool:
+    """Print median-time changes against a baseline; True if nothing regressed."""
+    with open(baseline_path, encoding="utf-8") as fp:
+        baseline = json.load(fp)
+    ok = True
+    print(f"\nvs {baseline['meta']['git_sha']} ({baseline['meta']['timestamp']}):")
+    for name, res in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        ratio = res["median"] / baseline["results"][name]["median"]
+        flag = ""
+        if ratio > threshold:
+            flag, ok = "  REGRESSION", False
+        print(f"  {name:<40} {ratio:6.2f}x{flag}")
+    return ok
+
+
+def main(argv: list[str] | None = None) -> None:
+    global STANDIN
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filter", help="only benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--quick", action="store_true", help="3 repeats, 100k rows only")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000],
+                        help="synthetic frame sizes for the dashboard benchmarks")
+    parser.add_argument("--output", help="result file (default: results/<time>-<sha>.json)")
+    parser.add_argument("--compare", metavar="JSON", help="earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.10,
+                        help="slowdown ratio that counts as a regression")
+    args = parser.parse_args(argv)
+    repeat = 3 if args.quick else args.repeat
+    _register_dashboard([100_000] if args.quick else args.rows)
+
+    results = {}
+    with StandInServer() as STANDIN:
+        for name, (setup, fn, number) in BENCHMARKS.items():
+            if args.filter and args.filter not in name:
+                continue
+            timings = run_benchmark(setup, fn, number, repeat)
+            results[name] = {
+                "min": min(timings),
+                "median": statistics.median(timings),
+                "mean": statistics.fmean(timings),
+                "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+                "repeat": repeat,
+                "number": number,
+            }
+            print(f"{name:<40} median {results[name]['median'] * 1000:10.2f} ms")
+
+    report = {
+        "meta": {
+            "git_sha": git_sha(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    out = Path(args.output) if args.output else RESULTS / (
+        datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + f"-{report['meta']['git_sha']}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w", encoding="utf-8") as fp:
+        json.dump(report, fp, indent=2)
+    print(f"\nSaved {out}")
+
+    if args.compare and not compare(report, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
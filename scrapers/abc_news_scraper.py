@@ -1,9 +1,16 @@
 from bs4 import BeautifulSoup, SoupStrainer
 import requests
-import csv
 import re
 from datetime import datetime
-from urllib.parse import urlparse
+
+import profiling
+import streaming
+from adapters import SourceAdapter
+from feeds import canonicalize
+from links import count_links
+from metadata import soup_metadata
+from records import ArticleRecord
+from sinks import CsvSink
 
 SECTIONS = {
     "Politics": "https://abcnews.go.com/Politics",
@@ -17,123 +24,119 @@ SECTIONS = {
     "Lifestyle": "https://abcnews.go.com/Lifestyle",
 }
 
+# section -> RSS feeds; the section page is only scraped when these list nothing
+FEEDS = {
+    "Politics": ["https://abcnews.go.com/abcnews/politicsheadlines"],
+    "World": ["https://abcnews.go.com/abcnews/internationalheadlines"],
+    "US": ["https://abcnews.go.com/abcnews/usheadlines"],
+    "Technology": ["https://abcnews.go.com/abcnews/technologyheadlines"],
+    "Health": ["https://abcnews.go.com/abcnews/healthheadlines"],
+    "Sports": ["https://abcnews.go.com/abcnews/sportsheadlines"],
+    "Entertainment": ["https://abcnews.go.com/abcnews/entertainmentheadlines"],
+    "Business": ["https://abcnews.go.com/abcnews/moneyheadlines"],
+    "Lifestyle": ["https://abcnews.go.com/abcnews/lifestyleheadlines"],
+}
+
 article_link_regex = re.compile(
     r"^(?!.*(?:/video/|/photos/|/Live|/Shop|#|hulu\.com|disneyprivacycenter\.com|disneytermsofuse\.com|nielsen\.com|/contact)).*\/story(?:\?id=.*)?$|.*\/wireStory\/.*|.*\/thought\/.*|.*\/made-america\/.*"
 )
 
-def get_article_links(url, section_name):
-    response = requests.get(url)
+def get_article_links(url, section_name, session=requests):
+    response = streaming.get(session, url, timeout=10)
     if response.status_code != 200:
         print(f"Failed to retrieve page: {response.status_code}")
         return set()
     links_found = set()
     for link_tag in BeautifulSoup(response.content, 'html.parser', parse_only=SoupStrainer('a')):
         if link_tag.has_attr('href'):
-            href = link_tag['href']
-            if href.startswith('/'):
-                full_link = "https://abcnews.go.com" + href
-            elif href.startswith('./'):
-                full_link = url + href[1:]
-            else:
-                full_link = href
-            if article_link_regex.match(full_link):
+            full_link = canonicalize(link_tag['href'], base=url)
+            if full_link and article_link_regex.match(full_link):
                 links_found.add((section_name, full_link))
     return links_found
 
 def extract_article_data(section, url):
     try:
-        res = requests.get(url, timeout=10)
+        res = streaming.get(requests, url, timeout=10)
         if res.status_code != 200:
             return None
-        soup = BeautifulSoup(res.content, 'html.parser')
+        return parse_article_html(section, url, res.content)
+    except Exception as e:
+        print(f"Error scraping article {url}: {e}")
+        return None
 
-        headline_tag = soup.find('h1')
-        headline = headline_tag.get_text(strip=True) if headline_tag else ""
-        headline_length = len(headline.split())
+def parse_article_html(section, url, content):
+    return parse_article_soup(section, url, BeautifulSoup(content, 'html.parser'))
 
-        paragraphs = soup.find_all('p')
-        body_text = ' '.join(p.get_text() for p in paragraphs)
-        article_word_count = len(body_text.split())
+def parse_article_soup(section, url, soup):
+    meta = soup_metadata(soup)
 
-        pub_date = ""
+    headline_tag = soup.find('h1')
+    headline = headline_tag.get_text(strip=True) if headline_tag else (meta.headline or "")
+    headline_length = len(headline.split())
+
+    paragraphs = soup.find_all('p')
+    body_text = ' '.join(p.get_text() for p in paragraphs)
+    article_word_count = len(body_text.split())
+
+    # structured metadata first; the byline's class names are obfuscated and change.
+    # Either is stored as sent – the sink normalizes dates to UTC (see dates.py)
+    pub_date = meta.published or ""
+    if not pub_date:
         pub_element = soup.find('div', {'class': 'jTKbV zIIsP ZdbeE xAPpq QtiLO JQYD'})
-        pub_text = pub_element.get_text(strip=True) if pub_element else ""
-        pub_date = datetime.strptime(pub_text, "%B %d, %Y, %I:%M %p")
-
-        # Links
-        internal_links = 0
-        external_links = 0
-        
-        # Domain set for internal link checking
-        main_domain = "abcnews.go.com"
-
-        # Iterate over all 'a' tags within the article body (paragraphs)
-        links_to_check = []
-        for p in paragraphs:
-            links_to_check.extend(p.find_all('a', href=True))
-
-        for link in links_to_check:
-            href = link['href']
-            
-            if href.startswith('//'): 
-                full_href = "https:" + href
-            elif href.startswith('/'): # Absolute path relative to domain
-                full_href = "https://" + main_domain + href
-            elif not (href.startswith('http://') or href.startswith('https://')): # Relative path or other schemes
-                # Handle relative paths based on current URL (less common in article body links)
-                # Or skip non-http/s links if not relevant (e.g., mailto:, tel:)
-                if url.endswith('/'): # If current URL ends with /, append directly
-                    full_href = url + href
-                else: # If current URL doesn't end with /, assume last segment is file, go up one level
-                    full_href = url[:url.rfind('/') + 1] + href
-            else: # Already a full http/s URL
-                full_href = href
-
-            parsed_link = urlparse(full_href)
-
-            if parsed_link.netloc == main_domain:
-                internal_links += 1
-            elif parsed_link.netloc and parsed_link.scheme in ['http', 'https']: # Ensure it has a domain and is http/s
-                external_links += 1
-
-
-        return [
-            "ABC News",
-            url,
-            section,
-            pub_date,
-            headline,
-            headline_length,
-            article_word_count,
-            internal_links,
-            external_links,
-            datetime.now().isoformat(),
-            body_text 
-        ]
-    except Exception as e:
-        print(f"Error scraping article {url}: {e}")
-        return None
+        pub_date = pub_element.get_text(strip=True) if pub_element else ""
+
+    # whole page, and the links inside the article's paragraphs
+    links = count_links(soup, url, body=paragraphs)
+
+    return ArticleRecord(
+        source_name="ABC News",
+        article_url=url,
+        article_section=section,
+        publication_date=pub_date,
+        headline_text=headline,
+        headline_word_count=headline_length,
+        article_word_count=article_word_count,
+        num_internal_links=links.internal,
+        num_external_links=links.external,
+        num_internal_links_within_body=links.internal_within_body,
+        num_external_links_within_body=links.external_within_body,
+        article_full_text=body_text,
+        scrape_date=datetime.now().isoformat(),
+    )
+
+class AbcNewsAdapter(SourceAdapter):
+    name = "abc"
+    source_name = "ABC News"
+    sections = SECTIONS
+    feeds = FEEDS
+    max_concurrency = 4
+
+    def discover_section(self, session, section, url):
+        return get_article_links(url, section, session=session)
+
+    def accept_link(self, url):
+        return bool(article_link_regex.match(url))
+
+    def extract_soup(self, section, url, soup):
+        return parse_article_soup(section, url, soup)
 
 if __name__ == "__main__":
+    profiling.start_from_argv("abc")
+    adapter = AbcNewsAdapter()
     all_links = set()
     for section, url in SECTIONS.items():
         print(f"Scraping {section} section...")
-        all_links.update(get_article_links(url, section))
+        with profiling.stage("discover", url):
+            all_links.update(adapter.discover_feed_first(requests, section, url))
         print(f"Finished scraping {section} section.\n")
 
     all_links_list = list(all_links)
     total = len(all_links_list)
 
-    with open("abcnews_article_links.csv", 'w', newline='', encoding='utf-8') as csvfile:
-        csv_writer = csv.writer(csvfile)
-        csv_writer.writerow([
-            'Source', 'Article URL', 'Article Section', 'Publication Date',
-            'Headline (Text)', 'Headline Length', 'Article Word Count',
-            'Number of Internal Links', 'Number of External Links', 'Scrape Date',
-            'Article Body Text'
-        ])
+    with CsvSink("abcnews_article_links.csv", append=False) as sink:
         for i, (section, article_url) in enumerate(all_links_list, start=1):
             print(f"[{i}/{total}] Scraping article from section '{section}': {article_url}")
-            data = extract_article_data(section, article_url)
+            with profiling.stage("article", article_url):
+                data = extract_article_data(section, article_url)
             if data:
-                csv_writer.writerow(data)
+                sink.write(data)
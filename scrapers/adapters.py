@@ -0,0 +1,129 @@
+from __future__ import annotations
+import importlib
+from datetime import datetime, timezone
+from typing import Iterable
+
+import requests
+from bs4 import BeautifulSoup
+
+import streaming
+from feeds import feed_links
+from metadata import scan_metadata
+from records import ArticleRecord
+
+# registry key -> (module, class); imported lazily so running one source
+# doesn't require another source's dependencies (e.g. playwright for CBS)
+ADAPTERS = {
+    "abc":      ("abc_news_scraper", "AbcNewsAdapter"),
+    "cbs":      ("cbs_news_scraper", "CbsNewsAdapter"),
+    "buzzfeed": ("buzzfeed", "BuzzFeedAdapter"),
+    "thetab":   ("the_tab_scraper", "TheTabAdapter"),
+}
+
+
+# ——— ADAPTER INTERFACE ———————————————————————————————————
+class SourceAdapter:
+    """Common interface for a news source: discover links, fetch, extract, normalize.
+
+    `extract` returns an ArticleRecord (see records.py). Extraction is split
+    into `parse` (bytes -> soup) and `extract_soup` (soup -> record) so the
+    two stages can be timed separately.
+    """
+
+    name: str = ""
+    source_name: str = ""
+    sections: dict[str, str] = {}
+    # section -> RSS / Atom / news-sitemap URLs read before the section page
+    feeds: dict[str, list[str]] = {}
+    headers: dict[str, str] = {}
+    timeout: float = 10
+    max_concurrency: int = 4
+    request_delay: float = 0.0
+    # article fetches are streamed (see streaming.py): content-type -> byte cap
+    # overrides, the time-to-last-byte deadline, and the containers whose close
+    # ends the download of a body-only fetch – for sources whose body, and the
+    # links in it, are all inside one element
+    max_bytes: dict[str, int] = {}
+    download_deadline: float = streaming.DEFAULT_DEADLINE
+    article_container: list[streaming.Container] | None = None
+
+    def discover(self, session: requests.Session) -> set[tuple[str, str]]:
+        """Return the (section, article_url) pairs currently listed by the source."""
+        links = set()
+        for section, url in self.sections.items():
+            links.update(self.discover_feed_first(session, section, url))
+        return links
+
+    def discover_feed_first(self, session: requests.Session, section: str,
+                            url: str) -> set[tuple[str, str]]:
+        """The section's feeds, or its section page when they list nothing."""
+        return self.discover_feeds(session, section) or self.discover_section(session, section, url)
+
+    def discover_feeds(self, session: requests.Session, section: str) -> set[tuple[str, str]]:
+        """Return the (section, article_url) pairs listed in the section's `feeds`."""
+        urls = feed_links(session, self.feeds.get(section, ()), accept=self.accept_link,
+                          timeout=self.timeout, headers=self.headers or None)
+        return {(section, u) for u in urls}
+
+    def discover_section(self, session: requests.Session, section: str,
+                         url: str) -> set[tuple[str, str]]:
+        """Return the (section, article_url) pairs listed on one section page."""
+        raise NotImplementedError
+
+    def accept_link(self, url: str) -> bool:
+        """Whether a canonical URL from a feed is an article this source extracts."""
+        return True
+
+    def fetch_response(self, session: requests.Session, url: str, body_only: bool = False) -> requests.Response:
+        """The article page; with `body_only`, cut short once `article_container` has closed."""
+        res = streaming.get(session, url, timeout=self.timeout, headers=self.headers or None,
+                            caps=self.max_bytes, deadline=self.download_deadline,
+                            until=self.article_container if body_only else None)
+        res.raise_for_status()
+        return res
+
+    def fetch(self, session: requests.Session, url: str) -> bytes:
+        return self.fetch_response(session, url).content
+
+    def parse(self, content: bytes) -> BeautifulSoup:
+        return BeautifulSoup(content, "html.parser")
+
+    def extract_soup(self, section: str, url: str, soup: BeautifulSoup) -> ArticleRecord | None:
+        """Pull the article record out of a parsed page, or None to skip it."""
+        raise NotImplementedError
+
+    def extract(self, section: str, url: str, content: bytes) -> ArticleRecord | None:
+        """Parse a fetched page into its article record, or None to skip it."""
+        return self.extract_soup(section, url, self.parse(content))
+
+    def extract_metadata(self, section: str, url: str, content: bytes) -> ArticleRecord | None:
+        """Record with only METADATA_COLUMNS, read from structured metadata without a DOM parse.
+
+        Falls back to the full extractor when the page doesn't carry a
+        headline and publication date in JSON-LD / OpenGraph / meta tags.
+        """
+        meta = scan_metadata(content)
+        if meta.has(("headline", "published")):
+            return ArticleRecord(
+                source_name=self.source_name,
+                article_url=url,
+                article_section=section,
+                publication_date=meta.published,
+                headline_text=meta.headline,
+                headline_word_count=len(meta.headline.split()),
+                scrape_date=datetime.now(timezone.utc).isoformat(),
+            )
+        record = self.extract(section, url, content)
+        return None if record is None else record.metadata_only()
+
+
+def load_adapter(name: str) -> SourceAdapter:
+    try:
+        module_name, class_name = ADAPTERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown source {name!r}; expected one of {sorted(ADAPTERS)}") from None
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def load_adapters(names: Iterable[str] | None = None) -> list[SourceAdapter]:
+    return [load_adapter(n) for n in (names or ADAPTERS)]
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""Append-only archive of every fetched article page, for re-extraction without re-crawling.
+
+    python scrapers/orchestrator.py --archive raw_html/ ...                  # record while crawling
+    python scrapers/archive.py reextract raw_html/ --sources abc --output abc_fixed.csv
+
+Layout of an archive directory:
+
+* `segment-00000.warc.zst`, `segment-00001.warc.zst`, ... – WARC/1.1 response
+  records (WARC header, HTTP status line and headers, body), each one its own
+  zstd frame, so any record can be decompressed on its own from its offset;
+  a segment is closed once it passes `segment_bytes`.
+* `index.bin` – one fixed-width INDEX_DTYPE entry per record (URL hash, fetch
+  time, source, segment, offset, length). It is read by memory-mapping it as a
+  numpy array, so a lookup is a vectorized scan with no parsing.
+
+One process writes to an archive directory at a time.
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import logging
+import mmap
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import zstandard
+
+import profiling
+from adapters import ADAPTERS
+from bodies import BodyCodec
+from dates import DateQuarantine
+from db import get_engine
+from pipeline import ExtractionPipeline
+from sinks import sink_for
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s"
+)
+
+INDEX_DTYPE = np.dtype([
+    ("url_hash", "S8"),
+    ("fetched_at", "<f8"),
+    ("source", "S12"),
+    ("segment", "<u4"),
+    ("length", "<u4"),
+    ("offset", "<u8"),
+])
+
+
+def url_hash(url: str) -> bytes:
+    return hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest()
+
+
+@dataclass
+class ArchivedResponse:
+    url: str
+    source: str
+    section: str | None
+    fetched_at: float
+    status: int
+    headers: dict[str, str]
+    content: bytes
+
+
+# ——— RECORD FORMAT ———————————————————————————————————————
+def encode_record(url: str, source: str, section: str | None, fetched_at: float,
+                  status: int, headers: dict[str, str], content: bytes) -> bytes:
+    http_head = f"HTTP/1.1 {status}\r\n" + "".join(
+        f"{k}: {v}\r\n" for k, v in headers.items() if k.lower() in ("content-type", "etag", "last-modified")
+    ) + "\r\n"
+    block = http_head.encode("latin-1") + content
+    warc_head = (
+        "WARC/1.1\r\n"
+        "WARC-Type: response\r\n"
+        f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>\r\n"
+        f"WARC-Date: {datetime.fromtimestamp(fetched_at, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')}\r\n"
+        f"WARC-Target-URI: {url}\r\n"
+        f"X-Source: {source}\r\n"
+        f"X-Section: {section or ''}\r\n"
+        "Content-Type: application/http;msgtype=response\r\n"
+        f"Content-Length: {len(block)}\r\n"
+        "\r\n"
+    )
+    return warc_head.encode("utf-8") + block + b"\r\n\r\n"
+
+
+def decode_record(record: bytes) -> ArchivedResponse:
+    warc_head, _, rest = record.partition(b"\r\n\r\n")
+    fields = dict(line.split(": ", 1) for line in warc_head.decode("utf-8").split("\r\n")[1:])
+    block = rest[:int(fields["Content-Length"])]
+    http_head, _, content = block.partition(b"\r\n\r\n")
+    status_line, *header_lines = http_head.decode("latin-1").split("\r\n")
+    return ArchivedResponse(
+        url=fields["WARC-Target-URI"],
+        source=fields["X-Source"],
+        section=fields["X-Section"] or None,
+        fetched_at=datetime.strptime(fields["WARC-Date"], "%Y-%m-%dT%H:%M:%S.%fZ")
+                           .replace(tzinfo=timezone.utc).timestamp(),
+        status=int(status_line.split()[1]),
+        headers=dict(h.split(": ", 1) for h in header_lines if h),
+        content=content,
+    )
+
+
+# ——— ARCHIVE ———————————————————————————————————————————
+class HtmlArchive:
+    def __init__(self, directory: str, segment_bytes: int = 1 << 30, level: int = 10):
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.dir / "index.bin"
+        self.segment_bytes = segment_bytes
+        self.level = level
+        self._lock = threading.Lock()
+        self._segment_no: int | None = None
+        self._segment_fp = None
+        self._index_fp = None
+
+    def _segment_path(self, n: int) -> Path:
+        return self.dir / f"segment-{n:05d}.warc.zst"
+
+    # —— writing ——
+    def append(self, url: str, source: str, section: str | None, status: int,
+               headers: dict[str, str], content: bytes, fetched_at: float | None = None) -> None:
+        fetched_at = fetched_at or time.time()
+        frame = zstandard.ZstdCompressor(level=self.level).compress(
+            encode_record(url, source, section, fetched_at, status, headers, content)
+        )
+        with self._lock:
+            fp = self._writable_segment()
+            offset = fp.tell()
+            fp.write(frame)
+            fp.flush()
+            entry = np.array([(url_hash(url), fetched_at, source.encode()[:12],
+                               self._segment_no, len(frame), offset)], dtype=INDEX_DTYPE)
+            # the index entry goes last, so a reader never sees an entry for a partial frame
+            self._index_fp.write(entry.tobytes())
+            self._index_fp.flush()
+
+    def _writable_segment(self):
+        if self._segment_fp is None:
+            existing = sorted(self.dir.glob("segment-*.warc.zst"))
+            self._segment_no = int(existing[-1].name[8:13]) if existing else 0
+            self._segment_fp = open(self._segment_path(self._segment_no), "ab")
+            self._index_fp = open(self.index_path, "ab")
+        if self._segment_fp.tell() >= self.segment_bytes:
+            self._segment_fp.close()
+            self._segment_no += 1
+            self._segment_fp = open(self._segment_path(self._segment_no), "ab")
+        return self._segment_fp
+
+    def close(self) -> None:
+        with self._lock:
+            for fp in (self._segment_fp, self._index_fp):
+                if fp:
+                    fp.close()
+            self._segment_fp = self._index_fp = None
+
+    # —— reading ——
+    def index(self) -> np.ndarray:
+        """Memory-mapped snapshot of the index (read-only structured array)."""
+        size = self.index_path.stat().st_size if self.index_path.exists() else 0
+        size -= size % INDEX_DTYPE.itemsize
+        if size == 0:
+            return np.empty(0, dtype=INDEX_DTYPE)
+        with open(self.index_path, "rb") as fp:
+            mm = mmap.mmap(fp.fileno(), size, access=mmap.ACCESS_READ)
+        return np.frombuffer(mm, dtype=INDEX_DTYPE)
+
+    def read_entry(self, entry) -> ArchivedResponse:
+        with open(self._segment_path(int(entry["segment"])), "rb") as fp:
+            fp.seek(int(entry["offset"]))
+            frame = fp.read(int(entry["length"]))
+        return decode_record(zstandard.ZstdDecompressor().decompress(frame))
+
+    def get(self, url: str, at: float | None = None) -> ArchivedResponse | None:
+        """The latest capture of `url`, or the latest one at or before `at`."""
+        idx = self.index()
+        mask = idx["url_hash"] == url_hash(url)
+        if at is not None:
+            mask &= idx["fetched_at"] <= at
+        hits = idx[mask]
+        if hits.size == 0:
+            return None
+        return self.read_entry(hits[np.argmax(hits["fetched_at"])])
+
+    def entries(self, sources: list[str] | None = None, latest_only: bool = True,
+                since: float | None = None, until: float | None = None) -> np.ndarray:
+        """Index entries matching the filters, in on-disk order for sequential reads."""
+        idx = self.index()
+        mask = np.ones(idx.size, dtype=bool)
+        if sources:
+            mask &= np.isin(idx["source"], [s.encode() for s in sources])
+        if since is not None:
+            mask &= idx["fetched_at"] >= since
+        if until is not None:
+            mask &= idx["fetched_at"] <= until
+        hits = idx[mask]
+        if latest_only and hits.size:
+            # keep the newest capture per URL
+            order = np.lexsort((-hits["fetched_at"], hits["url_hash"]))
+            first = np.ones(order.size, dtype=bool)
+            first[1:] = hits["url_hash"][order][1:] != hits["url_hash"][order][:-1]
+            hits = hits[order[first]]
+        return hits[np.lexsort((hits["offset"], hits["segment"]))]
+
+    def iter_records(self, **filters) -> Iterator[ArchivedResponse]:
+        decompressor = zstandard.ZstdDecompressor()
+        fp, open_segment = None, None
+        try:
+            for entry in self.entries(**filters):
+                if entry["segment"] != open_segment:
+                    if fp:
+                        fp.close()
+                    open_segment = entry["segment"]
+                    fp = open(self._segment_path(int(open_segment)), "rb")
+                fp.seek(int(entry["offset"]))
+                yield decode_record(decompressor.decompress(fp.read(int(entry["length"]))))
+        finally:
+            if fp:
+                fp.close()
+
+
+# ——— REEXTRACT ———————————————————————————————————————————
+def reextract(archive: HtmlArchive, output: str, sources: list[str] | None = None,
+              processes: int | None = None, latest_only: bool = True,
+              since: float | None = None, until: float | None = None,
+              metadata_only: bool = False, codec: BodyCodec | None = None,
+              quarantine: DateQuarantine | None = None) -> dict:
+    """Rerun the current extractors over archived pages, in parallel and offline.
+
+    `metadata_only` reindexes just headlines and dates from the pages'
+    structured metadata, which skips the full DOM parse for most pages.
+    """
+    started = time.monotonic()
+    sink = sink_for(output, codec=codec, quarantine=quarantine)
+    submitted = 0
+    with sink, ExtractionPipeline(sink, processes=processes, metadata_only=metadata_only) as pipeline:
+        for rec in archive.iter_records(sources=sources, latest_only=latest_only,
+                                        since=since, until=until):
+            if rec.status != 200 or rec.source not in ADAPTERS:
+                continue
+            pipeline.submit(rec.source, rec.section, rec.url, rec.content)
+            submitted += 1
+    summary = {
+        "pages": submitted,
+        "scraped": sum(c["scraped"] for c in pipeline.stats.values()),
+        "failed": sum(c["extract_failed"] + c["write_failed"] for c in pipeline.stats.values()),
+        "seconds": round(time.monotonic() - started, 1),
+    }
+    logging.info("Re-extracted %d archived pages: %s", submitted, summary)
+    return summary
+
+
+def _timestamp(value: str) -> float:
+    """Epoch seconds for an ISO time; one without an offset is UTC."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).timestamp()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    rx = sub.add_parser("reextract", help="rerun extractors over the archive")
+    rx.add_argument("archive", help="archive directory")
+    rx.add_argument("--sources", nargs="+", choices=sorted(ADAPTERS))
+    rx.add_argument("--output", default="reextracted.csv")
+    rx.add_argument("--processes", type=int, help="extraction processes (default: one per core)")
+    rx.add_argument("--all-versions", action="store_true", help="every capture, not just the latest per URL")
+    rx.add_argument("--since", type=_timestamp,
+                    help="only captures fetched at/after this time (ISO, UTC unless it has an offset)")
+    rx.add_argument("--until", type=_timestamp,
+                    help="only captures fetched at/before this time (ISO, UTC unless it has an offset)")
+    rx.add_argument("--metadata-only", action="store_true",
+                    help="only re-extract headlines and dates (structured-metadata fast path)")
+    rx.add_argument("--compress-bodies", nargs="?", const="", metavar="DB_URL",
+                    help="store bodies compressed with the per-source dictionaries (default database: the one in .env)")
+    rx.add_argument("--date-quarantine", nargs="?", const="", metavar="DB_URL",
+                    help="keep unparseable publication dates for dates.py report (default database: the one in .env)")
+    profiling.add_arguments(rx)
+    args = parser.parse_args(argv)
+    profiling.start_from_args(args, "reextract")
+
+    if not os.path.isdir(args.archive):
+        parser.error(f"no archive at {args.archive}")
+    codec = BodyCodec(get_engine(args.compress_bodies or None)) if args.compress_bodies is not None else None
+    quarantine = DateQuarantine(get_engine(args.date_quarantine or None)) if args.date_quarantine is not None else None
+    reextract(HtmlArchive(args.archive), args.output, sources=args.sources,
+              processes=args.processes, latest_only=not args.all_versions,
+              since=args.since, until=args.until, metadata_only=args.metadata_only, codec=codec,
+              quarantine=quarantine)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""Stored article bodies, zstd-compressed with a trained dictionary per source.
+
+    python scrapers/bodies.py train                          # from the articles table in .env
+    python scrapers/bodies.py train --from data/cbs_article_links.csv --sources "CBS News"
+    python scrapers/bodies.py compress                       # re-encode the articles table
+    python scrapers/bodies.py compress data/cbs_article_links.csv
+
+Every outlet repeats the same bylines, credits and newsletter blurbs, so a
+dictionary trained on a sample of one source's bodies lets zstd compress a
+single body several times smaller than it could on its own. Each body is still
+its own frame, so reading one row never means decompressing others.
+
+Dictionaries live in `body_dictionaries`, one row per (source, version); a
+source's newest version is used for writing and every version stays readable.
+An encoded body is text – `zstd:<dictionary id>:<base85 frame>` – so it fits
+the existing text column and CSV files unchanged. `BodyCodec.decode` passes
+plain bodies through, which makes it safe to call on any stored value.
+"""
+from __future__ import annotations
+import argparse
+import base64
+import csv
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Iterable
+
+import zstandard
+from sqlalchemy import (Column, Float, Integer, LargeBinary, MetaData, String, Table, func, insert,
+                        inspect, select, text)
+from sqlalchemy.engine import Engine
+
+from db import create_tables, get_engine
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s"
+)
+
+metadata = MetaData()
+
+body_dictionaries = Table(
+    "body_dictionaries", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("source", String(32), nullable=False, index=True),
+    Column("version", Integer, nullable=False),
+    Column("trained_at", Float, nullable=False),
+    Column("samples", Integer, nullable=False),
+    Column("data", LargeBinary, nullable=False),
+)
+
+PREFIX = "zstd:"
+DICT_SIZE = 64 * 1024
+LEVEL = 12
+MIN_SAMPLES = 50
+SAMPLE_SIZE = 2000
+# header names of the body and source columns in CSVs written before ArticleRecord
+BODY_COLUMNS = ("article_full_text", "Full Article Text", "Article Body Text", "Article Text", "article_text")
+SOURCE_COLUMNS = ("source_name", "Source", "source")
+
+
+def is_encoded(value: str | None) -> bool:
+    return bool(value) and value.startswith(PREFIX)
+
+
+# ——— CODEC ———————————————————————————————————————————————
+class BodyCodec:
+    """Encodes bodies with their source's newest dictionary and decodes any version.
+
+    Dictionaries are read from the database on first use, and again whenever a
+    body names one this process hasn't seen (e.g. trained after it started).
+    Only `train` creates the table, so readers leave the database untouched.
+    """
+
+    def __init__(self, engine: Engine, level: int = LEVEL):
+        self.engine = engine
+        self.level = level
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._latest: dict[str, int] = {}
+        self._dicts: dict[int, zstandard.ZstdCompressionDict] = {}
+        self._compressors: dict[int, zstandard.ZstdCompressor] = {}
+        self._decompressors: dict[int, zstandard.ZstdDecompressor] = {}
+
+    def reload(self) -> None:
+        if not inspect(self.engine).has_table(body_dictionaries.name):
+            self._loaded = True
+            return
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(body_dictionaries.c.id, body_dictionaries.c.source, body_dictionaries.c.data)
+                .order_by(body_dictionaries.c.version)
+            ).all()
+        with self._lock:
+            for row in rows:
+                if row.id not in self._dicts:
+                    self._dicts[row.id] = zstandard.ZstdCompressionDict(row.data)
+                self._latest[row.source] = row.id
+            self._loaded = True
+
+    def dictionary_for(self, source: str) -> int | None:
+        """Id of the dictionary new bodies of `source` are encoded with."""
+        if not self._loaded:
+            self.reload()
+        return self._latest.get(source)
+
+    def encode(self, source: str, body: str | None) -> str | None:
+        """`body` compressed with the source's dictionary; unchanged if there is none or it doesn't shrink."""
+        if not body or is_encoded(body):
+            return body
+        dict_id = self.dictionary_for(source)
+        if dict_id is None:
+            return body
+        with self._lock:
+            compressor = self._compressors.get(dict_id)
+            if compressor is None:
+                compressor = self._compressors[dict_id] = zstandard.ZstdCompressor(
+                    level=self.level, dict_data=self._dicts[dict_id],
+                    write_checksum=False, write_dict_id=False,  # the prefix names the dictionary
+                )
+            frame = compressor.compress(body.encode("utf-8"))
+        encoded = f"{PREFIX}{dict_id}:{base64.b85encode(frame).decode('ascii')}"
+        return encoded if len(encoded) < len(body) else body
+
+    def decode(self, value: str | None) -> str | None:
+        """The plain body for a stored value, encoded or not."""
+        if not is_encoded(value):
+            return value
+        dict_id, _, payload = value[len(PREFIX):].partition(":")
+        dict_id = int(dict_id)
+        if dict_id not in self._dicts:
+            self.reload()
+            if dict_id not in self._dicts:
+                raise KeyError(f"body dictionary {dict_id} is not in body_dictionaries")
+        with self._lock:
+            decompressor = self._decompressors.get(dict_id)
+            if decompressor is None:
+                decompressor = self._decompressors[dict_id] = zstandard.ZstdDecompressor(
+                    dict_data=self._dicts[dict_id])
+            return decompressor.decompress(base64.b85decode(payload)).decode("utf-8")
+
+    # —— training ——
+    def train(self, source: str, samples: list[str], size: int = DICT_SIZE) -> int:
+        """Train and store the next dictionary version for `source`; returns its id."""
+        samples = [s.encode("utf-8") for s in samples if s]
+        if len(samples) < MIN_SAMPLES:
+            raise ValueError(f"{source}: {len(samples)} bodies, need at least {MIN_SAMPLES} to train")
+        # the trainer wants well over `size` bytes of samples to pick from
+        size = min(size, sum(map(len, samples)) // 10)
+        trained = zstandard.train_dictionary(size, samples, level=self.level)
+        create_tables(self.engine, metadata, [body_dictionaries])
+        with self.engine.begin() as conn:
+            version = conn.execute(
+                select(func.coalesce(func.max(body_dictionaries.c.version), 0))
+                .where(body_dictionaries.c.source == source)
+            ).scalar() + 1
+            dict_id = conn.execute(insert(body_dictionaries).values(
+                source=source, version=version, trained_at=time.time(),
+                samples=len(samples), data=trained.as_bytes(),
+            )).inserted_primary_key[0]
+        logging.info("Trained %s dictionary v%d (%d bytes, %d samples)",
+                     source, version, len(trained.as_bytes()), len(samples))
+        self.reload()
+        return dict_id
+
+
+# ——— STORED BODIES ———————————————————————————————————————
+def _csv_columns(header: list[str], path: str) -> tuple[int, int]:
+    try:
+        return (header.index(next(c for c in SOURCE_COLUMNS if c in header)),
+                header.index(next(c for c in BODY_COLUMNS if c in header)))
+    except StopIteration:
+        raise ValueError(f"{path} has no source/body columns") from None
+
+
+def csv_bodies(path: str) -> Iterable[tuple[str, str]]:
+    """(source, stored body) for every row of an articles CSV, old or new layout."""
+    csv.field_size_limit(sys.maxsize)
+    with open(path, newline="", encoding="utf-8") as fp:
+        reader = csv.reader(fp)
+        src, body = _csv_columns(next(reader), path)
+        for row in reader:
+            yield row[src], row[body]
+
+
+def table_bodies(engine: Engine, sources: list[str] | None = None,
+                 limit: int | None = None) -> Iterable[tuple[str, str]]:
+    """(source, stored body) from the articles table, a random sample of `limit` per source if given."""
+    with engine.connect() as conn:
+        if sources is None:
+            sources = list(conn.execute(text("SELECT DISTINCT source_name FROM articles")).scalars())
+        for source in sources:
+            sql = ("SELECT source_name, article_full_text FROM articles "
+                   "WHERE source_name = :source AND article_full_text IS NOT NULL")
+            if limit:
+                sql += " ORDER BY random() LIMIT :limit"
+            yield from conn.execute(text(sql), {"source": source, "limit": limit}).tuples()
+
+
+def compress_csv(codec: BodyCodec, path: str) -> tuple[int, int]:
+    """Re-encode the bodies of a CSV in place; returns (bytes before, bytes after)."""
+    csv.field_size_limit(sys.maxsize)
+    tmp = f"{path}.tmp"
+    before = after = 0
+    with open(path, newline="", encoding="utf-8") as src_fp, \
+            open(tmp, "w", newline="", encoding="utf-8") as out_fp:
+        reader, writer = csv.reader(src_fp), csv.writer(out_fp)
+        header = next(reader)
+        src, body = _csv_columns(header, path)
+        writer.writerow(header)
+        for row in reader:
+            before += len(row[body])
+            row[body] = codec.encode(row[src], codec.decode(row[body])) or ""
+            after += len(row[body])
+            writer.writerow(row)
+    os.replace(tmp, path)
+    return before, after
+
+
+def compress_table(codec: BodyCodec, engine: Engine, batch_size: int = 500) -> tuple[int, int]:
+    """Re-encode every body in the articles table with its source's newest dictionary.
+
+    The table has no key, and the same URL can be stored more than once (an
+    article scraped from two sections), so each update is matched on the URL
+    and the body it replaces: every row keeps its own body. Reads go a page of
+    URLs at a time, all of a URL's rows in the same page, so no read is still
+    open while its updates commit (SQLite won't commit under an open cursor).
+    """
+    before = after = 0
+    page = text("SELECT article_url, source_name, article_full_text FROM articles "
+                "WHERE article_full_text IS NOT NULL AND article_url IN ("
+                "SELECT DISTINCT article_url FROM articles WHERE article_full_text IS NOT NULL "
+                "AND article_url > :after ORDER BY article_url LIMIT :limit) ORDER BY article_url")
+    update = text("UPDATE articles SET article_full_text = :body "
+                  "WHERE article_url = :url AND article_full_text = :old")
+    last = ""
+    while True:
+        with engine.connect() as conn:
+            rows = conn.execute(page, {"after": last, "limit": batch_size}).all()
+        if not rows:
+            break
+        pending: list[dict] = []
+        for url, source, stored in rows:
+            body = codec.encode(source, codec.decode(stored))
+            before += len(stored)
+            after += len(body)
+            if body != stored:
+                pending.append({"url": url, "old": stored, "body": body})
+        if pending:
+            with engine.begin() as conn:
+                conn.execute(update, pending)
+        last = rows[-1].article_url
+    return before, after
+
+
+# ——— MAIN ———————————————————————————————————————————————
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="dictionary database URL (default: the one in .env)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    tr = sub.add_parser("train", help="train a new dictionary version per source")
+    tr.add_argument("--from", dest="source_of_samples", metavar="CSV_OR_DB_URL",
+                    help="where to sample bodies (default: the articles table of --db)")
+    tr.add_argument("--sources", nargs="+", metavar="SOURCE_NAME", help='e.g. "CBS News" (default: all)')
+    tr.add_argument("--sample", type=int, default=SAMPLE_SIZE, help="bodies per source to train on")
+    tr.add_argument("--size", type=int, default=DICT_SIZE, help="dictionary size in bytes")
+    cp = sub.add_parser("compress", help="re-encode stored bodies with the newest dictionaries")
+    cp.add_argument("target", nargs="?", help="articles CSV or DB URL (default: the articles table of --db)")
+    args = parser.parse_args(argv)
+
+    engine = get_engine(args.db)
+    codec = BodyCodec(engine)
+    if args.command == "train":
+        origin = args.source_of_samples
+        if origin and "://" not in origin:
+            bodies = (pair for pair in csv_bodies(origin) if not args.sources or pair[0] in args.sources)
+        else:
+            bodies = table_bodies(get_engine(origin) if origin else engine, args.sources, args.sample)
+        by_source: dict[str, list[str]] = {}
+        for source, stored in bodies:
+            sample = by_source.setdefault(source, [])
+            if len(sample) < args.sample and stored:
+                sample.append(codec.decode(stored))
+        for source, sample in sorted(by_source.items()):
+            try:
+                codec.train(source, sample, size=args.size)
+            except ValueError as ex:
+                logging.warning("Skipping %s", ex)
+        return
+
+    target = args.target
+    if target and "://" not in target:
+        if not Path(target).is_file():
+            parser.error(f"no CSV at {target}")
+        before, after = compress_csv(codec, target)
+    else:
+        before, after = compress_table(codec, get_engine(target) if target else engine)
+    logging.info("Bodies: %d -> %d characters (%.1fx)", before, after, before / max(after, 1))
+
+
+if __name__ == "__main__":
+    main()
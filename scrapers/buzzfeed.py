@@ -1,18 +1,24 @@
 #!/usr/bin/env python3
 from __future__ import annotations
-import csv
 import time
 import logging
 import xml.etree.ElementTree as ET
 from datetime import datetime, timezone
-from pathlib import Path
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urlparse
 
 import requests
 import feedparser
 from bs4 import BeautifulSoup
 from tqdm import tqdm
 
+import profiling
+import streaming
+from adapters import SourceAdapter
+from links import count_links
+from metadata import soup_metadata
+from records import ArticleRecord
+from sinks import CsvSink
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(message)s"
@@ -45,8 +51,8 @@ SITEMAP_NS    = {"sm": "http://www.sitemaps.org/schemas/sitemap/0.9"}
 
 
 # ——— PRELOAD SITEMAP ————————————————————————————————————
-def load_sitemap_urls() -> set[str]:
-    resp = SESSION.get(SITEMAP_INDEX, timeout=15)
+def load_sitemap_urls(session: requests.Session = SESSION) -> set[str]:
+    resp = streaming.get(session, SITEMAP_INDEX, timeout=15)
     resp.raise_for_status()
     root = ET.fromstring(resp.content)
     sitemap_urls = [
@@ -58,7 +64,7 @@ def load_sitemap_urls() -> set[str]:
     pages: set[str] = set()
     for sm in sitemap_urls:
         try:
-            r2 = SESSION.get(sm, timeout=15)
+            r2 = streaming.get(session, sm, timeout=15)
             r2.raise_for_status()
         except Exception:
             continue
@@ -70,30 +76,29 @@ def load_sitemap_urls() -> set[str]:
     logging.info("Loaded %d URLs from sitemap", len(pages))
     return pages
 
-ALL_SITEMAP_URLS = load_sitemap_urls()
+# loaded on first use, so importing this module doesn't hit the network
+ALL_SITEMAP_URLS: set[str] | None = None
 
 
-# ——— HELPERS —————————————————————————————————————————————
-def load_existing_urls(path: str) -> set[str]:
-    if not Path(path).exists():
-        return set()
-    seen = set()
-    with open(path, newline="", encoding="utf-8") as fp:
-        for row in csv.DictReader(fp):
-            seen.add(row["URL"])
-    return seen
+def get_sitemap_urls(session: requests.Session = SESSION) -> set[str]:
+    global ALL_SITEMAP_URLS
+    if ALL_SITEMAP_URLS is None:
+        ALL_SITEMAP_URLS = load_sitemap_urls(session)
+    return ALL_SITEMAP_URLS
 
 
-def get_section_links(section_url: str, label: str) -> list[str]:
+# ——— HELPERS —————————————————————————————————————————————
+def get_section_links(section_url: str, label: str,
+                      session: requests.Session = SESSION) -> list[str]:
     # 1) Try RSS discovery
     try:
-        page = SESSION.get(section_url, timeout=10)
+        page = streaming.get(session, section_url, timeout=10)
         page.raise_for_status()
         soup = BeautifulSoup(page.text, "html.parser")
         rss_tag = soup.find("link", {"type": "application/rss+xml"})
         feed_url = rss_tag["href"].strip() if (rss_tag and rss_tag.get("href")) else section_url.rstrip("/") + ".xml"
         logging.info("Fetching RSS for %s: %s", label, feed_url)
-        r = SESSION.get(feed_url, timeout=10)
+        r = streaming.get(session, feed_url, timeout=10)
         r.raise_for_status()
         feed = feedparser.parse(r.content)
         links = [e.link.strip() for e in feed.entries if getattr(e, "link", None)]
@@ -106,7 +111,7 @@ def get_section_links(section_url: str, label: str) -> list[str]:
     # 2) Fallback to sitemap
     prefix = f"https://www.buzzfeed.com/{label}/"
     matched = [
-        u for u in ALL_SITEMAP_URLS
+        u for u in get_sitemap_urls(session)
         if u.startswith(prefix)
         and "-" in urlparse(u).path.rstrip("/").split("/")[-1]
     ]
@@ -115,39 +120,24 @@ def get_section_links(section_url: str, label: str) -> list[str]:
 
 
 def get_soup(url: str) -> BeautifulSoup:
-    r = SESSION.get(url, timeout=20)
+    r = streaming.get(SESSION, url, timeout=20)
     r.raise_for_status()
     return BeautifulSoup(r.text, "html.parser")
 
 
-def count_links(soup: BeautifulSoup, article_url: str) -> tuple[int,int]:
-    """Count internal vs external <a> links in the <article> element."""
-    base = urlparse(article_url).netloc
-    container = soup.select_one("article") or soup
-
-    internal = 0
-    external = 0
-    for a in container.select("a[href]"):
-        dom = urlparse(urljoin(article_url, a["href"])).netloc
-        if dom == "" or base in dom:
-            internal += 1
-        else:
-            external += 1
-
-    return internal, external
-
-
 # ——— PARSER —————————————————————————————————————————————
-def parse_article(url: str) -> dict:
-    soup = get_soup(url)
+def parse_article(url: str, section: str | None = None) -> ArticleRecord:
+    return parse_article_soup(get_soup(url), url, section)
+
 
+def parse_article_soup(soup: BeautifulSoup, url: str, section: str | None = None) -> ArticleRecord:
     # Publication Date
-    pub = soup.find("meta", {"property": "article:published_time"})
-    pub_date = pub["content"].strip() if (pub and pub.get("content")) else ""
+    meta = soup_metadata(soup)
+    pub_date = meta.published or ""
 
     # Headline
     h1 = soup.find("h1")
-    headline = h1.get_text(strip=True) if h1 else ""
+    headline = h1.get_text(strip=True) if h1 else (meta.headline or "")
     hl_len = len(headline.split())
 
     # Body & word count
@@ -155,64 +145,85 @@ def parse_article(url: str) -> dict:
     text = " ".join(p.get_text(" ", strip=True) for p in paras)
     wc = len(text.split())
 
-    # Link counts
-    il, el = count_links(soup, url)
+    # Link counts, page-wide and inside <article>
+    article = soup.select_one("article")
+    links = count_links(soup, url, body=[article] if article else [])
 
     # Scrape timestamp
     sd = datetime.now(timezone.utc).isoformat()
 
-    return {
-        "Source":           "BuzzFeed",
-        "URL":              url,
-        "Section":          None,  # set below
-        "Publication Date": pub_date,
-        "Headline":         headline,
-        "Headline Length":  hl_len,
-        "Word Count":       wc,
-        "Internal Links":   il,
-        "External Links":   el,
-        "Article Text":     text,
-        "Scrape Date":      sd,
-    }
+    return ArticleRecord(
+        source_name="BuzzFeed",
+        article_url=url,
+        article_section=section,
+        publication_date=pub_date,
+        headline_text=headline,
+        headline_word_count=hl_len,
+        article_word_count=wc,
+        num_internal_links=links.internal,
+        num_external_links=links.external,
+        num_internal_links_within_body=links.internal_within_body,
+        num_external_links_within_body=links.external_within_body,
+        article_full_text=text,
+        scrape_date=sd,
+    )
+
+
+# ——— ADAPTER ————————————————————————————————————————————
+class BuzzFeedAdapter(SourceAdapter):
+    name            = "buzzfeed"
+    source_name     = "BuzzFeed"
+    sections        = SECTIONS
+    headers         = HEADERS
+    timeout         = 20
+    max_concurrency = 2
+    request_delay   = 0.5
+    # body text and within-body links both come from inside <article>
+    article_container = [("article", None, None)]
+
+    def __init__(self, limit_per_section: int | None = BATCH_PER):
+        self.limit_per_section = limit_per_section
+
+    def discover_section(self, session: requests.Session, section: str,
+                         url: str) -> set[tuple[str, str]]:
+        urls = get_section_links(url, section, session=session)
+        if self.limit_per_section:
+            urls = urls[:self.limit_per_section]
+        return {(section, u) for u in urls}
+
+    def extract_soup(self, section: str, url: str, soup: BeautifulSoup) -> ArticleRecord:
+        return parse_article_soup(soup, url, section)
 
 
 # ——— MAIN ———————————————————————————————————————————————
 def main(limit_per_section: int | None = None):
-    seen = load_existing_urls(CSV_FILE)
-    new_rows: list[dict] = []
-
-    for label, sec_url in SECTIONS.items():
-        urls = get_section_links(sec_url, label)
-        if limit_per_section:
-            urls = urls[:limit_per_section]
-
-        for u in tqdm(urls, desc=label, unit="url"):
-            if u in seen:
-                continue
-            try:
-                rec = parse_article(u)
-                rec["Section"] = label
-                new_rows.append(rec)
-                seen.add(u)
-            except Exception as ex:
-                logging.warning("parse failed %s: %s", u, ex)
-            time.sleep(0.5)
-
-    write_hdr = not Path(CSV_FILE).exists()
-    with open(CSV_FILE, "a", newline="", encoding="utf-8") as fp:
-        w = csv.DictWriter(fp, fieldnames=[
-            "Source","URL","Section","Publication Date",
-            "Headline","Headline Length","Word Count",
-            "Internal Links","External Links",
-            "Article Text","Scrape Date"
-        ])
-        if write_hdr:
-            w.writeheader()
-        for r in new_rows:
-            w.writerow(r)
-
-    logging.info("Done – appended %d rows", len(new_rows))
+    sink = CsvSink(CSV_FILE)
+    seen = sink.existing_urls()
+    appended = 0
+
+    with sink:
+        for label, sec_url in SECTIONS.items():
+            with profiling.stage("discover", sec_url):
+                urls = get_section_links(sec_url, label)
+            if limit_per_section:
+                urls = urls[:limit_per_section]
+
+            for u in tqdm(urls, desc=label, unit="url"):
+                if u in seen:
+                    continue
+                try:
+                    with profiling.stage("article", u):
+                        rec = parse_article(u, label)
+                    sink.write(rec)
+                    appended += 1
+                    seen.add(u)
+                except Exception as ex:
+                    logging.warning("parse failed %s: %s", u, ex)
+                time.sleep(0.5)
+
+    logging.info("Done – appended %d rows", appended)
 
 
 if __name__ == "__main__":
+    profiling.start_from_argv("buzzfeed")
     main(limit_per_section=BATCH_PER)
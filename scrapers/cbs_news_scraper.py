@@ -1,10 +1,19 @@
 from bs4 import BeautifulSoup
-import csv
 import re
+import requests
 from datetime import datetime
 from playwright.sync_api import sync_playwright
 import time as time_module
 import copy
+import logging
+
+import profiling
+from adapters import SourceAdapter
+from feeds import canonicalize
+from links import count_links
+from metadata import soup_metadata
+from records import ArticleRecord
+from sinks import CsvSink
 
 SECTIONS = {
     "Politics": "https://www.cbsnews.com/politics/",
@@ -17,6 +26,18 @@ SECTIONS = {
     "Sports": "https://www.cbsnews.com/sports/"
 }
 
+# section -> RSS feeds; the browser is only started for sections whose feeds list nothing
+FEEDS = {
+    "Politics": ["https://www.cbsnews.com/latest/rss/politics"],
+    "World": ["https://www.cbsnews.com/latest/rss/world"],
+    "U.S.": ["https://www.cbsnews.com/latest/rss/us"],
+    "Entertainment": ["https://www.cbsnews.com/latest/rss/entertainment"],
+    "Health": ["https://www.cbsnews.com/latest/rss/health"],
+    "MoneyWatch": ["https://www.cbsnews.com/latest/rss/moneywatch"],
+    "Science": ["https://www.cbsnews.com/latest/rss/science"],
+    "Sports": ["https://www.cbsnews.com/latest/rss/sports"],
+}
+
 # regex
 article_link_regex = re.compile(
     r"^https://www\.cbsnews\.com/(?:news|politics|world|us|entertainment|health|moneywatch|science|sports)/[^/]+(?:-[a-z0-9-]+)+(?:/)?$"
@@ -75,14 +96,10 @@ def get_article_links(page, url, section_name):
             elements = soup.select(selector)
             print(f"Found {len(elements)} elements with selector: {selector}")
             for element in elements:
-                href = element.get('href', '')
-                if href.startswith('/'):
-                    full_link = "https://www.cbsnews.com" + href
-                else:
-                    full_link = href
-                
+                full_link = canonicalize(element.get('href', ''), base=url)
+
                 # check article link
-                if (article_link_regex.match(full_link) and 
+                if (full_link and article_link_regex.match(full_link) and 
                     not any(section.lower() in full_link.lower() for section in SECTIONS.keys()) and
                     not any(exclude in full_link.lower() for exclude in ['/2/', '/3/', '/4/', '/5/', '/6/', '/7/', '/8/', '/9/', '/10/']) and
                     len(full_link.split('/')) > 4):  # make sure its not just a section page
@@ -161,107 +178,103 @@ def extract_article_data(page, section, url):
         content = page.content()
         print(f"  Content length: {len(content)}")
         
-        print(f"  Parsing with BeautifulSoup...")
-        soup = BeautifulSoup(content, 'html.parser')
-        print(f"  BeautifulSoup parsing completed")
+        return parse_article_html(section, url, content)
+    except Exception as e:
+        print(f"Error scraping article {url}: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
 
-        # get headline
-        print(f"  Extracting headline...")
-        headline = ""
-        headline_selectors = [
-            'h1.article__title',
-            'h1.content__title',
-            'h1[data-testid="article-title"]',
-            'h1'
-        ]
-        for selector in headline_selectors:
-            headline_tag = soup.select_one(selector)
-            if headline_tag:
-                headline = headline_tag.get_text(strip=True)
-                print(f"  Found headline: {headline[:50]}...")
-                break
+def parse_article_html(section, url, content):
+    """Extract article data from an already fetched article page"""
+    soup = BeautifulSoup(content, 'html.parser')
+    return parse_article_soup(section, url, soup)
 
-        if not headline:
-            print(f"Warning: No headline found on {url}")
-            return None
+def parse_article_soup(section, url, soup):
+    """Extract article data from a parsed article page"""
+    # get headline
+    headline = ""
+    headline_selectors = [
+        'h1.article__title',
+        'h1.content__title',
+        'h1[data-testid="article-title"]',
+        'h1'
+    ]
+    for selector in headline_selectors:
+        headline_tag = soup.select_one(selector)
+        if headline_tag:
+            headline = headline_tag.get_text(strip=True)
+            logging.debug("Found headline on %s: %s", url, headline[:50])
+            break
 
-        headline_length = len(headline.split())
+    if not headline:
+        logging.warning("No headline found on %s", url)
+        return None
 
-        # get article body and extract links
-        print(f"  Extracting article body...")
-        body_text = ""
-        full_article_text = ""
-        internal_links = 0
-        external_links = 0
-        
-        body_selectors = [
-            'div.article__body',
-            'div.content__body',
-            'div[data-testid="article-body"]',
-            'article'
-        ]
-        
-        for selector in body_selectors:
-            article_body = soup.select_one(selector)
-            if article_body:
-                print(f"  Found article body with selector: {selector}")
-                # extract clean article text
-                full_article_text = clean_article_text(soup, article_body)
-                
-                # extract paragraphs for body text
-                paragraphs = article_body.find_all('p')
-                body_text = ' '.join(p.get_text().strip() for p in paragraphs if p.get_text().strip())
-                
-                # ccount internal and external links
-                all_links = article_body.find_all('a', href=True)
-                for link in all_links:
-                    href = link.get('href', '')
-                    if href.startswith('/') or href.startswith('https://www.cbsnews.com'):
-                        internal_links += 1
-                    elif href.startswith('http'):
-                        external_links += 1
-                break
+    headline_length = len(headline.split())
 
-        article_word_count = len(body_text.split()) if body_text else 0
+    # get article body and extract links
+    body_text = ""
+    full_article_text = ""
+    article_body = None
 
-        # get pub date
-        print(f"  Extracting publication date...")
-        pub_date = ""
-        date_selectors = [
-            'time[datetime]',
-            'time.article__date',
-            'span.article__date',
-            'div.article__date'
-        ]
-        for selector in date_selectors:
-            date_element = soup.select_one(selector)
-            if date_element:
-                if date_element.name == 'time':
-                    pub_date = date_element.get('datetime', '')
-                else:
-                    pub_date = date_element.get_text(strip=True)
-                print(f"  Found publication date: {pub_date}")
-                break
+    body_selectors = [
+        'div.article__body',
+        'div.content__body',
+        'div[data-testid="article-body"]',
+        'article'
+    ]
+    
+    for selector in body_selectors:
+        article_body = soup.select_one(selector)
+        if article_body:
+            logging.debug("Found article body on %s with selector %s", url, selector)
+            # extract clean article text
+            full_article_text = clean_article_text(soup, article_body)
+            
+            # extract paragraphs for body text
+            paragraphs = article_body.find_all('p')
+            body_text = ' '.join(p.get_text().strip() for p in paragraphs if p.get_text().strip())
+            break
 
-        print(f"  Article extraction completed successfully")
-        return [
-            "CBS News",
-            url,
-            section,
-            pub_date,
-            headline,
-            headline_length,
-            article_word_count,
-            internal_links,
-            external_links,
-            full_article_text,
-            datetime.now().isoformat()
-        ]
-    except Exception as e:
-        print(f"Error scraping article {url}: {e}")
-        import traceback
-        traceback.print_exc()
-        return None
+    # count internal and external links, page-wide and inside the body
+    links = count_links(soup, url, body=[article_body] if article_body else [])
+
+    article_word_count = len(body_text.split()) if body_text else 0
+
+    # get pub date
+    pub_date = soup_metadata(soup).published or ""
+    date_selectors = [] if pub_date else [
+        'time[datetime]',
+        'time.article__date',
+        'span.article__date',
+        'div.article__date'
+    ]
+    for selector in date_selectors:
+        date_element = soup.select_one(selector)
+        if date_element:
+            if date_element.name == 'time':
+                pub_date = date_element.get('datetime', '')
+            else:
+                pub_date = date_element.get_text(strip=True)
+            logging.debug("Found publication date on %s: %s", url, pub_date)
+            break
+
+    return ArticleRecord(
+        source_name="CBS News",
+        article_url=url,
+        article_section=section,
+        publication_date=pub_date,
+        headline_text=headline,
+        headline_word_count=headline_length,
+        article_word_count=article_word_count,
+        num_internal_links=links.internal,
+        num_external_links=links.external,
+        num_internal_links_within_body=links.internal_within_body,
+        num_external_links_within_body=links.external_within_body,
+        article_full_text=full_article_text,
+        scrape_date=datetime.now().isoformat(),
+    )
 
 def create_browser_context(playwright):
     """Create a new browser context with optimized settings"""
@@ -306,7 +319,68 @@ def create_browser_context(playwright):
     
     return browser, context, page
 
+class CbsNewsAdapter(SourceAdapter):
+    """CBS News: section pages need a browser to render, article pages are fetched over plain HTTP"""
+    name = "cbs"
+    source_name = "CBS News"
+    sections = SECTIONS
+    feeds = FEEDS
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
+        'Accept-Language': 'en-US,en;q=0.9',
+    }
+    timeout = 20
+    max_concurrency = 2
+    request_delay = 0.75
+    # parse_article_html reads nothing after the body (the date comes from the head)
+    article_container = [
+        ("div", "class", "article__body"),
+        ("div", "class", "content__body"),
+        ("div", "data-testid", "article-body"),
+        ("article", None, None),
+    ]
+
+    def discover(self, session):
+        links = set()
+        unlisted = {}
+        for section, url in self.sections.items():
+            found = self.discover_feeds(session, section)
+            if found:
+                links.update(found)
+            else:
+                unlisted[section] = url
+        if not unlisted:
+            return links
+        print(f"No feed entries for {', '.join(unlisted)}; rendering the section pages")
+        # the sync playwright api is bound to the calling thread, so the browser
+        # lives and dies inside this call
+        with sync_playwright() as p:
+            browser, context, page = create_browser_context(p)
+            try:
+                for section, url in unlisted.items():
+                    links.update(get_article_links(page, url, section))
+                    random_sleep()
+            finally:
+                browser.close()
+        return links
+
+    def discover_section(self, session, section, url):
+        with sync_playwright() as p:
+            browser, context, page = create_browser_context(p)
+            try:
+                return get_article_links(page, url, section)
+            finally:
+                browser.close()
+
+    def accept_link(self, url):
+        return bool(article_link_regex.match(url))
+
+    def extract_soup(self, section, url, soup):
+        return parse_article_soup(section, url, soup)
+
 if __name__ == "__main__":
+    profiling.start_from_argv("cbs")
+    adapter = CbsNewsAdapter()
     with sync_playwright() as p:
         # launch browser with optimized settings for speed
         browser, context, page = create_browser_context(p)
@@ -314,23 +388,21 @@ if __name__ == "__main__":
         all_links = set()
         for section, url in SECTIONS.items():
             print(f"Scraping {section} section...")
-            section_links = get_article_links(page, url, section)
+            with profiling.stage("discover", url):
+                # feeds over plain HTTP first; render the section page only if they list nothing
+                section_links = adapter.discover_feeds(requests, section)
+                if not section_links:
+                    section_links = get_article_links(page, url, section)
+                    random_sleep()
             print(f"Found {len(section_links)} articles in {section}")
             all_links.update(section_links)
             print(f"Finished scraping {section} section.\n")
-            random_sleep()
 
         all_links_list = list(all_links)
         total = len(all_links_list)
         print(f"Total articles found: {total}")
 
-        with open("cbs_article_links.csv", 'w', newline='', encoding='utf-8') as csvfile:
-            csv_writer = csv.writer(csvfile)
-            csv_writer.writerow([
-                'Source', 'Article URL', 'Article Section', 'Publication Date',
-                'Headline (Text)', 'Headline Length', 'Article Word Count', 'Internal Links',
-                'External Links', 'Full Article Text', 'Scrape Date'
-            ])
+        with CsvSink("cbs_article_links.csv", append=False) as sink:
             
             successful_scrapes = 0
             failed_scrapes = 0
@@ -339,11 +411,12 @@ if __name__ == "__main__":
                 try:
                     print(f"[{i}/{total}] Scraping article from section '{section}': {article_url}")
                     
-                    data = extract_article_data(page, section, article_url)
+                    with profiling.stage("article", article_url):
+                        data = extract_article_data(page, section, article_url)
                     if data:
-                        csv_writer.writerow(data)
+                        sink.write(data)
                         successful_scrapes += 1
-                        print(f"✅ Successfully scraped article: {data[4]}")  # print headlines so its easier to see in terminal
+                        print(f"✅ Successfully scraped article: {data.headline_text}")  # print headlines so its easier to see in terminal
                     else:
                         failed_scrapes += 1
                         print(f"❌ Failed to scrape article: {article_url}") # print headlines so its easier to see in terminal
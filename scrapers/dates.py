@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""Publication dates normalized at ingest to UTC, with a quarantine for the ones that won't parse.
+
+    python scrapers/dates.py normalize                        # the articles table in .env
+    python scrapers/dates.py normalize data/cbs_article_links.csv
+    python scrapers/dates.py report                           # what's in quarantine
+
+Sources send dates in their own ways: ISO 8601 from article:published_time or
+JSON-LD (with "Z", "+00:00", "-0400" or no offset at all), and, when the
+metadata is missing, whatever the byline shows – "June 1, 2025, 10:05 PM" on
+ABC, "Updated on: June 1, 2025 / 10:05 PM EDT" on CBS. SOURCE_DATES lists each
+source's formats, the usual one first, and the timezone its naive times are in.
+
+`normalize_dates` parses a whole column at once: each source's values go
+through its formats one vectorized `pd.to_datetime` per format, each format
+only seeing what the previous ones left, then through COMMON_FORMATS. Every
+sink runs it on each batch before writing (see sinks.py), so the stored
+`publication_date` is always STORED_FORMAT – UTC, second precision, which also
+sorts correctly as text. Values nothing parses are stored as NULL and kept,
+with their article URL, in `date_quarantine`; once a format for them is
+added, `normalize` fixes the stored rows and releases them.
+"""
+from __future__ import annotations
+import argparse
+import csv
+import logging
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Column, Float, MetaData, String, Table, Text, delete, func, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+
+from db import create_tables, get_engine
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s"
+)
+
+metadata = MetaData()
+
+date_quarantine = Table(
+    "date_quarantine", metadata,
+    Column("article_url", Text, primary_key=True),
+    Column("source", String(32), nullable=False, index=True),
+    Column("raw_value", Text, nullable=False),
+    Column("first_seen", Float, nullable=False),
+    Column("last_seen", Float, nullable=False),
+)
+
+STORED_FORMAT = "%Y-%m-%dT%H:%M:%S+00:00"
+ISO = "ISO8601"  # pandas' ISO 8601 parser: "T" or space, any precision, offset optional
+
+
+@dataclass(frozen=True)
+class SourceDates:
+    timezone: str             # what a timestamp without an offset is in
+    formats: tuple[str, ...]  # tried in order; the first is what the source normally sends
+
+
+SOURCE_DATES = {
+    "ABC News": SourceDates("America/New_York", (ISO, "%B %d, %Y, %I:%M %p")),
+    "CBS News": SourceDates("America/New_York", (ISO, "%B %d, %Y / %I:%M %p", "%B %d, %Y")),
+    "BuzzFeed": SourceDates("America/New_York", (ISO,)),
+    "The Tab": SourceDates("Europe/London", (ISO, "%d %B %Y")),
+}
+DEFAULT_DATES = SourceDates("UTC", (ISO,))
+# tried for every source after its own formats: RFC 2822 as in RSS feeds
+COMMON_FORMATS = ("%a, %d %b %Y %H:%M:%S %z", "%d %b %Y %H:%M:%S %z")
+
+# header names of the columns normalize_csv needs, in CSVs written before ArticleRecord
+SOURCE_COLUMNS = ("source_name", "Source", "source")
+URL_COLUMNS = ("article_url", "Article URL", "URL", "url")
+DATE_COLUMNS = ("publication_date", "Publication Date", "pub_date")
+
+# a UTC offset ending a value: Z, +hh:mm or +hhmm, or GMT, UTC or UT as RFC 2822 allows
+_OFFSET_RE = re.compile(r"(?:(Z|GMT|UTC|UT)|([+-])(\d{2})(:?)(\d{2}))$")
+# byline decoration around a date; an Eastern time abbreviation is the US sources' own timezone
+_NOISE_RE = re.compile(r"^(?:updated|published|posted)(?: on)?:?\s*|\s*/\s*cbs news$|\s+E[SD]?T$",
+                       re.IGNORECASE)
+
+
+# ——— PARSING —————————————————————————————————————————————
+def _parse(values: pd.Series, fmt: str, timezone: str) -> pd.Series:
+    """`values` parsed with one format, in UTC; NaT where it doesn't fit.
+
+    A trailing UTC offset is split off and applied as a vectorized shift:
+    letting pandas parse offsets builds a tzinfo per row, about ten times slower.
+    """
+    # only the last 6 characters can hold an offset, so that's all the regex sees
+    parts = values.str.slice(-6).str.extract(_OFFSET_RE)
+    width = parts[0].str.len().fillna(0).astype(int) + parts[1].notna() * (5 + (parts[3] == ":"))
+    aware = width > 0
+    stamps = values.copy()
+    for w in range(1, 7):
+        if (width == w).any():
+            stamps[width == w] = values[width == w].str.slice(0, -w).str.rstrip()
+    local = pd.to_datetime(stamps, format=fmt.removesuffix("%z").rstrip(), errors="coerce")
+    parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns, UTC]")
+    if aware.any():
+        minutes = parts[2].astype(float).fillna(0) * 60 + parts[4].astype(float).fillna(0)
+        minutes = minutes.where(parts[1] != "-", -minutes)
+        parsed[aware] = (local[aware] - pd.to_timedelta(minutes[aware], unit="min")).dt.tz_localize("UTC")
+    if not aware.all():
+        # an hour repeated by a DST change is read as standard time
+        parsed[~aware] = local[~aware].dt.tz_localize(
+            timezone, ambiguous=np.zeros(int((~aware).sum()), dtype=bool), nonexistent="shift_forward",
+        ).dt.tz_convert("UTC")
+    return parsed
+
+
+def normalize_dates(sources: pd.Series, values: pd.Series) -> pd.Series:
+    """UTC timestamps for raw publication dates; NaT where a value is empty or nothing parses it."""
+    result = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns, UTC]")
+    present = values.notna()
+    if not present.any():
+        return result
+    raw = values[present].astype(str).str.strip()
+    raw = raw[raw != ""]
+    for source, index in sources[raw.index].groupby(sources[raw.index], sort=False).groups.items():
+        spec = SOURCE_DATES.get(source, DEFAULT_DATES)
+        pending = raw[index]
+        for i, fmt in enumerate(spec.formats + COMMON_FORMATS):
+            if i == 1:  # only what the usual format missed can be byline text
+                pending = pending.str.replace(_NOISE_RE, "", regex=True).str.strip()
+            parsed = _parse(pending, fmt, spec.timezone)
+            ok = parsed.notna()
+            result[parsed.index[ok]] = parsed[ok]
+            pending = pending[~ok]
+            if pending.empty:
+                break
+    return result
+
+
+def normalize_column(sources: list[str], values: list[str | None]) -> tuple[list[str | None], list[int]]:
+    """A batch's publication_date column as STORED_FORMAT strings, and the positions that didn't parse."""
+    raw = pd.Series(values, dtype=object)
+    parsed = normalize_dates(pd.Series(sources, dtype=object), raw)
+    stored = parsed.dt.strftime(STORED_FORMAT).astype(object).where(parsed.notna(), None)
+    given = raw.notna() & raw.astype(str).str.strip().ne("")
+    return stored.tolist(), np.flatnonzero(parsed.isna() & given).tolist()
+
+
+# ——— QUARANTINE ——————————————————————————————————————————
+class DateQuarantine:
+    """Publication dates that didn't parse, by article URL, until a format for them exists."""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self._insert = postgresql.insert if engine.dialect.name == "postgresql" else sqlite.insert
+        create_tables(engine, metadata, [date_quarantine])
+
+    def add(self, rejects: list[tuple[str, str, str]]) -> None:
+        """Quarantine (article_url, source, raw value) triples."""
+        if not rejects:
+            return
+        now = time.time()
+        stmt = self._insert(date_quarantine)
+        with self.engine.begin() as conn:
+            conn.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["article_url"],
+                    set_={"raw_value": stmt.excluded.raw_value, "last_seen": stmt.excluded.last_seen}),
+                [{"article_url": url, "source": source, "raw_value": str(raw), "first_seen": now, "last_seen": now}
+                 for url, source, raw in rejects],
+            )
+
+    def entries(self) -> pd.DataFrame:
+        with self.engine.connect() as conn:
+            return pd.read_sql_query(
+                select(date_quarantine.c.article_url, date_quarantine.c.source, date_quarantine.c.raw_value), conn)
+
+    def release(self, urls: list[str]) -> None:
+        if urls:
+            with self.engine.begin() as conn:
+                conn.execute(delete(date_quarantine).where(date_quarantine.c.article_url.in_(urls)))
+
+    def report(self) -> list[tuple[str, int, str]]:
+        """(source, count, an example raw value) for the quarantined dates, largest first."""
+        q = date_quarantine.c
+        with self.engine.connect() as conn:
+            return [tuple(row) for row in conn.execute(
+                select(q.source, func.count().label("n"), func.min(q.raw_value))
+                .group_by(q.source).order_by(func.count().desc())
+            )]
+
+
+def quarantine_rejects(quarantine: DateQuarantine | None, rejects: list[tuple[str, str, str]]) -> None:
+    """Record unparseable dates; without a quarantine table they are only logged."""
+    if not rejects:
+        return
+    if quarantine is not None:
+        quarantine.add(rejects)
+        logging.warning("Quarantined %d unparseable publication dates", len(rejects))
+        return
+    for url, source, raw in rejects:
+        logging.warning("[%s] unparseable publication date %r for %s", source, raw, url)
+
+
+# ——— STORED ARTICLES —————————————————————————————————————
+def _stored_text(value):
+    """A stored publication_date as normalize_column takes it.
+
+    A naive datetime comes from a timestamp column that normalized dates were
+    written to, which drops the offset, so it is UTC, not the source's time.
+    """
+    if isinstance(value, datetime):
+        return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).isoformat()
+    return value
+
+
+def normalize_table(engine: Engine, quarantine: DateQuarantine, chunk_size: int = 10_000) -> tuple[int, int]:
+    """Rewrite the articles table's dates to STORED_FORMAT; returns (rows changed, rows quarantined).
+
+    Quarantined values are retried first, so a newly added format fixes them too.
+
+    The table has no key, and the same URL can be stored more than once (an
+    article scraped from two sections), so each update is matched on the URL
+    and the value it replaces: every row keeps its own date. Reads go a chunk
+    of URLs at a time, all of a URL's rows in the same chunk, so no read is
+    open while its updates commit (SQLite won't commit under an open cursor).
+    """
+    update = text("UPDATE articles SET publication_date = :date "
+                  "WHERE article_url = :url AND publication_date = :old")
+    held = quarantine.entries()
+    changed = rejected = 0
+    if not held.empty:
+        parsed = normalize_dates(held["source"], held["raw_value"])
+        fixed = held[parsed.notna()]
+        if not fixed.empty:
+            with engine.begin() as conn:
+                conn.execute(
+                    text("UPDATE articles SET publication_date = :date "
+                         "WHERE article_url = :url AND publication_date IS NULL"),
+                    [{"url": url, "date": d} for url, d in
+                     zip(fixed["article_url"], parsed[fixed.index].dt.strftime(STORED_FORMAT))],
+                )
+            quarantine.release(fixed["article_url"].tolist())
+            changed += len(fixed)
+
+    page = text("SELECT article_url, source_name, publication_date FROM articles "
+                "WHERE publication_date IS NOT NULL AND article_url IN ("
+                "SELECT DISTINCT article_url FROM articles WHERE publication_date IS NOT NULL "
+                "AND article_url > :after ORDER BY article_url LIMIT :limit) ORDER BY article_url")
+    last = ""
+    while True:
+        with engine.connect() as reader:
+            rows = reader.execute(page, {"after": last, "limit": chunk_size}).all()
+        if not rows:
+            break
+        last = rows[-1].article_url
+        # the values as read, so each update matches the row it came from
+        urls, sources, olds = zip(*rows)
+        current = [_stored_text(v) for v in olds]
+        stored, bad = normalize_column(list(sources), current)
+        updates = [{"url": url, "old": old, "date": new} for url, old, was, new in
+                   zip(urls, olds, current, stored) if new != was]
+        if updates:
+            with engine.begin() as conn:
+                conn.execute(update, updates)
+        quarantine.add([(urls[i], sources[i], current[i]) for i in bad])
+        changed += len(updates) - len(bad)
+        rejected += len(bad)
+    return changed, rejected
+
+
+def _csv_column(header: list[str], names: tuple[str, ...], path: str) -> int:
+    try:
+        return header.index(next(c for c in names if c in header))
+    except StopIteration:
+        raise ValueError(f"{path} has none of the columns {names}") from None
+
+
+def normalize_csv(path: str, quarantine: DateQuarantine) -> tuple[int, int]:
+    """Rewrite an articles CSV's dates in place, old or new layout; returns (rows changed, rows quarantined)."""
+    csv.field_size_limit(sys.maxsize)
+    with open(path, newline="", encoding="utf-8") as fp:
+        reader = csv.reader(fp)
+        header = next(reader)
+        rows = list(reader)
+    src, url, date = (_csv_column(header, names, path) for names in (SOURCE_COLUMNS, URL_COLUMNS, DATE_COLUMNS))
+    values = [row[date] or None for row in rows]
+    stored, bad = normalize_column([row[src] for row in rows], values)
+    quarantine.add([(rows[i][url], rows[i][src], values[i]) for i in bad])
+    changed = 0
+    for row, old, new in zip(rows, values, stored):
+        changed += new is not None and new != old
+        row[date] = new or ""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(header)
+        writer.writerows(rows)
+    os.replace(tmp, path)
+    return changed, len(bad)
+
+
+# ——— MAIN ———————————————————————————————————————————————
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="quarantine database URL (default: the one in .env)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("report", help="quarantined dates grouped by source")
+    nm = sub.add_parser("normalize", help="rewrite stored dates as UTC, quarantining what doesn't parse")
+    nm.add_argument("target", nargs="?", help="articles CSV or DB URL (default: the articles table of --db)")
+    args = parser.parse_args(argv)
+
+    engine = get_engine(args.db)
+    quarantine = DateQuarantine(engine)
+    if args.command == "report":
+        for source, n, example in quarantine.report():
+            print(f"{n:6d}  {source:10s} e.g. {example!r}")
+        return
+
+    target = args.target
+    if target and "://" not in target:
+        changed, rejected = normalize_csv(target, quarantine)
+    else:
+        changed, rejected = normalize_table(get_engine(target) if target else engine, quarantine)
+    logging.info("Normalized %d dates, quarantined %d", changed, rejected)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+from __future__ import annotations
+import os
+
+from dotenv import load_dotenv
+from sqlalchemy import Column, MetaData, Table, create_engine, exc, inspect
+from sqlalchemy.engine import Engine
+
+# load environment variables
+load_dotenv()
+
+
+def database_url() -> str:
+    """Connection string for the articles database, built from the .env credentials."""
+    db_host = os.getenv('DB_HOST')
+    db_port = os.getenv('DB_PORT')
+    db_name = os.getenv('DB_NAME')
+    db_user = os.getenv('DB_USER')
+    db_password = os.getenv('DB_PASSWORD')
+    return f"postgresql+psycopg2://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
+
+
+def get_engine(url: str | None = None) -> Engine:
+    """Engine for `url`, or for the articles database when no url is given."""
+    return create_engine(url or database_url())
+
+
+def create_tables(engine: Engine, metadata: MetaData, tables: list[Table]) -> None:
+    """CREATE the given tables if missing, tolerating other nodes racing to do the same."""
+    try:
+        metadata.create_all(engine, tables=tables)
+    except exc.DBAPIError:
+        # another process created a table between the existence check and CREATE
+        if not all(inspect(engine).has_table(t.name) for t in tables):
+            raise
+
+
+def add_columns(engine: Engine, table: str, columns: list[Column]) -> list[str]:
+    """ALTER the existing `table` to add whichever of `columns` it lacks; returns the names added."""
+    present = {c["name"] for c in inspect(engine).get_columns(table)}
+    added = []
+    for column in columns:
+        if column.name in present:
+            continue
+        ddl = f"ALTER TABLE {table} ADD COLUMN {column.name} {column.type.compile(engine.dialect)}"
+        try:
+            with engine.begin() as conn:
+                conn.exec_driver_sql(ddl)
+        except exc.DBAPIError:
+            # another node added it first
+            if column.name not in {c["name"] for c in inspect(engine).get_columns(table)}:
+                raise
+            continue
+        added.append(column.name)
+    return added
@@ -0,0 +1,177 @@
+"""Near-duplicate detection for syndicated copy (MinHash signatures + LSH banding).
+
+The same wire story runs in several ABC sections and across outlets, usually
+with small edits, so exact hashes don't catch it. Each body is reduced to a
+MinHash signature over its word 5-grams; the fraction of equal signature slots
+estimates the Jaccard similarity of two bodies.
+
+To avoid comparing a new body against every stored one, the signature is cut
+into BANDS bands of ROWS slots and each band is hashed into a bucket key.
+Two bodies share at least one bucket with probability 1 - (1 - J**ROWS)**BANDS
+– near certain above J≈0.8 and rare below J≈0.5 – so lookup is one indexed
+`IN` query for the candidates, followed by an exact signature comparison
+against just those.
+"""
+from __future__ import annotations
+import hashlib
+import logging
+import re
+import zlib
+from typing import Iterable
+
+import numpy as np
+from sqlalchemy import (BigInteger, Column, Integer, LargeBinary, MetaData, String, Table, Text, insert, inspect,
+                        select)
+from sqlalchemy.engine import Engine
+
+from db import add_columns, create_tables
+
+NUM_PERM = 128
+BANDS, ROWS = 16, 8          # BANDS * ROWS == NUM_PERM
+SHINGLE_SIZE = 5
+DUPLICATE_THRESHOLD = 0.8    # estimated Jaccard at which a candidate is a confirmed duplicate
+
+_WORD_RE = re.compile(r"\w+")
+# fixed seed: signatures are persisted, so the permutations must never change
+_rng = np.random.RandomState(20250625)
+_PERM_XOR = _rng.randint(0, 2**63 - 1, size=NUM_PERM, dtype=np.int64).astype(np.uint64)
+_PERM_MUL = _rng.randint(0, 2**63 - 1, size=NUM_PERM, dtype=np.int64).astype(np.uint64) | np.uint64(1)
+_SHINGLE_MUL = np.uint64(0x9E3779B97F4A7C15)
+
+metadata = MetaData()
+
+dedup_signatures = Table(
+    "dedup_signatures", metadata,
+    Column("article_url", Text, primary_key=True),
+    Column("source", String(32)),
+    Column("cluster_id", String(16), nullable=False, index=True),
+    Column("similarity", Integer),          # % similarity to the cluster match, NULL for originals
+    Column("signature", LargeBinary, nullable=False),
+)
+
+dedup_bands = Table(
+    "dedup_bands", metadata,
+    Column("band_key", BigInteger, nullable=False, index=True),
+    Column("article_url", Text, nullable=False),
+)
+
+
+def add_cluster_column(engine: Engine, table: str = "articles") -> None:
+    """Give an articles table that predates --dedup its `duplicate_cluster_id` column.
+
+    DbSink only writes the columns its table has, so without this every
+    record's cluster would be dropped. A missing table is left alone.
+    """
+    if not inspect(engine).has_table(table):
+        return
+    if add_columns(engine, table, [Column("duplicate_cluster_id", String(16))]):
+        logging.info("Added duplicate_cluster_id to %s", table)
+
+
+# ——— SIGNATURES (pure functions, safe to run in worker processes) ——
+def shingle_hashes(text: str) -> np.ndarray:
+    """64-bit hashes of the word 5-grams of `text`, computed with numpy."""
+    tokens = _WORD_RE.findall(text.lower())
+    if not tokens:
+        return np.empty(0, dtype=np.uint64)
+    tok = np.fromiter((zlib.crc32(t.encode()) for t in tokens), dtype=np.uint64, count=len(tokens))
+    if len(tok) < SHINGLE_SIZE:
+        return np.unique(tok)
+    n = len(tok) - SHINGLE_SIZE + 1
+    h = np.zeros(n, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for i in range(SHINGLE_SIZE):
+            h = h * _SHINGLE_MUL + tok[i:i + n]
+    return np.unique(h)
+
+
+def minhash_signature(text: str) -> np.ndarray | None:
+    hashes = shingle_hashes(text)
+    if hashes.size == 0:
+        return None
+    with np.errstate(over="ignore"):
+        permuted = ((hashes[None, :] ^ _PERM_XOR[:, None]) * _PERM_MUL[:, None]) >> np.uint64(32)
+    return permuted.min(axis=1)
+
+
+def band_keys(signature: np.ndarray) -> list[int]:
+    keys = []
+    for b, band in enumerate(signature.reshape(BANDS, ROWS)):
+        digest = hashlib.blake2b(band.tobytes(), digest_size=8, person=b"band%04d" % b).digest()
+        keys.append(int.from_bytes(digest, "big", signed=True))
+    return keys
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.mean(a == b))
+
+
+def cluster_id_for(url: str) -> str:
+    return hashlib.blake2b(url.encode(), digest_size=8).hexdigest()
+
+
+# ——— INDEX ———————————————————————————————————————————————
+class NearDuplicateIndex:
+    """Persistent LSH index; one instance per process, used from a single thread."""
+
+    def __init__(self, engine: Engine, threshold: float = DUPLICATE_THRESHOLD):
+        self.engine = engine
+        self.threshold = threshold
+        create_tables(engine, metadata, [dedup_signatures, dedup_bands])
+        add_cluster_column(engine)
+
+    def known_urls(self, duplicates_only: bool = False) -> set[str]:
+        c = dedup_signatures.c
+        query = select(c.article_url)
+        if duplicates_only:
+            query = query.where(c.similarity.is_not(None))
+        with self.engine.connect() as conn:
+            return set(conn.execute(query).scalars())
+
+    def candidates(self, keys: Iterable[int]) -> list[tuple[str, str, np.ndarray]]:
+        sig = dedup_signatures.c
+        with self.engine.connect() as conn:
+            urls = select(dedup_bands.c.article_url).where(dedup_bands.c.band_key.in_(list(keys)))
+            rows = conn.execute(
+                select(sig.article_url, sig.cluster_id, sig.signature).where(sig.article_url.in_(urls))
+            ).all()
+        return [(u, cid, np.frombuffer(s, dtype=np.uint64)) for u, cid, s in rows]
+
+    def lookup(self, url: str) -> tuple[str, bool] | None:
+        """(cluster_id, is_duplicate) stored for `url`, or None if it isn't indexed."""
+        c = dedup_signatures.c
+        with self.engine.connect() as conn:
+            row = conn.execute(select(c.cluster_id, c.similarity).where(c.article_url == url)).first()
+        return None if row is None else (row.cluster_id, row.similarity is not None)
+
+    def assign(self, url: str, source: str | None, signature: np.ndarray | None) -> tuple[str, bool]:
+        """Return (cluster_id, is_duplicate) for a new body and record it in the index.
+
+        A confirmed duplicate joins its best match's cluster and is not added to
+        the band table – the cluster's first article already represents it. A
+        URL that is already indexed keeps the assignment it was given then,
+        even if its body has changed since.
+        """
+        if signature is None:
+            return cluster_id_for(url), False
+        known = self.lookup(url)
+        if known is not None:
+            return known
+        keys = band_keys(signature)
+        best_cluster, best_score = None, 0.0
+        for other_url, other_cluster, other_sig in self.candidates(keys):
+            score = similarity(signature, other_sig)
+            if score > best_score:
+                best_cluster, best_score = other_cluster, score
+
+        is_duplicate = best_score >= self.threshold
+        cluster = best_cluster if is_duplicate else cluster_id_for(url)
+        with self.engine.begin() as conn:
+            conn.execute(insert(dedup_signatures).values(
+                article_url=url, source=source, cluster_id=cluster,
+                similarity=round(best_score * 100) if is_duplicate else None,
+                signature=signature.tobytes(),
+            ))
+            if not is_duplicate:
+                conn.execute(insert(dedup_bands), [{"band_key": k, "article_url": url} for k in keys])
+        return cluster, is_duplicate
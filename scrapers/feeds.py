@@ -0,0 +1,123 @@
+"""Feed-first link discovery: RSS, Atom and (news) sitemaps over plain HTTP.
+
+A section's feeds list its newest articles in a few kB of XML, so reading them
+takes one request per endpoint and no rendering. `feed_links` fetches every
+endpoint configured for a section, detects the format from the root element,
+follows a sitemap index one level down and returns the canonical article
+URLs it found. Adapters fall back to scraping the section page only when
+that comes back empty (see `SourceAdapter.discover_feed_first`).
+
+`canonicalize` is shared with the page scrapers, so a story found through a
+feed and through its section page is the same URL: https, lower-case host,
+no default port, fragment or tracking parameters.
+"""
+from __future__ import annotations
+import logging
+import xml.etree.ElementTree as ET
+from typing import Callable, Iterable
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+import requests
+
+import streaming
+
+# query parameters that only say where a click came from
+TRACKING_PARAMS = {"cid", "ftag", "cmpid", "intcid", "taid", "fbclid", "gclid", "dclid", "mc_cid", "mc_eid"}
+TRACKING_PREFIXES = ("utm_",)
+# sitemap indexes list their newest children first; following them all would
+# pull in the whole archive
+MAX_CHILD_SITEMAPS = 3
+
+
+def canonicalize(url: str, base: str | None = None) -> str | None:
+    """Canonical form of an article URL, or None if it isn't an http(s) URL."""
+    url = url.strip()
+    if base:
+        url = urljoin(base, url)
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return None
+    if parts.scheme.lower() not in ("http", "https") or not parts.hostname:
+        return None
+    netloc = parts.hostname if port in (None, 80, 443) else f"{parts.hostname}:{port}"
+    query = urlencode([
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    ])
+    return urlunsplit(("https", netloc, parts.path or "/", query, ""))
+
+
+# ——— PARSING —————————————————————————————————————————————
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _child_text(element: ET.Element, name: str) -> str | None:
+    for child in element:
+        if _local(child.tag) == name and child.text and child.text.strip():
+            return child.text.strip()
+    return None
+
+
+def parse_feed(content: bytes) -> tuple[list[str], list[str]]:
+    """(article URLs, child sitemap URLs) from an RSS, Atom, urlset or sitemapindex document."""
+    root = ET.fromstring(content)
+    kind = _local(root.tag)
+    entries: list[str] = []
+    children: list[str] = []
+    if kind in ("rss", "RDF"):
+        for item in root.iter():
+            if _local(item.tag) != "item":
+                continue
+            link = _child_text(item, "link")
+            if link is None:
+                guid = next((c for c in item if _local(c.tag) == "guid"), None)
+                if guid is not None and guid.get("isPermaLink", "true") != "false":
+                    link = (guid.text or "").strip() or None
+            if link:
+                entries.append(link)
+    elif kind == "feed":
+        for entry in root:
+            if _local(entry.tag) != "entry":
+                continue
+            for link in entry:
+                if _local(link.tag) == "link" and link.get("rel", "alternate") == "alternate" and link.get("href"):
+                    entries.append(link.get("href"))
+                    break
+    elif kind == "urlset":
+        entries = [loc for url in root if (loc := _child_text(url, "loc"))]
+    elif kind == "sitemapindex":
+        children = [loc for sm in root if (loc := _child_text(sm, "loc"))]
+    else:
+        raise ValueError(f"not a feed or sitemap: <{kind}>")
+    return entries, children
+
+
+# ——— FETCHING ————————————————————————————————————————————
+def feed_links(session, endpoints: Iterable[str], accept: Callable[[str], bool] | None = None,
+               timeout: float = 10, headers: dict[str, str] | None = None) -> list[str]:
+    """Canonical article URLs listed by a section's feeds, newest first, without duplicates.
+
+    A failing endpoint is logged and skipped; `accept` filters out entries
+    that aren't articles (videos, galleries, live pages).
+    """
+    found: dict[str, None] = {}
+    pending = [(url, True) for url in endpoints]
+    while pending:
+        url, may_expand = pending.pop(0)
+        try:
+            res = streaming.get(session, url, timeout=timeout, headers=headers)
+            res.raise_for_status()
+            entries, children = parse_feed(res.content)
+        except (requests.RequestException, ET.ParseError, ValueError) as ex:
+            logging.warning("Feed %s unusable: %s", url, ex)
+            continue
+        if may_expand:
+            pending.extend((child, False) for child in children[:MAX_CHILD_SITEMAPS])
+        for entry in entries:
+            link = canonicalize(entry, base=url)
+            if link and (accept is None or accept(link)):
+                found.setdefault(link, None)
+    return list(found)
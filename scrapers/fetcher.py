@@ -0,0 +1,71 @@
+from __future__ import annotations
+from urllib.parse import urlsplit
+
+import requests
+
+from adapters import SourceAdapter
+from metrics import TimedHTTPAdapter
+from retry import CircuitBreakers
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/122.0.0.0 Safari/537.36"
+    ),
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+class GuardedHTTPAdapter(TimedHTTPAdapter):
+    """TimedHTTPAdapter that asks the host's circuit breaker before sending.
+
+    Connection errors, timeouts, any other exception from sending and 5xx/429
+    answers count against the host; any other answer closes its circuit.
+    Every outcome is recorded, so a probe never leaves its circuit half-open.
+    """
+
+    def __init__(self, breakers: CircuitBreakers, **kwargs):
+        self.breakers = breakers
+        super().__init__(**kwargs)
+
+    def send(self, request, *args, **kwargs):
+        host = urlsplit(request.url).hostname or ""
+        self.breakers.before(host)
+        response = None
+        try:
+            response = super().send(request, *args, **kwargs)
+        finally:
+            if response is None or response.status_code >= 500 or response.status_code == 429:
+                self.breakers.failure(host)
+            else:
+                self.breakers.success(host)
+        return response
+
+
+class Fetcher:
+    """One HTTP connection pool shared by every source in a crawl.
+
+    Each source gets its own `requests.Session` (so its default headers don't
+    leak into other sources), but all sessions are mounted on the same
+    `HTTPAdapter`, so keep-alive connections are pooled across the whole run.
+    The adapter stamps connect / time-to-first-byte timings on every response
+    for `CrawlMetrics.record_response`, and every request passes the per-host
+    circuit breakers first (see retry.py).
+    """
+
+    def __init__(self, pool_size: int = 16, breakers: CircuitBreakers | None = None):
+        self.breakers = breakers or CircuitBreakers()
+        self.http_adapter = GuardedHTTPAdapter(self.breakers, pool_connections=pool_size,
+                                               pool_maxsize=pool_size)
+
+    def session_for(self, adapter: SourceAdapter) -> requests.Session:
+        session = requests.Session()
+        session.mount("https://", self.http_adapter)
+        session.mount("http://", self.http_adapter)
+        session.headers.update(DEFAULT_HEADERS)
+        session.headers.update(adapter.headers)
+        return session
+
+    def close(self) -> None:
+        self.http_adapter.close()
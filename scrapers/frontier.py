@@ -0,0 +1,210 @@
+"""Shared crawl frontier so several crawler nodes can split one crawl.
+
+Work items (section pages to discover from, article pages to fetch) live in a
+`crawl_frontier` table keyed by URL, so a URL is only ever fetched once no
+matter how many nodes discover it. Nodes claim items with a lease:
+
+* claiming is `SELECT ... FOR UPDATE SKIP LOCKED` on Postgres, so concurrent
+  nodes never wait on or double-claim each other's rows (SQLite, used for local
+  runs and tests, serializes writers instead);
+* a lease that isn't completed before it expires (the node died or hung) makes
+  the item claimable again – the visibility timeout;
+* failed items are retried with exponential backoff until `max_attempts`
+  (at once marked failed if retrying can't help, e.g. a 404); items whose
+  host's circuit breaker is open are deferred without using up an attempt;
+* each claim takes at most `per_domain` items per domain, oldest-waiting
+  domain first, so one busy domain can't monopolize a node.
+
+Lease times are wall-clock epoch seconds taken on the claiming node, so nodes
+are expected to keep their clocks in sync (NTP).
+"""
+from __future__ import annotations
+import time
+from dataclasses import dataclass
+from typing import Iterable
+from urllib.parse import urlparse
+
+from sqlalchemy import (Column, Float, Integer, MetaData, String, Table, Text,
+                        and_, func, or_, select, update)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+
+from db import create_tables
+from retry import backoff_delay
+
+metadata = MetaData()
+
+crawl_frontier = Table(
+    "crawl_frontier", metadata,
+    Column("url", Text, primary_key=True),
+    Column("kind", String(16), nullable=False),        # "section" | "article"
+    Column("source", String(32), nullable=False),
+    Column("section", Text),
+    Column("domain", Text, nullable=False, index=True),
+    Column("state", String(16), nullable=False, index=True, default="pending"),
+    Column("attempts", Integer, nullable=False, default=0),
+    Column("lease_owner", Text),
+    Column("lease_expires_at", Float),
+    Column("available_at", Float, nullable=False),
+    Column("last_error", Text),
+    Column("created_at", Float, nullable=False),
+    Column("updated_at", Float, nullable=False),
+)
+
+PENDING, LEASED, DONE, FAILED = "pending", "leased", "done", "failed"
+
+
+@dataclass(frozen=True)
+class Lease:
+    url: str
+    kind: str
+    source: str
+    section: str | None
+    attempts: int
+    owner: str
+
+
+class Frontier:
+    def __init__(self, engine: Engine, lease_seconds: float = 300, max_attempts: int = 5,
+                 per_domain: int = 4, backoff_base: float = 30, backoff_cap: float = 3600):
+        self.engine = engine
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.per_domain = per_domain
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._insert = postgresql.insert if engine.dialect.name == "postgresql" else sqlite.insert
+        self._skip_locked = engine.dialect.name == "postgresql"
+        create_tables(engine, metadata, [crawl_frontier])
+
+    # ——— producing ———————————————————————————————————————
+    def add(self, kind: str, source: str, items: Iterable[tuple[str | None, str]],
+            refresh_after: float | None = None) -> int:
+        """Add (section, url) items; URLs already in the frontier are left alone.
+
+        With `refresh_after`, items that finished more than that many seconds
+        ago are made pending again – used to re-run section discovery.
+        """
+        now = time.time()
+        rows = [
+            {"url": url, "kind": kind, "source": source, "section": section,
+             "domain": urlparse(url).netloc.lower(), "state": PENDING, "attempts": 0,
+             "available_at": now, "created_at": now, "updated_at": now}
+            for section, url in items
+        ]
+        if not rows:
+            return 0
+        stmt = self._insert(crawl_frontier).on_conflict_do_nothing(index_elements=["url"])
+        with self.engine.begin() as conn:
+            added = conn.execute(stmt, rows).rowcount
+            if refresh_after is not None:
+                conn.execute(
+                    update(crawl_frontier)
+                    .where(crawl_frontier.c.url.in_([r["url"] for r in rows]),
+                           crawl_frontier.c.state.in_([DONE, FAILED]),
+                           crawl_frontier.c.updated_at < now - refresh_after)
+                    .values(state=PENDING, attempts=0, available_at=now, updated_at=now)
+                )
+        return max(added, 0)
+
+    # ——— consuming ———————————————————————————————————————
+    def _claimable(self, now: float):
+        c = crawl_frontier.c
+        return or_(
+            and_(c.state == PENDING, c.available_at <= now),
+            and_(c.state == LEASED, c.lease_expires_at < now),  # visibility timeout
+        )
+
+    def claim(self, owner: str, limit: int, source: str | None = None,
+              kinds: Iterable[str] | None = None) -> list[Lease]:
+        c = crawl_frontier.c
+        now = time.time()
+        filters = [self._claimable(now)]
+        if source:
+            filters.append(c.source == source)
+        if kinds:
+            filters.append(c.kind.in_(list(kinds)))
+
+        leases: list[Lease] = []
+        with self.engine.begin() as conn:
+            # domains with ready work, the one waiting longest first
+            domains = conn.execute(
+                select(c.domain).where(*filters)
+                .group_by(c.domain).order_by(func.min(c.available_at)).limit(limit)
+            ).scalars().all()
+
+            for domain in domains:
+                if len(leases) >= limit:
+                    break
+                candidates = (
+                    select(c.url).where(*filters, c.domain == domain)
+                    .order_by(c.available_at)
+                    .limit(min(self.per_domain, limit - len(leases)))
+                )
+                if self._skip_locked:
+                    candidates = candidates.with_for_update(skip_locked=True)
+                urls = conn.execute(candidates).scalars().all()
+                if not urls:
+                    continue
+                # the claimable guard is re-checked here, so on SQLite a row another
+                # node claimed between our select and update is simply not returned
+                claimed = conn.execute(
+                    update(crawl_frontier)
+                    .where(c.url.in_(urls), self._claimable(now))
+                    .values(state=LEASED, lease_owner=owner,
+                            lease_expires_at=now + self.lease_seconds,
+                            attempts=c.attempts + 1, updated_at=now)
+                    .returning(c.url, c.kind, c.source, c.section, c.attempts)
+                ).all()
+                leases.extend(Lease(*row, owner=owner) for row in claimed)
+        return leases
+
+    def extend(self, lease: Lease) -> bool:
+        """Push a long-running lease's expiry out by another `lease_seconds`."""
+        return self._update_lease(lease, lease_expires_at=time.time() + self.lease_seconds)
+
+    def complete(self, lease: Lease) -> bool:
+        return self._update_lease(lease, state=DONE, lease_owner=None, lease_expires_at=None,
+                                  last_error=None)
+
+    def fail(self, lease: Lease, error: str, retryable: bool = True) -> bool:
+        """Record a failure; retry later with backoff, or give up after max_attempts."""
+        if not retryable or lease.attempts >= self.max_attempts:
+            return self._update_lease(lease, state=FAILED, lease_owner=None,
+                                      lease_expires_at=None, last_error=error)
+        delay = backoff_delay(lease.attempts, self.backoff_base, self.backoff_cap)
+        return self._update_lease(lease, state=PENDING, lease_owner=None, lease_expires_at=None,
+                                  available_at=time.time() + delay, last_error=error)
+
+    def defer(self, lease: Lease, until: float, error: str) -> bool:
+        """Hand an item back untried (its host is unavailable); the attempt doesn't count."""
+        return self._update_lease(lease, state=PENDING, lease_owner=None, lease_expires_at=None,
+                                  attempts=crawl_frontier.c.attempts - 1, available_at=until,
+                                  last_error=error)
+
+    def _update_lease(self, lease: Lease, **values) -> bool:
+        c = crawl_frontier.c
+        with self.engine.begin() as conn:
+            # only the current lease holder may finish an item; a node whose lease
+            # already expired and was re-claimed elsewhere updates nothing
+            result = conn.execute(
+                update(crawl_frontier)
+                .where(c.url == lease.url, c.state == LEASED, c.lease_owner == lease.owner)
+                .values(updated_at=time.time(), **values)
+            )
+        return result.rowcount == 1
+
+    # ——— reporting ———————————————————————————————————————
+    def counts(self) -> dict[tuple[str, str], int]:
+        c = crawl_frontier.c
+        with self.engine.connect() as conn:
+            rows = conn.execute(select(c.kind, c.state, func.count()).group_by(c.kind, c.state))
+            return {(kind, state): n for kind, state, n in rows}
+
+    def has_pending(self, source: str | None = None) -> bool:
+        c = crawl_frontier.c
+        filters = [c.state.in_([PENDING, LEASED])]
+        if source:
+            filters.append(c.source == source)
+        with self.engine.connect() as conn:
+            return conn.execute(select(c.url).where(*filters).limit(1)).first() is not None
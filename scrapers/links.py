@@ -0,0 +1,107 @@
+"""Internal/external link classification shared by every source.
+
+A link is internal when its host has the same registrable domain as the
+page's: www.cbsnews.com, cbsnews.com and assets.cbsnews.com are one site.
+Shared parent domains listed in SITE_SUFFIXES act as public suffixes, so
+abcnews.go.com is its own site and a link to espn.go.com is external.
+Relative links (paths, queries, fragments) are internal; non-web schemes
+(mailto:, tel:, javascript:, ...) are not counted at all.
+
+`classify` is memoized per (site, href), so the navigation, footer and share
+links repeated on every page of a source are parsed once per process.
+`count_links` classifies all anchors of a page in one pass and returns both
+the whole-page and the in-body counts.
+
+    counts = count_links(soup, url, body=[article_body])
+    counts.internal, counts.external_within_body
+"""
+from __future__ import annotations
+from functools import lru_cache
+from typing import Iterable, NamedTuple
+from urllib.parse import urlsplit
+
+from bs4 import BeautifulSoup, Tag
+
+INTERNAL = "internal"
+EXTERNAL = "external"
+WEB_SCHEMES = {"http", "https"}
+# two-label public suffixes that show up in outbound news links
+MULTI_LABEL_SUFFIXES = {
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "com.au", "net.au", "org.au",
+    "co.nz", "co.jp", "co.in", "co.za", "com.br", "com.mx",
+}
+# parent domains shared by unrelated sites; their subdomains are separate sites
+SITE_SUFFIXES = {"go.com"}
+
+
+class LinkCounts(NamedTuple):
+    internal: int
+    external: int
+    internal_within_body: int
+    external_within_body: int
+
+
+@lru_cache(maxsize=4096)
+def registrable_domain(host: str) -> str:
+    """The domain a site registered: www.cbsnews.com -> cbsnews.com, abcnews.go.com -> itself."""
+    host = host.lower().rstrip(".")
+    if ":" in host or host.replace(".", "").isdigit():  # IP address
+        return host
+    labels = host.split(".")
+    if len(labels) > 2:
+        suffix = ".".join(labels[-2:])
+        if suffix in MULTI_LABEL_SUFFIXES or suffix in SITE_SUFFIXES:
+            return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+def site_of(url: str) -> str:
+    return registrable_domain(urlsplit(url).hostname or "")
+
+
+@lru_cache(maxsize=65536)
+def classify(site: str, href: str) -> str | None:
+    """INTERNAL, EXTERNAL or None (not a web link) for an href on a page of `site`."""
+    href = href.strip()
+    if not href:
+        return None
+    try:
+        parts = urlsplit(href)
+        host = parts.hostname
+    except ValueError:  # e.g. a malformed IPv6 literal
+        return None
+    if parts.scheme and parts.scheme.lower() not in WEB_SCHEMES:
+        return None
+    if not parts.netloc:
+        return INTERNAL
+    if not host:
+        return None
+    return INTERNAL if registrable_domain(host) == site else EXTERNAL
+
+
+def count_hrefs(site: str, hrefs: Iterable[str]) -> tuple[int, int]:
+    """(internal, external) over a batch of hrefs from one page."""
+    internal = external = 0
+    for href in hrefs:
+        kind = classify(site, href)
+        if kind == INTERNAL:
+            internal += 1
+        elif kind == EXTERNAL:
+            external += 1
+    return internal, external
+
+
+def count_links(soup: BeautifulSoup, page_url: str, body: Iterable[Tag] = ()) -> LinkCounts:
+    """Whole-page and in-body link counts for a parsed page.
+
+    `body` is the element(s) holding the article text – the article container,
+    or its paragraphs for sources without one.
+    """
+    site = site_of(page_url)
+    internal, external = count_hrefs(site, (a["href"] for a in soup.find_all("a", href=True)))
+    body_internal = body_external = 0
+    for element in body:
+        i, e = count_hrefs(site, (a["href"] for a in element.find_all("a", href=True)))
+        body_internal += i
+        body_external += e
+    return LinkCounts(internal, external, body_internal, body_external)
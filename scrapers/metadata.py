@@ -0,0 +1,229 @@
+"""Structured-metadata fast path: headline and dates from JSON-LD / OpenGraph / <meta>.
+
+News pages publish their headline and timestamps as structured metadata in
+`<head>` (OpenGraph and `article:*` meta tags) and in JSON-LD blocks. Reading
+those is far cheaper than building the whole DOM:
+
+* `scan_metadata(content)` streams the raw bytes through an `HTMLParser` that
+  only looks at `<meta>`, `<title>`, `<link rel=canonical>`, `time[datetime]`
+  and JSON-LD scripts, and stops as soon as the fields it needs are found
+  (usually before `</head>`). No tree is built.
+* `soup_metadata(soup)` reads the same fields from an already parsed page, so
+  the DOM extractors resolve dates the same way.
+
+Either way, fields the page doesn't carry stay None and the caller falls back
+to its DOM extractor.
+"""
+from __future__ import annotations
+import codecs
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from html.parser import HTMLParser
+from typing import Any, Iterable
+
+from bs4 import BeautifulSoup
+
+CHUNK_SIZE = 16 * 1024
+ARTICLE_TYPES = {"NewsArticle", "Article", "ReportageNewsArticle", "AnalysisNewsArticle",
+                 "BlogPosting", "LiveBlogPosting", "WebPage"}
+
+# PageMetadata field -> meta keys (property= or name=) that carry it, best first
+META_KEYS = {
+    "headline": ("og:title", "twitter:title"),
+    "published": ("article:published_time", "og:published_time", "datePublished",
+                  "parsely-pub-date", "pubdate", "date"),
+    "modified": ("article:modified_time", "og:updated_time", "dateModified"),
+    "section": ("article:section",),
+    "canonical_url": ("og:url",),
+}
+# PageMetadata field -> JSON-LD keys
+LD_KEYS = {
+    "headline": ("headline", "name"),
+    "published": ("datePublished", "dateCreated"),
+    "modified": ("dateModified",),
+    "section": ("articleSection",),
+    "canonical_url": ("url", "mainEntityOfPage"),
+}
+
+
+@dataclass
+class PageMetadata:
+    headline: str | None = None
+    published: str | None = None
+    modified: str | None = None
+    section: str | None = None
+    canonical_url: str | None = None
+
+    def has(self, fields: Iterable[str]) -> bool:
+        return all(getattr(self, f) for f in fields)
+
+
+def parse_timestamp(value: str | None) -> datetime | None:
+    """ISO 8601 timestamp (as used by JSON-LD and article:* tags), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    # Python 3.11's fromisoformat handles "Z" but not a "+0000" offset without a colon
+    if len(value) > 5 and value[-5] in "+-" and value[-4:].isdigit():
+        value = f"{value[:-2]}:{value[-2:]}"
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+# ——— FIELD RESOLUTION ————————————————————————————————————
+def _ld_objects(data: Any) -> Iterable[dict]:
+    """Every JSON object in a JSON-LD block, flattening lists and @graph."""
+    if isinstance(data, list):
+        for item in data:
+            yield from _ld_objects(item)
+    elif isinstance(data, dict):
+        yield data
+        if "@graph" in data:
+            yield from _ld_objects(data["@graph"])
+
+
+def _ld_text(value: Any) -> str | None:
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, dict):
+        value = value.get("@id") or value.get("url") or value.get("name")
+    return value.strip() if isinstance(value, str) and value.strip() else None
+
+
+class _Fields:
+    """Accumulates candidate values; JSON-LD beats meta tags, which beat the fallbacks."""
+
+    def __init__(self):
+        self.ld: dict[str, str] = {}
+        self.meta: dict[str, str] = {}
+        self.title: str | None = None
+        self.time_datetime: str | None = None
+        self.canonical: str | None = None
+
+    def add_meta(self, key: str | None, content: str | None) -> None:
+        if key and content and content.strip():
+            self.meta.setdefault(key, content.strip())
+
+    def add_ld(self, text: str) -> None:
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return
+        for obj in _ld_objects(data):
+            types = obj.get("@type")
+            types = set(types) if isinstance(types, list) else {types}
+            if not types & ARTICLE_TYPES:
+                continue
+            for field, keys in LD_KEYS.items():
+                for key in keys:
+                    value = _ld_text(obj.get(key))
+                    if value:
+                        self.ld.setdefault(field, value)
+                        break
+
+    def resolve(self) -> PageMetadata:
+        found = PageMetadata()
+        for field, keys in META_KEYS.items():
+            value = self.ld.get(field) or next((self.meta[k] for k in keys if k in self.meta), None)
+            setattr(found, field, value)
+        found.headline = found.headline or self.title
+        found.published = found.published or self.time_datetime
+        found.canonical_url = found.canonical_url or self.canonical
+        return found
+
+
+# ——— STREAMING SCAN ——————————————————————————————————————
+class _Stop(Exception):
+    pass
+
+
+class _MetadataScanner(HTMLParser):
+    def __init__(self, need: tuple[str, ...], head_only: bool = False):
+        super().__init__(convert_charrefs=True)
+        self.need = need
+        self.head_only = head_only
+        self.fields = _Fields()
+        self._capture: str | None = None   # "ld" or "title" while inside one
+        self._text: list[str] = []
+        self.in_head = True
+
+    def _check(self) -> None:
+        if self.fields.resolve().has(self.need):
+            raise _Stop
+
+    def _leave_head(self) -> None:
+        self.in_head = False
+        if self.head_only:
+            raise _Stop
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "meta":
+            a = dict(attrs)
+            self.fields.add_meta(a.get("property") or a.get("name") or a.get("itemprop"), a.get("content"))
+            self._check()
+        elif tag == "script" and dict(attrs).get("type", "").lower() == "application/ld+json":
+            self._capture, self._text = "ld", []
+        elif tag == "title" and self.in_head and self.fields.title is None:
+            self._capture, self._text = "title", []
+        elif tag == "link":
+            a = dict(attrs)
+            if (a.get("rel") or "").lower() == "canonical" and a.get("href"):
+                self.fields.canonical = self.fields.canonical or a["href"]
+        elif tag == "time" and self.fields.time_datetime is None:
+            self.fields.time_datetime = dict(attrs).get("datetime") or None
+            self._check()
+        elif tag == "body":
+            self._leave_head()
+
+    def handle_endtag(self, tag):
+        if tag == "script" and self._capture == "ld":
+            self.fields.add_ld("".join(self._text))
+            self._capture = None
+            self._check()
+        elif tag == "title" and self._capture == "title":
+            self.fields.title = "".join(self._text).strip() or None
+            self._capture = None
+        elif tag == "head":
+            self._leave_head()
+
+    def handle_data(self, data):
+        if self._capture:
+            self._text.append(data)
+
+
+def scan_metadata(content: bytes, need: tuple[str, ...] = ("headline", "published"),
+                  head_only: bool = False) -> PageMetadata:
+    """Read structured metadata from raw page bytes without building a DOM.
+
+    Stops at the first point where every field in `need` is known; with
+    `head_only` it also gives up at the end of `<head>`, otherwise it keeps
+    scanning the body for JSON-LD blocks and `time[datetime]`.
+    """
+    scanner = _MetadataScanner(need, head_only)
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    try:
+        for i in range(0, len(content), CHUNK_SIZE):
+            scanner.feed(decoder.decode(content[i:i + CHUNK_SIZE]))
+        scanner.close()
+    except _Stop:
+        pass
+    return scanner.fields.resolve()
+
+
+# ——— FROM A PARSED PAGE ——————————————————————————————————
+def soup_metadata(soup: BeautifulSoup) -> PageMetadata:
+    fields = _Fields()
+    for tag in soup.find_all("script", type="application/ld+json"):
+        fields.add_ld(tag.string or tag.get_text())
+    for tag in soup.find_all("meta", content=True):
+        fields.add_meta(tag.get("property") or tag.get("name") or tag.get("itemprop"), tag["content"])
+    if soup.title and soup.title.string:
+        fields.title = soup.title.string.strip() or None
+    time_tag = soup.find("time", datetime=True)
+    fields.time_datetime = time_tag["datetime"] if time_tag else None
+    canonical = soup.find("link", rel="canonical", href=True)
+    fields.canonical = canonical["href"] if canonical else None
+    return fields.resolve()
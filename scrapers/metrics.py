@@ -0,0 +1,277 @@
+"""Per-stage crawl timings and per-domain traffic counters.
+
+Every article goes through the same stages, and each one is timed into a
+fixed-bucket histogram per source:
+
+* connect  – DNS lookup, TCP connect and TLS handshake (only when the pool had
+             to open a new connection; reused keep-alive connections skip it)
+* ttfb     – request sent until the response headers arrived, minus connect
+* download – reading the response body
+* parse    – bytes -> soup, in the extraction worker
+* extract  – soup -> normalized record, in the extraction worker
+* write    – dedup lookup and the sink write, in the writer thread
+
+Requests, bytes, status codes, retries, redirects and downloads cut short by
+a body-only fetch (truncated) are counted per domain and section.
+`CrawlMetrics.serve` exposes all of it in the Prometheus text format;
+`summary` gives the same numbers as a JSON-friendly dict for the end
+of a run. Recording is a lock and a bisect per observation, so it stays on.
+"""
+from __future__ import annotations
+import bisect
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+STAGES = ("discover", "connect", "ttfb", "download", "parse", "extract", "write")
+# seconds; upper bounds of the histogram buckets (+Inf is implicit)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+# ——— CONNECTION TIMING ———————————————————————————————————
+# connect() runs on the thread that sends the request, so a thread-local
+# accumulator attributes new-connection time to the right response
+_connect = threading.local()
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _connect.seconds = getattr(_connect, "seconds", 0.0) + time.perf_counter() - started
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _connect.seconds = getattr(_connect, "seconds", 0.0) + time.perf_counter() - started
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that stamps each response with its connect and header timings.
+
+    Sets `response.connect_seconds`, `response.ttfb_seconds` (excluding
+    connect) and `response.headers_at` (a perf_counter stamp); the body is
+    read after `send` returns, so download time is measured from `headers_at`.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+    def send(self, request, *args, **kwargs):
+        _connect.seconds = 0.0
+        started = time.perf_counter()
+        response = super().send(request, *args, **kwargs)
+        response.headers_at = time.perf_counter()
+        response.connect_seconds = _connect.seconds
+        response.ttfb_seconds = response.headers_at - started - _connect.seconds
+        return response
+
+
+# ——— HISTOGRAM ———————————————————————————————————————————
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound of the bucket holding the q-th observation."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for bound, n in zip(BUCKETS + (float("inf"),), self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+# ——— REGISTRY ————————————————————————————————————————————
+class CrawlMetrics:
+    """Thread-safe collector shared by the fetch threads and the pipeline's writer."""
+
+    def __init__(self):
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self.stages: dict[tuple[str, str], Histogram] = {}
+        # (domain, section) -> Counter of requests / bytes / retries / redirects / truncated / status_<code>
+        self.traffic: dict[tuple[str, str], Counter] = {}
+        self._server: ThreadingHTTPServer | None = None
+
+    def observe(self, stage: str, source: str, seconds: float) -> None:
+        with self._lock:
+            hist = self.stages.get((stage, source))
+            if hist is None:
+                hist = self.stages[(stage, source)] = Histogram()
+            hist.observe(seconds)
+
+    def _count(self, url: str, section: str | None, **increments: int) -> None:
+        key = (urlparse(url).netloc, section or "")
+        with self._lock:
+            counts = self.traffic.get(key)
+            if counts is None:
+                counts = self.traffic[key] = Counter()
+            counts.update(increments)
+
+    def record_response(self, source: str, section: str | None, res: requests.Response) -> None:
+        """Count a fetched response and time its connect / ttfb / download stages."""
+        finished = time.perf_counter()
+        if getattr(res, "connect_seconds", 0.0):
+            self.observe("connect", source, res.connect_seconds)
+        if hasattr(res, "ttfb_seconds"):
+            self.observe("ttfb", source, res.ttfb_seconds)
+            self.observe("download", source, finished - res.headers_at)
+        retries = res.raw.retries if res.raw is not None else None
+        self._count(res.url, section, **{
+            "requests": 1,
+            "bytes": len(res.content),
+            "retries": len(retries.history) if retries is not None else 0,
+            "redirects": len(res.history),
+            "truncated": int(getattr(res, "truncated", False)),
+            f"status_{res.status_code}": 1,
+        })
+
+    def record_error(self, source: str, section: str | None, url: str, ex: Exception) -> None:
+        res = getattr(ex, "response", None)
+        if res is not None:
+            self.record_response(source, section, res)
+        else:
+            self._count(url, section, requests=1, **{f"error_{type(ex).__name__}": 1})
+
+    # —— export ——
+    def prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP crawl_stage_seconds Time spent per crawl stage.",
+            "# TYPE crawl_stage_seconds histogram",
+        ]
+        with self._lock:
+            stages = [(key, list(h.counts), h.sum, h.count) for key, h in sorted(self.stages.items())]
+            traffic = [(key, Counter(c)) for key, c in sorted(self.traffic.items())]
+        for (stage, source), counts, total, count in stages:
+            labels = f'stage="{stage}",source="{source}"'
+            cumulative = 0
+            for bound, n in zip(BUCKETS, counts):
+                cumulative += n
+                lines.append(f'crawl_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'crawl_stage_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"crawl_stage_seconds_sum{{{labels}}} {total:.6f}")
+            lines.append(f"crawl_stage_seconds_count{{{labels}}} {count}")
+
+        families = {
+            "requests": "crawl_requests_total",
+            "bytes": "crawl_response_bytes_total",
+            "retries": "crawl_retries_total",
+            "redirects": "crawl_redirects_total",
+            "truncated": "crawl_truncated_total",
+        }
+        for key, metric in families.items():
+            lines.append(f"# TYPE {metric} counter")
+            for (domain, section), counts in traffic:
+                lines.append(f'{metric}{{domain="{domain}",section="{section}"}} {counts[key]}')
+        # status codes and error classes become labels of their own families
+        for prefix, metric, label in (("status_", "crawl_responses_total", "code"),
+                                      ("error_", "crawl_errors_total", "error")):
+            lines.append(f"# TYPE {metric} counter")
+            for (domain, section), counts in traffic:
+                for name, n in sorted(counts.items()):
+                    if name.startswith(prefix):
+                        lines.append(f'{metric}{{domain="{domain}",section="{section}",'
+                                     f'{label}="{name[len(prefix):]}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict:
+        """Per-stage and per-domain totals for the run so far."""
+        elapsed = time.time() - self.started
+        with self._lock:
+            stages: dict[str, dict] = {}
+            for (stage, source), hist in sorted(self.stages.items(),
+                                                key=lambda kv: (STAGES.index(kv[0][0]), kv[0][1])):
+                stages.setdefault(stage, {})[source] = {
+                    "count": hist.count,
+                    "seconds": round(hist.sum, 3),
+                    "mean": round(hist.sum / hist.count, 4) if hist.count else None,
+                    "p50_le": hist.quantile(0.5),
+                    "p95_le": hist.quantile(0.95),
+                }
+            domains: dict[str, dict] = {}
+            for (domain, section), counts in sorted(self.traffic.items()):
+                domains.setdefault(domain, {})[section or "-"] = dict(counts)
+        # a domain that only ever errored has no bytes
+        total_bytes = sum(c.get("bytes", 0) for d in domains.values() for c in d.values())
+        total_requests = sum(c.get("requests", 0) for d in domains.values() for c in d.values())
+        return {
+            "elapsed_seconds": round(elapsed, 1),
+            "requests": total_requests,
+            "bytes": total_bytes,
+            "requests_per_second": round(total_requests / elapsed, 2) if elapsed else None,
+            "megabytes_per_second": round(total_bytes / elapsed / 1e6, 3) if elapsed else None,
+            "stages": stages,
+            "domains": domains,
+        }
+
+    def write_summary(self, path: str, **extra) -> None:
+        with open(path, "w", encoding="utf-8") as fp:
+            json.dump({**extra, **self.summary()}, fp, indent=2, default=str)
+
+    # —— endpoint ——
+    def serve(self, port: int, host: str = "0.0.0.0") -> None:
+        """Serve GET /metrics from a background thread until `close`."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True).start()
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""Run every news source at once over a shared fetch pool and a single sink.
+
+    python scrapers/orchestrator.py --sources abc cbs buzzfeed thetab --output articles.csv
+
+Each source discovers its links in its own thread, then feeds article jobs into
+one shared worker pool. A per-source semaphore caps how many of those jobs a
+source may have in flight, so a slow or throttled source never starves the
+others and total crawl time tracks the slowest source rather than the sum.
+
+Fetch threads only download: raw page bytes go through a bounded queue to a
+process pool that runs the extractors (see pipeline.py), so parsing uses every
+core while the network stays busy.
+
+--metrics-port serves per-stage timings (connect, time to first byte,
+download, parse, extract, write) and per-domain traffic counters in the
+Prometheus text format while the crawl runs; --metrics-json writes the same
+numbers, plus the per-source summaries, when it ends (see metrics.py).
+
+Every request passes a per-host circuit breaker, so a source that is down
+fails fast instead of costing a timeout per URL. With --retry-queue, failed
+fetches are kept in a durable queue and retried with backoff on later runs,
+and permanent failures are dead-lettered with their reason (see retry.py).
+With --terms, every stored body's term counts feed the dashboard's trending
+terms (see terms.py). With --body-only, downloads stop once the article body
+has closed, for the sources that name their article container (see
+streaming.py); the whole-page link counts are then left empty.
+Publication dates are normalized to UTC as they are written; with
+--date-quarantine the ones that don't parse are kept for review (see dates.py).
+
+With --frontier the crawl is split across nodes instead: every node started
+against the same frontier database claims section and article work from it
+(see frontier.py), so adding nodes adds throughput without duplicate fetches.
+
+    python scrapers/orchestrator.py --frontier                          # Postgres from .env
+    python scrapers/orchestrator.py --frontier sqlite:///frontier.db --role fetch
+"""
+from __future__ import annotations
+import argparse
+import logging
+import os
+import socket
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
+from typing import Callable
+
+import requests
+
+import profiling
+from adapters import ADAPTERS, SourceAdapter, load_adapters
+from archive import HtmlArchive
+from bodies import BodyCodec
+from dates import DateQuarantine
+from db import get_engine
+from dedup import NearDuplicateIndex, add_cluster_column
+from fetcher import Fetcher
+from frontier import Frontier, Lease
+from metrics import CrawlMetrics
+from pipeline import ExtractionPipeline
+from retry import CircuitOpen, RetryQueue, describe, is_retryable
+from sinks import DbSink, Sink, sink_for
+from terms import TermIndex
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s"
+)
+
+
+# ——— ARTICLE JOB ——————————————————————————————————————————
+def archive_page(archive: HtmlArchive, adapter: SourceAdapter, section: str | None, url: str,
+                 res: requests.Response) -> None:
+    # a page that was fetched is still extracted when it can't be archived
+    try:
+        archive.append(url, adapter.name, section, res.status_code, res.headers, res.content)
+    except Exception as ex:
+        logging.error("[%s] could not archive %s: %s", adapter.name, url, ex)
+
+
+def fetch_article(adapter: SourceAdapter, session: requests.Session, section: str, url: str,
+                  pipeline: ExtractionPipeline, archive: HtmlArchive | None = None,
+                  metrics: CrawlMetrics | None = None, retries: RetryQueue | None = None,
+                  body_only: bool = False,
+                  on_failure: Callable[[str, str], None] | None = None) -> bool:
+    """Fetch one article and hand it to the pipeline; False if the fetch failed.
+
+    `on_failure(url, outcome)` hears about a failed fetch: "dead" when
+    fetching again won't help, "retry" or "deferred" when it may.
+    """
+    sent = True
+    try:
+        with profiling.stage("fetch", url):
+            res = adapter.fetch_response(session, url, body_only=body_only)
+        if metrics is not None:
+            metrics.record_response(adapter.name, section, res)
+    except CircuitOpen as ex:
+        # refused without reaching the site: no delay owed, and no attempt used up
+        sent = False
+        logging.debug("[%s] skipped %s: %s", adapter.name, url, ex)
+        if retries is not None:
+            retries.fail(adapter.name, section, url, ex)
+        if on_failure is not None:
+            on_failure(url, "deferred")
+        return False
+    except Exception as ex:
+        if metrics is not None:
+            metrics.record_error(adapter.name, section, url, ex)
+        logging.warning("[%s] fetch failed %s: %s", adapter.name, url, ex)
+        if retries is not None:
+            outcome = retries.fail(adapter.name, section, url, ex)
+        else:
+            outcome = "retry" if is_retryable(ex) else "dead"
+        if on_failure is not None:
+            on_failure(url, outcome)
+        return False
+    else:
+        if retries is not None:
+            retries.succeeded(url)
+        if archive is not None:
+            archive_page(archive, adapter, section, url, res)
+        # blocks while the extraction queue is full (backpressure)
+        pipeline.submit(adapter.name, section, url, res.content)
+        return True
+    finally:
+        if sent and adapter.request_delay:
+            time.sleep(adapter.request_delay)
+
+
+# ——— SOURCE DRIVER ————————————————————————————————————————
+def crawl_source(adapter: SourceAdapter, fetcher: Fetcher, pool: ThreadPoolExecutor,
+                 pipeline: ExtractionPipeline, seen: set[str], limit: int | None = None,
+                 archive: HtmlArchive | None = None, metrics: CrawlMetrics | None = None,
+                 retries: RetryQueue | None = None, body_only: bool = False) -> dict:
+    started = time.monotonic()
+    session = fetcher.session_for(adapter)
+    try:
+        with profiling.stage("discover", adapter.name):
+            links = adapter.discover(session)
+    except Exception as ex:
+        logging.error("[%s] discovery failed: %s", adapter.name, ex)
+        links = set()
+    if metrics is not None:
+        metrics.observe("discover", adapter.name, time.monotonic() - started)
+    todo = sorted((s, u) for s, u in links if u not in seen)
+    retried = 0
+    if retries is not None:
+        # rediscovered failures wait out their backoff; those whose backoff has run out go first
+        waiting = retries.waiting(adapter.name)
+        todo = [(s, u) for s, u in todo if u not in waiting]
+        new = {u for _, u in todo}
+        due = [(s, u) for s, u in retries.due(adapter.name) if u not in seen and u not in new]
+        retried = len(due)
+        todo = due + todo
+    if limit:
+        todo = todo[:limit]
+    logging.info("[%s] %d links discovered, %d to fetch (%d retries)",
+                 adapter.name, len(links), len(todo), retried)
+
+    # jobs only enter the shared pool once a slot is free, so pool workers
+    # never sit blocked on another source's limit
+    slots = threading.BoundedSemaphore(adapter.max_concurrency)
+    futures = []
+    for section, url in todo:
+        slots.acquire()
+        fut = pool.submit(fetch_article, adapter, session, section, url, pipeline, archive,
+                          metrics, retries, body_only)
+        fut.add_done_callback(lambda _: slots.release())
+        futures.append(fut)
+    wait(futures)
+
+    fetched = sum(1 for f in futures if f.result())
+    summary = {
+        "source": adapter.name,
+        "discovered": len(links),
+        "retried": retried,
+        "fetched": fetched,
+        "fetch_failed": len(futures) - fetched,
+        "seconds": round(time.monotonic() - started, 1),
+    }
+    logging.info("[%s] done – %d fetched, %d failed in %.1fs",
+                 adapter.name, fetched, summary["fetch_failed"], summary["seconds"])
+    return summary
+
+
+def run(adapters: list[SourceAdapter], sink: Sink, workers: int | None = None,
+        limit_per_source: int | None = None, processes: int | None = None,
+        dedup: NearDuplicateIndex | None = None, skip_duplicates: bool = False,
+        archive: HtmlArchive | None = None, metrics: CrawlMetrics | None = None,
+        retries: RetryQueue | None = None, terms: TermIndex | None = None,
+        body_only: bool = False) -> list[dict]:
+    workers = workers or sum(a.max_concurrency for a in adapters)
+    fetcher = Fetcher(pool_size=workers)
+    seen = sink.existing_urls()
+    if dedup is not None and skip_duplicates:
+        # confirmed duplicates never reach the sink, so remember them here instead
+        seen |= dedup.known_urls(duplicates_only=True)
+
+    with sink, ExtractionPipeline(sink, processes=processes, dedup=dedup,
+                                  skip_duplicates=skip_duplicates, metrics=metrics,
+                                  retries=retries, terms=terms, body_only=body_only) as pipeline:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch") as pool, \
+                ThreadPoolExecutor(max_workers=len(adapters), thread_name_prefix="source") as drivers:
+            futures = [
+                drivers.submit(crawl_source, a, fetcher, pool, pipeline, seen, limit_per_source,
+                               archive, metrics, retries, body_only)
+                for a in adapters
+            ]
+            summaries = [f.result() for f in futures]
+    fetcher.close()
+
+    for summary in summaries:
+        counts = pipeline.stats.get(summary["source"], Counter())
+        summary["scraped"] = counts["scraped"]
+        summary["extract_failed"] = counts["extract_failed"] + counts["write_failed"]
+        summary["duplicates"] = counts["duplicates"]
+    return summaries
+
+
+# ——— FRONTIER MODE ————————————————————————————————————————
+# how long a finished section page rests before any node re-runs its discovery
+DISCOVERY_REFRESH = 15 * 60
+
+ROLE_KINDS = {
+    "all":      ("section", "article"),
+    "discover": ("section",),
+    "fetch":    ("article",),
+}
+
+
+def process_lease(adapter: SourceAdapter, session: requests.Session, lease: Lease,
+                  frontier: Frontier, pipeline: ExtractionPipeline,
+                  archive: HtmlArchive | None = None, metrics: CrawlMetrics | None = None,
+                  body_only: bool = False) -> bool:
+    started = time.monotonic()
+    sent = True
+    try:
+        if lease.kind == "section":
+            with profiling.stage("discover", lease.url):
+                links = adapter.discover_feed_first(session, lease.section, lease.url)
+            if metrics is not None:
+                metrics.observe("discover", adapter.name, time.monotonic() - started)
+            added = frontier.add("article", adapter.name, links)
+            logging.info("[%s] %s: %d links, %d new", adapter.name, lease.section, len(links), added)
+        else:
+            with profiling.stage("fetch", lease.url):
+                res = adapter.fetch_response(session, lease.url, body_only=body_only)
+            if metrics is not None:
+                metrics.record_response(adapter.name, lease.section, res)
+            if archive is not None:
+                archive_page(archive, adapter, lease.section, lease.url, res)
+            pipeline.submit(adapter.name, lease.section, lease.url, res.content)
+    except CircuitOpen as ex:
+        # the host is being given a rest; hand the item back for when it may have recovered
+        sent = False
+        frontier.defer(lease, ex.retry_at, describe(ex))
+        return False
+    except Exception as ex:
+        if metrics is not None and lease.kind == "article":
+            metrics.record_error(adapter.name, lease.section, lease.url, ex)
+        logging.warning("[%s] %s failed %s (attempt %d): %s",
+                        adapter.name, lease.kind, lease.url, lease.attempts, ex)
+        frontier.fail(lease, describe(ex), retryable=is_retryable(ex))
+        return False
+    else:
+        frontier.complete(lease)
+        return True
+    finally:
+        if sent and adapter.request_delay:
+            time.sleep(adapter.request_delay)
+
+
+def run_node(adapters: list[SourceAdapter], frontier: Frontier, sink: Sink, node_id: str,
+             role: str = "all", workers: int | None = None, processes: int | None = None,
+             poll_interval: float = 2.0, idle_exit: float = 30.0,
+             dedup: NearDuplicateIndex | None = None, skip_duplicates: bool = False,
+             archive: HtmlArchive | None = None, metrics: CrawlMetrics | None = None,
+             retries: RetryQueue | None = None, terms: TermIndex | None = None,
+             body_only: bool = False) -> list[dict]:
+    """Claim and work frontier items until the frontier has been idle for `idle_exit` seconds.
+
+    The frontier does its own retrying; `retries` only receives the dead
+    letters for pages that couldn't be extracted.
+    """
+    kinds = ROLE_KINDS[role]
+    workers = workers or sum(a.max_concurrency for a in adapters)
+    fetcher = Fetcher(pool_size=workers)
+    sessions = {a.name: fetcher.session_for(a) for a in adapters}
+
+    if "section" in kinds:
+        for a in adapters:
+            frontier.add("section", a.name, a.sections.items(), refresh_after=DISCOVERY_REFRESH)
+
+    inflight: Counter = Counter()
+    outcomes: dict[str, Counter] = {a.name: Counter() for a in adapters}
+    lock = threading.Lock()
+
+    def done(source: str, kind: str, fut) -> None:
+        with lock:
+            inflight[source] -= 1
+            outcomes[source][f"{kind}_{'ok' if fut.result() else 'failed'}"] += 1
+
+    idle_since = time.monotonic()
+    with sink, ExtractionPipeline(sink, processes=processes, dedup=dedup,
+                                  skip_duplicates=skip_duplicates, metrics=metrics,
+                                  retries=retries, terms=terms, body_only=body_only) as pipeline, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch") as pool:
+        while True:
+            claimed = 0
+            # per-source claims keep each source within its own concurrency limit
+            for a in adapters:
+                with lock:
+                    free = a.max_concurrency - inflight[a.name]
+                if free <= 0:
+                    continue
+                for lease in frontier.claim(node_id, free, source=a.name, kinds=kinds):
+                    with lock:
+                        inflight[a.name] += 1
+                    fut = pool.submit(process_lease, a, sessions[a.name], lease, frontier,
+                                      pipeline, archive, metrics, body_only)
+                    fut.add_done_callback(partial(done, a.name, lease.kind))
+                    claimed += 1
+
+            with lock:
+                busy = any(inflight.values())
+            if claimed or busy:
+                idle_since = time.monotonic()
+            elif time.monotonic() - idle_since > idle_exit:
+                break
+            if not claimed:
+                time.sleep(poll_interval)
+    fetcher.close()
+
+    summaries = []
+    for a in adapters:
+        counts = outcomes[a.name] + pipeline.stats.get(a.name, Counter())
+        summaries.append({"source": a.name, **counts, "scraped": counts["scraped"]})
+    logging.info("[%s] frontier now: %s", node_id, frontier.counts())
+    return summaries
+
+
+# ——— MAIN ———————————————————————————————————————————————
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sources", nargs="+", choices=sorted(ADAPTERS), default=list(ADAPTERS))
+    parser.add_argument("--output", default="articles.csv", help="CSV file, Parquet directory or database URL to write records to")
+    parser.add_argument("--workers", type=int, help="size of the shared fetch pool")
+    parser.add_argument("--limit-per-source", type=int, help="cap new articles per source")
+    parser.add_argument("--processes", type=int, help="extraction processes (default: one per core)")
+    parser.add_argument("--frontier", nargs="?", const="", metavar="DB_URL",
+                        help="work from a shared frontier (default database: the one in .env)")
+    parser.add_argument("--role", choices=sorted(ROLE_KINDS), default="all",
+                        help="frontier work this node takes on")
+    parser.add_argument("--node-id", default=f"{socket.gethostname()}-{os.getpid()}")
+    parser.add_argument("--idle-exit", type=float, default=30.0,
+                        help="stop after the frontier has had no work for this many seconds")
+    parser.add_argument("--dedup", nargs="?", const="", metavar="DB_URL",
+                        help="tag near-duplicate bodies with a cluster id (default database: the one in .env)")
+    parser.add_argument("--skip-duplicates", action="store_true",
+                        help="with --dedup, don't store or refetch confirmed duplicates")
+    parser.add_argument("--compress-bodies", nargs="?", const="", metavar="DB_URL",
+                        help="store bodies compressed with the per-source dictionaries (default database: the one in .env)")
+    parser.add_argument("--date-quarantine", nargs="?", const="", metavar="DB_URL",
+                        help="keep unparseable publication dates for dates.py report (default database: the one in .env)")
+    parser.add_argument("--retry-queue", nargs="?", const="", metavar="DB_URL",
+                        help="queue failed fetches for later runs and dead-letter permanent failures "
+                             "(default database: the one in .env)")
+    parser.add_argument("--terms", nargs="?", const="", metavar="DB_URL",
+                        help="count terms for the dashboard's trending terms (default database: the one in .env)")
+    parser.add_argument("--body-only", action="store_true",
+                        help="stop each download once the article body has closed, for sources that name "
+                             "their article container; whole-page link counts are left empty")
+    parser.add_argument("--archive", metavar="DIR",
+                        help="save every fetched article page to a compressed archive for reextract")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="serve Prometheus metrics at http://<host>:PORT/metrics during the crawl")
+    parser.add_argument("--metrics-json", metavar="PATH",
+                        help="write a JSON summary of stage timings and traffic when the crawl ends")
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    profiling.start_from_args(args, "orchestrator")
+
+    started = time.monotonic()
+    adapters = load_adapters(args.sources)
+    dedup = NearDuplicateIndex(get_engine(args.dedup or None)) if args.dedup is not None else None
+    archive = HtmlArchive(args.archive) if args.archive else None
+    codec = BodyCodec(get_engine(args.compress_bodies or None)) if args.compress_bodies is not None else None
+    quarantine = DateQuarantine(get_engine(args.date_quarantine or None)) if args.date_quarantine is not None else None
+    retries = RetryQueue(get_engine(args.retry_queue or None)) if args.retry_queue is not None else None
+    terms = TermIndex(get_engine(args.terms or None)) if args.terms is not None else None
+    metrics = CrawlMetrics() if args.metrics_port or args.metrics_json else None
+    sink = sink_for(args.output, codec=codec, quarantine=quarantine)
+    if dedup is not None and isinstance(sink, DbSink):
+        # the articles table may live in another database than the index
+        add_cluster_column(sink.engine, sink.table)
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+    if args.frontier is not None:
+        frontier = Frontier(get_engine(args.frontier or None))
+        summaries = run_node(adapters, frontier, sink, args.node_id, role=args.role,
+                             workers=args.workers, processes=args.processes,
+                             idle_exit=args.idle_exit, dedup=dedup,
+                             skip_duplicates=args.skip_duplicates, archive=archive, metrics=metrics,
+                             retries=retries, terms=terms, body_only=args.body_only)
+    else:
+        summaries = run(adapters, sink, workers=args.workers,
+                        limit_per_source=args.limit_per_source, processes=args.processes,
+                        dedup=dedup, skip_duplicates=args.skip_duplicates, archive=archive,
+                        metrics=metrics, retries=retries, terms=terms, body_only=args.body_only)
+    if archive is not None:
+        archive.close()
+    if metrics is not None:
+        if args.metrics_json:
+            metrics.write_summary(args.metrics_json, sources=summaries)
+        metrics.close()
+    logging.info("Done – %d articles from %d sources in %.1fs",
+                 sum(s["scraped"] for s in summaries), len(summaries), time.monotonic() - started)
+
+
+if __name__ == "__main__":
+    main()
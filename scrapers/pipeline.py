@@ -0,0 +1,277 @@
+from __future__ import annotations
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache, partial
+from typing import Callable
+
+import numpy as np
+
+import profiling
+from adapters import SourceAdapter, load_adapter
+from dates import normalize_column, quarantine_rejects
+from dedup import NearDuplicateIndex, minhash_signature
+from metrics import CrawlMetrics
+from records import PAGE_COLUMNS, ArticleRecord
+from retry import RetryQueue
+from sinks import Sink
+from terms import TermIndex, tokenize
+
+_DONE = object()
+
+
+# ——— WORKER SIDE ——————————————————————————————————————————
+@lru_cache(maxsize=None)
+def _worker_adapter(source: str) -> SourceAdapter:
+    # one adapter instance per source per worker process
+    return load_adapter(source)
+
+
+def _normalize_date(record: ArticleRecord) -> str | None:
+    """Store the record's publication date as UTC (see dates.py); returns the raw value if it didn't parse."""
+    raw = record.publication_date
+    if raw is None:
+        return None
+    (record.publication_date,), bad = normalize_column([record.source_name], [raw])
+    return raw if bad else None
+
+
+def extract_record(source: str, section: str, url: str, content: bytes,
+                   with_signature: bool = False, metadata_only: bool = False,
+                   with_terms: bool = False, body_only: bool = False) -> tuple:
+    """Parse raw page bytes in a worker process.
+
+    Returns (source, url, values, error, signature, timings, terms, bad_date) where
+    values is the ArticleRecord's `values()`, a plain tuple in ARTICLE_COLUMNS
+    order – much cheaper to pickle back to the parent than the soup or a dict.
+    The body's MinHash signature is computed here too when asked for, so the
+    parent only has to do the index lookup. timings is (parse_seconds, extract_seconds).
+    With `with_terms`, terms is the body's term counts (see terms.py).
+
+    The publication date is normalized here, so the sink and the term index
+    see the same UTC value; bad_date is the raw value when it didn't parse
+    (stored empty, for the parent to quarantine).
+
+    With `metadata_only` only the headline/date columns are filled, from the
+    structured-metadata fast path (see metadata.py); that counts as parse time.
+    With `body_only` the page may end after its article, so the PAGE_COLUMNS
+    are left empty.
+    """
+    parse_s = extract_s = 0.0
+    try:
+        adapter = _worker_adapter(source)
+        started = time.perf_counter()
+        if metadata_only:
+            with profiling.stage("metadata", url):
+                record = adapter.extract_metadata(section, url, content)
+            parse_s = time.perf_counter() - started
+            if record is None:
+                return source, url, None, "nothing extracted", None, (parse_s, 0.0), None, None
+            bad_date = _normalize_date(record)
+            return source, url, record.values(), None, None, (parse_s, 0.0), None, bad_date
+        with profiling.stage("parse", url):
+            soup = adapter.parse(content)
+        parsed = time.perf_counter()
+        parse_s = parsed - started
+        with profiling.stage("extract", url):
+            record = adapter.extract_soup(section, url, soup)
+        if record is None:
+            extract_s = time.perf_counter() - parsed
+            return source, url, None, "nothing extracted", None, (parse_s, extract_s), None, None
+        if body_only:
+            for column in PAGE_COLUMNS:
+                setattr(record, column, None)
+        bad_date = _normalize_date(record)
+        signature = None
+        if with_signature:
+            sig = minhash_signature(record.article_full_text or "")
+            signature = None if sig is None else sig.tobytes()
+        terms = tokenize(record.article_full_text) if with_terms and record.article_full_text else None
+        extract_s = time.perf_counter() - parsed
+        return source, url, record.values(), None, signature, (parse_s, extract_s), terms, bad_date
+    except Exception as ex:
+        return source, url, None, f"{type(ex).__name__}: {ex}", None, (parse_s, extract_s), None, None
+
+
+# ——— PARENT SIDE ——————————————————————————————————————————
+class ExtractionPipeline:
+    """fetch threads -> bounded queue -> process pool -> writer thread -> sink.
+
+    `submit` blocks once `queue_size` fetched pages are waiting, so the I/O
+    workers slow down to the pace the extractors can sustain instead of piling
+    up page bodies in memory. At most `2 * processes` pages are inside the
+    process pool at any time.
+
+    If a worker dies (the OOM killer, a segfault in a parser) the process pool
+    breaks: the pages inside it are counted as extraction failures and a new
+    pool takes the rest.
+
+    With a `dedup` index every record is tagged with its near-duplicate
+    cluster, and with `skip_duplicates` confirmed duplicates never reach the sink.
+    With `metrics`, the parse / extract / write stage timings are recorded.
+    With `metadata_only`, records carry just the headline and date columns.
+    With `body_only`, pages were fetched with `body_only` (see adapters.py) and
+    records leave the whole-page link counts empty.
+    With `retries`, pages that fail extraction or writing are dead-lettered.
+    With `terms`, every stored body's term counts go into the trending-terms tables.
+    With `on_done`, the writer calls `on_done(url, final)` once it is through
+    with a page; final is False only when the write failed, so fetching the
+    page again may still store it.
+    """
+
+    def __init__(self, sink: Sink, processes: int | None = None, queue_size: int = 64,
+                 dedup: NearDuplicateIndex | None = None, skip_duplicates: bool = False,
+                 metrics: CrawlMetrics | None = None, metadata_only: bool = False,
+                 retries: RetryQueue | None = None, terms: TermIndex | None = None,
+                 body_only: bool = False, on_done: Callable[[str, bool], None] | None = None):
+        self.sink = sink
+        self.retries = retries
+        self.terms = terms
+        self.metrics = metrics
+        self.metadata_only = metadata_only
+        self.body_only = body_only
+        self.on_done = on_done
+        self.dedup = dedup
+        self.skip_duplicates = skip_duplicates
+        self.processes = processes or os.cpu_count() or 1
+        self.stats: dict[str, Counter] = {}
+        self._raw: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._results: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._inflight = threading.BoundedSemaphore(self.processes * 2)
+        self._pool: ProcessPoolExecutor | None = None
+        self._threads: list[threading.Thread] = []
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # spawn rather than fork: the parent is full of fetch threads holding locks
+        profiler = profiling.active()
+        return ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            # a profiled run profiles the extraction workers into the same run directory
+            initializer=profiling.start_worker if profiler else None,
+            initargs=(str(profiler.run_dir), profiler.mode) if profiler else (),
+        )
+
+    def start(self) -> "ExtractionPipeline":
+        self._pool = self._new_pool()
+        self._threads = [
+            threading.Thread(target=self._dispatch, name="extract-dispatch", daemon=True),
+            threading.Thread(target=self._write, name="sink-writer", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+        return self
+
+    def submit(self, source: str, section: str, url: str, content: bytes) -> None:
+        self._raw.put((source, section, url, content, self.dedup is not None, self.metadata_only,
+                       self.terms is not None, self.body_only))
+
+    def close(self) -> None:
+        dispatcher, writer = self._threads
+        self._raw.put(_DONE)
+        dispatcher.join()
+        self._pool.shutdown(wait=True)
+        self._results.put(_DONE)
+        writer.join()
+        if self.terms is not None:
+            self.terms.flush()
+
+    def __enter__(self) -> "ExtractionPipeline":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # —— stage threads ——
+    def _dispatch(self) -> None:
+        while (item := self._raw.get()) is not _DONE:
+            self._inflight.acquire()
+            try:
+                fut = self._submit(item)
+            except Exception as ex:
+                self._inflight.release()
+                self._results.put((item[0], item[2], None, f"{type(ex).__name__}: {ex}", None, None, None, None))
+                continue
+            fut.add_done_callback(partial(self._collect, item[0], item[2]))
+
+    def _submit(self, item: tuple) -> Future:
+        try:
+            return self._pool.submit(extract_record, *item)
+        except BrokenProcessPool:
+            # a worker died and took the pool with it: the pages it held fail in _collect,
+            # this one and the rest go to a new pool
+            logging.error("An extraction worker died; starting a new process pool")
+            self._pool.shutdown(wait=False)
+            self._pool = self._new_pool()
+            return self._pool.submit(extract_record, *item)
+
+    def _collect(self, source: str, url: str, fut: Future) -> None:
+        self._inflight.release()
+        try:
+            result = fut.result()
+        except Exception as ex:  # the pool broke: a worker died (e.g. killed by the OOM killer)
+            result = (source, url, None, f"{type(ex).__name__}: {ex}", None, None, None, None)
+        self._results.put(result)
+
+    def _write(self) -> None:
+        while (result := self._results.get()) is not _DONE:
+            source, url, values, error, signature, timings, terms, bad_date = result
+            counts = self.stats.setdefault(source, Counter())
+            if self.metrics is not None and timings is not None:
+                self.metrics.observe("parse", source, timings[0])
+                self.metrics.observe("extract", source, timings[1])
+            if values is None:
+                counts["extract_failed"] += 1
+                logging.warning("[%s] extraction failed %s: %s", source, url, error)
+                self._dead_letter(source, url, error, "extract")
+                self._done(url, True)
+                continue
+            record = ArticleRecord.from_values(values)
+            started = time.perf_counter()
+            try:
+                with profiling.stage("write", url):
+                    if bad_date is not None:
+                        quarantine_rejects(self.sink.quarantine, [(url, record.source_name, bad_date)])
+                    if self.dedup is not None:
+                        sig = None if signature is None else np.frombuffer(signature, dtype=np.uint64)
+                        cluster, is_duplicate = self.dedup.assign(url, source, sig)
+                        record.duplicate_cluster_id = cluster
+                        if is_duplicate:
+                            counts["duplicates"] += 1
+                            if self.skip_duplicates:
+                                self._done(url, True)
+                                continue
+                    self.sink.write(record)
+                counts["scraped"] += 1
+                if self.metrics is not None:
+                    self.metrics.observe("write", source, time.perf_counter() - started)
+            except Exception as ex:
+                counts["write_failed"] += 1
+                logging.error("[%s] write failed %s: %s", source, url, ex)
+                self._dead_letter(source, url, f"{type(ex).__name__}: {ex}", "write")
+                self._done(url, False)
+                continue
+            self._done(url, True)
+            if terms and self.terms is not None:
+                try:
+                    self.terms.add(record, terms)
+                except Exception as ex:  # the article is stored; only its term counts are lost
+                    logging.error("[%s] term counting failed %s: %s", source, url, ex)
+
+    def _done(self, url: str, final: bool) -> None:
+        if self.on_done is not None:
+            self.on_done(url, final)
+
+    def _dead_letter(self, source: str, url: str, reason: str, stage: str) -> None:
+        if self.retries is None:
+            return
+        try:
+            self.retries.dead_letter(source, None, url, reason, stage=stage)
+        except Exception as ex:
+            logging.error("[%s] could not dead-letter %s: %s", source, url, ex)
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""Crawl continuously, polling each section about as often as it publishes.
+
+    python scrapers/poller.py --sources abc cbs --output articles.csv
+    python scrapers/poller.py --db sqlite:///polls.db --min-interval 120 --max-interval 7200
+
+Every (source, section) has its own poll interval. Each discovery logs how many
+of the listed links were new to `section_polls`, and the section's publish rate
+is estimated from that history: new links per second observed, both decayed
+with a RATE_HALF_LIFE half-life so the estimate follows the news cycle, plus a
+weak prior so a section with no history starts out polled fairly often. The
+next poll comes after the time the section needs to publish
+TARGET_NEW_PER_POLL articles, clamped to [--min-interval, --max-interval], so
+busy sections are fresh and quiet ones cost a request every couple of hours.
+
+Polls are taken off a heap ordered by due time. Discovery runs on one thread
+per source; new articles go through the same fetch pool, per-source
+concurrency limits and extraction pipeline as orchestrator.py. On restart the
+estimates are rebuilt from `section_polls`, so the schedule carries over.
+A link counts as seen once its article is stored or its fetch has failed for
+good; until then it is pending, so a failed fetch is tried again the next time
+the link is listed (or, with --retry-queue, when its backoff runs out).
+With --retry-queue, failed fetches whose backoff has run out are retried
+alongside each poll of their source (see retry.py). With --terms, stored
+bodies feed the dashboard's trending terms as they arrive (see terms.py).
+"""
+from __future__ import annotations
+import argparse
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table, Text, insert, select
+from sqlalchemy.engine import Engine
+
+import profiling
+from adapters import ADAPTERS, SourceAdapter, load_adapters
+from bodies import BodyCodec
+from dates import DateQuarantine
+from db import create_tables, get_engine
+from fetcher import Fetcher
+from metrics import CrawlMetrics
+from orchestrator import fetch_article
+from pipeline import ExtractionPipeline
+from retry import RetryQueue
+from sinks import Sink, sink_for
+from terms import TermIndex
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s"
+)
+
+metadata = MetaData()
+
+section_polls = Table(
+    "section_polls", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("source", String(32), nullable=False),
+    Column("section", Text, nullable=False),
+    Column("polled_at", Float, nullable=False, index=True),
+    Column("listed", Integer, nullable=False),
+    Column("new", Integer, nullable=False),
+    Column("interval", Float, nullable=False),     # seconds until the poll after this one
+)
+
+# ——— RATE ESTIMATE ———————————————————————————————————————
+HOUR = 3600
+RATE_HALF_LIFE = 6 * HOUR
+# prior: one article per 15 minutes, weighted like 15 minutes of observation
+PRIOR_EVENTS = 1.0
+PRIOR_EXPOSURE = 15 * 60
+TARGET_NEW_PER_POLL = 1.0
+JITTER = 0.1
+
+
+class PublishRate:
+    """Exponentially decayed Poisson estimate of one section's publish rate."""
+    __slots__ = ("events", "exposure", "last_polled_at")
+
+    def __init__(self):
+        self.events = 0.0
+        self.exposure = 0.0
+        self.last_polled_at: float | None = None
+
+    def update(self, polled_at: float, new: int) -> None:
+        # a section's first poll lists its whole backlog, which says nothing about the rate
+        if self.last_polled_at is not None:
+            elapsed = max(0.0, polled_at - self.last_polled_at)
+            decay = 0.5 ** (elapsed / RATE_HALF_LIFE)
+            self.events = self.events * decay + new
+            self.exposure = self.exposure * decay + elapsed
+        self.last_polled_at = polled_at
+
+    def per_hour(self) -> float:
+        return HOUR * (self.events + PRIOR_EVENTS) / (self.exposure + PRIOR_EXPOSURE)
+
+
+def next_interval(per_hour: float, min_interval: float, max_interval: float) -> float:
+    """Seconds until the next poll: long enough to expect TARGET_NEW_PER_POLL new articles."""
+    interval = HOUR * TARGET_NEW_PER_POLL / per_hour if per_hour > 0 else max_interval
+    return min(max_interval, max(min_interval, interval))
+
+
+# ——— POLLER ——————————————————————————————————————————————
+class SectionPoller:
+    def __init__(self, engine: Engine, adapters: list[SourceAdapter], sink: Sink,
+                 min_interval: float = 120, max_interval: float = 2 * HOUR,
+                 workers: int | None = None, processes: int | None = None,
+                 metrics: CrawlMetrics | None = None, retries: RetryQueue | None = None,
+                 terms: TermIndex | None = None):
+        self.engine = engine
+        self.adapters = {a.name: a for a in adapters}
+        self.sink = sink
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.workers = workers or sum(a.max_concurrency for a in adapters)
+        self.processes = processes
+        self.metrics = metrics
+        self.retries = retries
+        self.terms = terms
+        self.fetcher = Fetcher(pool_size=self.workers)
+        self.sessions = {a.name: self.fetcher.session_for(a) for a in adapters}
+        self.slots = {a.name: threading.BoundedSemaphore(a.max_concurrency) for a in adapters}
+        self.rates = {(a.name, section): PublishRate() for a in adapters for section in a.sections}
+        self.seen: set[str] = set()
+        self.pending: set[str] = set()      # listed, not yet stored or failed for good
+        self.retrying: set[str] = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._heap: list[tuple[float, int, str, str]] = []
+        self._seq = itertools.count()
+        create_tables(engine, metadata, [section_polls])
+
+    # —— schedule ——
+    def restore(self) -> None:
+        """Rebuild the rate estimates from recent history and schedule every section."""
+        c = section_polls.c
+        since = time.time() - 5 * RATE_HALF_LIFE
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(c.source, c.section, c.polled_at, c.new)
+                .where(c.polled_at >= since, c.source.in_(list(self.adapters)))
+                .order_by(c.polled_at)
+            ).all()
+        for row in rows:
+            rate = self.rates.get((row.source, row.section))
+            if rate is not None:
+                rate.update(row.polled_at, row.new)
+        now = time.time()
+        for (source, section), rate in self.rates.items():
+            due = now
+            if rate.last_polled_at is not None:
+                due = max(now, rate.last_polled_at + self._interval(rate))
+            self._schedule(due, source, section)
+        logging.info("Scheduled %d sections (%d polls of history)", len(self.rates), len(rows))
+
+    def _interval(self, rate: PublishRate) -> float:
+        return next_interval(rate.per_hour(), self.min_interval, self.max_interval)
+
+    def _schedule(self, due: float, source: str, section: str) -> None:
+        with self._wake:
+            heapq.heappush(self._heap, (due, next(self._seq), source, section))
+            self._wake.notify()
+
+    def _next_due(self, stop: threading.Event) -> tuple[str, str] | None:
+        """Block until a section is due (or `stop` is set) and pop it."""
+        with self._wake:
+            while not stop.is_set():
+                if self._heap and self._heap[0][0] <= time.time():
+                    _, _, source, section = heapq.heappop(self._heap)
+                    return source, section
+                # wake up now and then to notice `stop`
+                wait = self._heap[0][0] - time.time() if self._heap else 60.0
+                self._wake.wait(min(wait, 60.0))
+        return None
+
+    # —— one poll ——
+    def poll(self, source: str, section: str, fetch_pool: ThreadPoolExecutor,
+             pipeline: ExtractionPipeline) -> None:
+        adapter = self.adapters[source]
+        session = self.sessions[source]
+        url = adapter.sections[section]
+        rate = self.rates[(source, section)]
+        polled_at = time.time()
+        try:
+            with profiling.stage("discover", url):
+                links = adapter.discover_feed_first(session, section, url)
+            if self.metrics is not None:
+                self.metrics.observe("discover", source, time.time() - polled_at)
+            with self._lock:
+                new = sorted(u for _, u in links if u not in self.seen and u not in self.pending)
+                self.pending.update(new)
+            rate.update(polled_at, len(new))
+            interval = self._interval(rate)
+            with self.engine.begin() as conn:
+                conn.execute(insert(section_polls).values(
+                    source=source, section=section, polled_at=polled_at,
+                    listed=len(links), new=len(new), interval=interval,
+                ))
+        except Exception as ex:
+            # keep the section on the schedule; its estimate just doesn't move
+            logging.warning("[%s] %s: poll failed: %s", source, section, ex)
+            self._schedule(polled_at + self._interval(rate), source, section)
+            return
+        self._schedule(polled_at + interval * random.uniform(1 - JITTER, 1 + JITTER), source, section)
+        logging.info("[%s] %s: %d new of %d listed, ~%.1f/h, next poll in %.0f min",
+                     source, section, len(new), len(links), rate.per_hour(), interval / 60)
+
+        todo = [(section, u) for u in new]
+        if self.retries is not None:
+            # every section of the source polls the same queue; take each retry once
+            fresh = set(new)
+            queued = self.retries.due(source)
+            with self._lock:
+                due = [(s, u) for s, u in queued if u not in self.retrying and u not in fresh]
+                self.retrying.update(u for _, u in due)
+            todo += due
+        slots = self.slots[source]
+        for article_section, article_url in todo:
+            slots.acquire()
+            fut = fetch_pool.submit(fetch_article, adapter, session, article_section, article_url,
+                                    pipeline, None, self.metrics, self.retries,
+                                    on_failure=self._fetch_failed)
+            fut.add_done_callback(lambda _, url=article_url: self._fetched(slots, url))
+
+    def _fetched(self, slots: threading.BoundedSemaphore, url: str) -> None:
+        slots.release()
+        with self._lock:
+            self.retrying.discard(url)
+
+    def _fetch_failed(self, url: str, outcome: str) -> None:
+        # a queued retry keeps the link pending until the retry queue is done with it
+        if outcome == "dead" or self.retries is None:
+            self._settle(url, outcome == "dead")
+
+    def _settle(self, url: str, final: bool) -> None:
+        """The link is stored or failed for good (`final`), or free to be fetched again."""
+        with self._lock:
+            self.pending.discard(url)
+            if final:
+                self.seen.add(url)
+
+    # —— loop ——
+    def run(self, stop: threading.Event | None = None) -> None:
+        """Poll until `stop` is set (or the process is interrupted)."""
+        stop = stop or threading.Event()
+        self.seen = self.sink.existing_urls()
+        self.restore()
+        # one discovery thread per source keeps a slow source's polls from delaying the others
+        pollers = {name: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"poll-{name}")
+                   for name in self.adapters}
+        try:
+            with self.sink, ExtractionPipeline(self.sink, processes=self.processes,
+                                               metrics=self.metrics, retries=self.retries,
+                                               terms=self.terms, on_done=self._settle) as pipeline, \
+                    ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="fetch") as fetch_pool:
+                try:
+                    while (due := self._next_due(stop)) is not None:
+                        source, section = due
+                        pollers[source].submit(self.poll, source, section, fetch_pool, pipeline)
+                finally:
+                    stop.set()
+                    for executor in pollers.values():
+                        executor.shutdown(wait=True, cancel_futures=True)
+        finally:
+            self.fetcher.close()
+
+
+# ——— MAIN ———————————————————————————————————————————————
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sources", nargs="+", choices=sorted(ADAPTERS), default=list(ADAPTERS))
+    parser.add_argument("--output", default="articles.csv", help="CSV file, Parquet directory or database URL to write records to")
+    parser.add_argument("--db", help="poll history database URL (default: the one in .env)")
+    parser.add_argument("--min-interval", type=float, default=120,
+                        help="never poll a section more often than this many seconds")
+    parser.add_argument("--max-interval", type=float, default=2 * HOUR,
+                        help="poll every section at least this often (seconds)")
+    parser.add_argument("--compress-bodies", nargs="?", const="", metavar="DB_URL",
+                        help="store bodies compressed with the per-source dictionaries (default database: the one in .env)")
+    parser.add_argument("--date-quarantine", nargs="?", const="", metavar="DB_URL",
+                        help="keep unparseable publication dates for dates.py report (default database: the one in .env)")
+    parser.add_argument("--retry-queue", nargs="?", const="", metavar="DB_URL",
+                        help="retry failed fetches with backoff and dead-letter permanent failures "
+                             "(default database: the one in .env)")
+    parser.add_argument("--terms", nargs="?", const="", metavar="DB_URL",
+                        help="count terms for the dashboard's trending terms (default database: the one in .env)")
+    parser.add_argument("--workers", type=int, help="size of the shared fetch pool")
+    parser.add_argument("--processes", type=int, help="extraction processes (default: one per core)")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="serve Prometheus metrics at http://<host>:PORT/metrics")
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.min_interval > args.max_interval:
+        parser.error("--min-interval is longer than --max-interval")
+    profiling.start_from_args(args, "poller")
+
+    metrics = None
+    if args.metrics_port:
+        metrics = CrawlMetrics()
+        metrics.serve(args.metrics_port)
+    codec = BodyCodec(get_engine(args.compress_bodies or None)) if args.compress_bodies is not None else None
+    quarantine = DateQuarantine(get_engine(args.date_quarantine or None)) if args.date_quarantine is not None else None
+    poller = SectionPoller(get_engine(args.db), load_adapters(args.sources),
+                           sink_for(args.output, codec=codec, quarantine=quarantine),
+                           min_interval=args.min_interval, max_interval=args.max_interval,
+                           workers=args.workers, processes=args.processes, metrics=metrics,
+                           retries=RetryQueue(get_engine(args.retry_queue or None))
+                           if args.retry_queue is not None else None,
+                           terms=TermIndex(get_engine(args.terms or None)) if args.terms is not None else None)
+    try:
+        poller.run()
+    except KeyboardInterrupt:
+        logging.info("Stopping")
+    finally:
+        if metrics is not None:
+            metrics.close()
+
+
+if __name__ == "__main__":
+    main()
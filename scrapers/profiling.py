@@ -0,0 +1,281 @@
+"""Opt-in profiling for crawls (`--profile` on every scraper entry point).
+
+    python scrapers/orchestrator.py --sources abc --profile                 # sampled, into profiles/
+    python scrapers/abc_news_scraper.py --profile=profiles/ --profile-mode=cprofile
+
+Hot paths label their work with `stage(name, item)` – item is usually the
+article URL. When profiling is off that is a shared no-op context manager, so
+the labels cost one global lookup.
+
+A run writes one directory, `<dir>/<entry point>-<time>/`, holding for the
+main process and every extraction worker process (`worker-<pid>.*`):
+
+* `*.folded`     – collapsed stacks ("stage;frame;frame;... samples"), ready
+                   for flamegraph.pl or speedscope (sample mode)
+* `*.pstats`     – deterministic cProfile data for the labelled stages, plus the
+                   whole main thread (cprofile mode)
+* `*-top.txt`    – top-N functions, per-stage totals and the slowest items
+* `*-items.tsv`  – wall time of every labelled (stage, item), slowest first
+
+Sample mode walks every thread's stack from a background thread every
+`interval` seconds and skips threads parked on a lock or queue. cprofile mode
+is exact but slows the profiled code down several times; on Python 3.12+ only
+one thread can be under cProfile at a time, so prefer sample mode there.
+"""
+from __future__ import annotations
+import argparse
+import atexit
+import contextlib
+import cProfile
+import io
+import logging
+import multiprocessing.util
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+MODES = ("sample", "cprofile")
+# a sampled thread whose innermost frame is in one of these is waiting, not working
+IDLE_FILES = tuple(os.path.join(*parts) for parts in [
+    ("", "threading.py"), ("", "queue.py"), ("", "selectors.py"), ("", "socketserver.py"),
+    ("concurrent", "futures", "thread.py"), ("concurrent", "futures", "process.py"),
+    ("multiprocessing", "popen_fork.py"), ("multiprocessing", "connection.py"),
+])
+
+_active: "Profiler | None" = None
+_OFF = contextlib.nullcontext()
+
+
+def active() -> "Profiler | None":
+    return _active
+
+
+def stage(name: str, item: str | None = None):
+    """Label a block of work for the active profiler; a no-op when profiling is off."""
+    return _OFF if _active is None else _active.stage(name, item)
+
+
+class Profiler:
+    def __init__(self, run_dir: str | Path, name: str = "main", mode: str = "sample",
+                 interval: float = 0.005, top: int = 30, include_idle: bool = False):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile mode {mode!r}; expected one of {MODES}")
+        self.run_dir = Path(run_dir)
+        self.name = name
+        self.mode = mode
+        self.interval = interval
+        self.top = top
+        self.include_idle = include_idle
+        self._lock = threading.Lock()
+        # thread id -> stack of (stage, item) currently open on that thread
+        self._labels: dict[int, list[tuple[str, str | None]]] = {}
+        # (stage, item) -> [calls, seconds]
+        self.items: dict[tuple[str, str | None], list] = {}
+        self.samples: Counter = Counter()
+        self._frame_names: dict = {}
+        self._stop = threading.Event()
+        self._sampler: threading.Thread | None = None
+        self._tls = threading.local()
+        self._profiles: list[cProfile.Profile] = []
+
+    # —— lifecycle ——
+    def start(self) -> "Profiler":
+        global _active
+        _active = self
+        self.started = time.perf_counter()
+        if self.mode == "sample":
+            self._sampler = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+            self._sampler.start()
+        else:
+            # the main thread is profiled throughout; other threads only inside stages
+            self._enable_thread_profile()
+        return self
+
+    def stop(self) -> Path | None:
+        """Stop profiling and write the report files; returns the top-N table's path."""
+        global _active
+        if _active is not self:
+            return None
+        _active = None
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+        else:
+            self._disable_thread_profile()
+        return self.write()
+
+    # —— labelling ——
+    @contextlib.contextmanager
+    def stage(self, name: str, item: str | None = None):
+        labels = self._labels.setdefault(threading.get_ident(), [])
+        labels.append((name, item))
+        enabled = self.mode == "cprofile" and self._enable_thread_profile()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            if enabled:
+                self._disable_thread_profile()
+            labels.pop()
+            with self._lock:
+                entry = self.items.get((name, item))
+                if entry is None:
+                    entry = self.items[(name, item)] = [0, 0.0]
+                entry[0] += 1
+                entry[1] += elapsed
+
+    def _enable_thread_profile(self) -> bool:
+        """Turn cProfile on for this thread unless an outer stage already did."""
+        if getattr(self._tls, "profile", None) is not None:
+            return False
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # another profiler is active (Python 3.12+ allows only one)
+            return False
+        self._tls.profile = profile
+        with self._lock:
+            self._profiles.append(profile)
+        return True
+
+    def _disable_thread_profile(self) -> None:
+        profile = getattr(self._tls, "profile", None)
+        if profile is not None:
+            profile.disable()
+            self._tls.profile = None
+
+    # —— sampling ——
+    def _frame_name(self, code) -> str:
+        name = self._frame_names.get(code)
+        if name is None:
+            name = self._frame_names[code] = (
+                f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            )
+        return name
+
+    def _sample_loop(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for tid, frame in sys._current_frames().items():
+                if tid == own:
+                    continue
+                if not self.include_idle and frame.f_code.co_filename.endswith(IDLE_FILES):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame_name(frame.f_code))
+                    frame = frame.f_back
+                # a snapshot: the thread may pop its label between a check and a read
+                labels = list(self._labels.get(tid) or ())
+                root = labels[-1][0] if labels else "-"
+                self.samples[(root, *reversed(stack))] += 1
+
+    # —— reports ——
+    def write(self) -> Path:
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        base = self.run_dir / self.name
+        report = io.StringIO()
+        report.write(f"{self.name}: {self.mode} profile, {time.perf_counter() - self.started:.1f}s wall\n\n")
+
+        if self.mode == "sample":
+            with open(f"{base}.folded", "w", encoding="utf-8") as fp:
+                for stack, n in self.samples.most_common():
+                    fp.write(";".join(stack) + f" {n}\n")
+            self._write_sample_tables(report)
+        elif self._profiles:
+            stats = pstats.Stats(self._profiles[0], stream=report)
+            for profile in self._profiles[1:]:
+                stats.add(profile)
+            stats.dump_stats(f"{base}.pstats")
+            stats.sort_stats("cumulative").print_stats(self.top)
+            stats.sort_stats("tottime").print_stats(self.top)
+
+        with self._lock:
+            items = sorted(self.items.items(), key=lambda kv: kv[1][1], reverse=True)
+        with open(f"{base}-items.tsv", "w", encoding="utf-8") as fp:
+            fp.write("stage\titem\tcalls\tseconds\n")
+            for (name, item), (calls, seconds) in items:
+                fp.write(f"{name}\t{item or ''}\t{calls}\t{seconds:.6f}\n")
+        self._write_item_tables(report, items)
+
+        top_path = Path(f"{base}-top.txt")
+        top_path.write_text(report.getvalue(), encoding="utf-8")
+        return top_path
+
+    def _write_sample_tables(self, out: io.StringIO) -> None:
+        total = sum(self.samples.values()) or 1
+        own, inclusive, per_stage = Counter(), Counter(), Counter()
+        for stack, n in self.samples.items():
+            per_stage[stack[0]] += n
+            own[stack[-1]] += n
+            for frame in set(stack[1:]):
+                inclusive[frame] += n
+        out.write(f"{total} samples every {self.interval * 1000:g} ms\n\nsamples by stage\n")
+        for name, n in per_stage.most_common():
+            out.write(f"  {n:8d} {100 * n / total:6.1f}%  {name}\n")
+        for title, counts in (("self", own), ("inclusive", inclusive)):
+            out.write(f"\ntop {self.top} functions by {title} samples\n")
+            for frame, n in counts.most_common(self.top):
+                out.write(f"  {n:8d} {100 * n / total:6.1f}%  {frame}\n")
+
+    def _write_item_tables(self, out: io.StringIO, items: list) -> None:
+        per_stage: dict[str, list] = {}
+        for (name, _), (calls, seconds) in items:
+            totals = per_stage.setdefault(name, [0, 0.0])
+            totals[0] += calls
+            totals[1] += seconds
+        out.write("\nwall time by labelled stage\n")
+        for name, (calls, seconds) in sorted(per_stage.items(), key=lambda kv: -kv[1][1]):
+            out.write(f"  {seconds:10.3f}s {calls:7d} calls {1000 * seconds / calls:9.2f} ms avg  {name}\n")
+        out.write(f"\nslowest {self.top} items\n")
+        for (name, item), (calls, seconds) in items[:self.top]:
+            if item is not None:
+                out.write(f"  {1000 * seconds:10.1f} ms  {name:<10} {item}\n")
+
+
+# ——— ENTRY POINTS ————————————————————————————————————————
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--profile", nargs="?", const="profiles", metavar="DIR",
+                        help="profile this run and write the reports under DIR (default: profiles/)")
+    parser.add_argument("--profile-mode", choices=MODES, default="sample",
+                        help="sampled stacks (low overhead) or deterministic cProfile")
+
+
+def start(out_dir: str, mode: str, entry_point: str) -> Profiler:
+    """Start profiling this process; the reports are written when it exits."""
+    run_dir = Path(out_dir) / f"{entry_point}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    profiler = Profiler(run_dir, mode=mode).start()
+
+    def finish():
+        top = profiler.stop()
+        if top is not None:
+            logging.info("Profile written to %s (summary: %s)", run_dir, top.name)
+
+    atexit.register(finish)
+    return profiler
+
+
+def start_from_args(args: argparse.Namespace, entry_point: str) -> Profiler | None:
+    return start(args.profile, args.profile_mode, entry_point) if args.profile else None
+
+
+def start_from_argv(entry_point: str) -> Profiler | None:
+    """`--profile[=DIR]` / `--profile-mode=MODE` for the scripts that take no other arguments."""
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    args, rest = parser.parse_known_args()
+    sys.argv[1:] = rest
+    return start_from_args(args, entry_point)
+
+
+def start_worker(run_dir: str, mode: str) -> None:
+    """ProcessPoolExecutor initializer: profile an extraction worker for its whole life."""
+    profiler = Profiler(run_dir, name=f"worker-{os.getpid()}", mode=mode).start()
+    # pool workers leave through os._exit, which skips atexit but runs these
+    multiprocessing.util.Finalize(profiler, profiler.stop, exitpriority=10)
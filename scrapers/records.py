@@ -0,0 +1,187 @@
+"""The one article record type, and columnar batches of it for the sinks.
+
+Every extractor returns an `ArticleRecord`: a `__slots__` class with one
+attribute per `ARTICLE_COLUMNS` entry, so a record is a fixed-size object
+rather than a dict, and all sources agree on names and order. Values are
+validated and coerced on construction – URLs must be http(s), counts
+non-negative ints, datetimes become ISO strings and empty strings become
+None – so a malformed record fails in the extractor that produced it
+(`InvalidRecord`) instead of in the database.
+
+`RecordBatch` collects records column by column (one list per column), which
+is the shape the sinks write: `rows()` for csv.writer and DB executemany,
+`to_arrow()` for Parquet.
+
+    record = ArticleRecord(source_name="ABC News", article_url=url, headline_text=h)
+    batch = RecordBatch()
+    batch.append(record)
+"""
+from __future__ import annotations
+import operator
+from datetime import datetime
+from typing import Any, Iterator, Mapping
+
+# ——— SCHEMA ——————————————————————————————————————————————
+# the columns of the `articles` table, in table order
+ARTICLE_COLUMNS = [
+    "source_name",
+    "article_url",
+    "article_section",
+    "publication_date",
+    "headline_text",
+    "headline_word_count",
+    "article_word_count",
+    "num_internal_links",
+    "num_external_links",
+    "num_internal_links_within_body",
+    "num_external_links_within_body",
+    "article_full_text",
+    "scrape_date",
+    "duplicate_cluster_id",
+]
+
+# what a metadata-only extraction fills in; the other columns stay empty
+METADATA_COLUMNS = [
+    "source_name",
+    "article_url",
+    "article_section",
+    "publication_date",
+    "headline_text",
+    "headline_word_count",
+    "scrape_date",
+]
+
+# counted over the whole page, so a body-only fetch (cut short after the article) leaves them empty
+PAGE_COLUMNS = ["num_internal_links", "num_external_links"]
+
+COUNT_COLUMNS = frozenset({
+    "headline_word_count",
+    "article_word_count",
+    "num_internal_links",
+    "num_external_links",
+    "num_internal_links_within_body",
+    "num_external_links_within_body",
+})
+REQUIRED_COLUMNS = ("source_name", "article_url")
+
+
+class InvalidRecord(ValueError):
+    pass
+
+
+def _text(column: str, value: Any) -> str | None:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if not isinstance(value, str):
+        raise InvalidRecord(f"{column} must be text, got {type(value).__name__}")
+    return value if value.strip() else None
+
+
+def _count(column: str, value: Any) -> int | None:
+    if value is None or value == "":
+        return None
+    if isinstance(value, float) and value.is_integer():  # pandas reads int columns with gaps as float
+        value = int(value)
+    elif isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    try:
+        n = operator.index(value)  # int and numpy integers
+    except TypeError:
+        raise InvalidRecord(f"{column} must be a whole number, got {value!r}") from None
+    if n < 0:
+        raise InvalidRecord(f"{column} must not be negative, got {n}")
+    return n
+
+
+_CONVERTERS = [(c, _count if c in COUNT_COLUMNS else _text) for c in ARTICLE_COLUMNS]
+
+
+# ——— RECORD ——————————————————————————————————————————————
+class ArticleRecord:
+    """One article, as stored in the `articles` table.
+
+    Takes values positionally in ARTICLE_COLUMNS order and/or by column name;
+    columns not given are None.
+    """
+    __slots__ = tuple(ARTICLE_COLUMNS)
+
+    def __init__(self, *values: Any, **fields: Any):
+        if len(values) > len(ARTICLE_COLUMNS):
+            raise TypeError(f"ArticleRecord takes at most {len(ARTICLE_COLUMNS)} values")
+        unknown = fields.keys() - set(ARTICLE_COLUMNS)
+        if unknown:
+            raise TypeError(f"Unknown article columns: {sorted(unknown)}")
+        for i, (column, convert) in enumerate(_CONVERTERS):
+            value = values[i] if i < len(values) else fields.get(column)
+            setattr(self, column, convert(column, value))
+        for column in REQUIRED_COLUMNS:
+            if getattr(self, column) is None:
+                raise InvalidRecord(f"{column} is required")
+        if not self.article_url.startswith(("http://", "https://")):
+            raise InvalidRecord(f"article_url is not an http(s) URL: {self.article_url!r}")
+
+    @classmethod
+    def from_values(cls, values: tuple) -> "ArticleRecord":
+        """Rebuild a record from `values()` without validating it again."""
+        record = cls.__new__(cls)
+        for column, value in zip(ARTICLE_COLUMNS, values):
+            setattr(record, column, value)
+        return record
+
+    @classmethod
+    def from_mapping(cls, row: Mapping[str, Any]) -> "ArticleRecord":
+        """Validate a row keyed by column name (e.g. from csv.DictReader); other keys are ignored."""
+        return cls(**{c: row[c] for c in ARTICLE_COLUMNS if c in row})
+
+    def values(self) -> tuple:
+        return tuple(getattr(self, c) for c in ARTICLE_COLUMNS)
+
+    def as_dict(self) -> dict[str, Any]:
+        return dict(zip(ARTICLE_COLUMNS, self.values()))
+
+    def metadata_only(self) -> "ArticleRecord":
+        """A copy with only the METADATA_COLUMNS filled in."""
+        return ArticleRecord.from_values(
+            tuple(getattr(self, c) if c in METADATA_COLUMNS else None for c in ARTICLE_COLUMNS)
+        )
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, ArticleRecord) and self.values() == other.values()
+
+    def __repr__(self) -> str:
+        return f"ArticleRecord({self.source_name!r}, {self.article_url!r})"
+
+
+# ——— COLUMNAR BATCH ——————————————————————————————————————
+class RecordBatch:
+    """Records accumulated column by column, ready to be written as a block."""
+    __slots__ = ("columns",)
+
+    def __init__(self):
+        self.columns: dict[str, list] = {c: [] for c in ARTICLE_COLUMNS}
+
+    def append(self, record: ArticleRecord) -> None:
+        for column, values in self.columns.items():
+            values.append(getattr(record, column))
+
+    def __len__(self) -> int:
+        return len(self.columns["article_url"])
+
+    def clear(self) -> None:
+        for values in self.columns.values():
+            values.clear()
+
+    def rows(self, columns: list[str] | None = None) -> Iterator[tuple]:
+        """Row tuples over `columns` (default: all, in ARTICLE_COLUMNS order)."""
+        return zip(*(self.columns[c] for c in (columns or ARTICLE_COLUMNS)))
+
+    def to_arrow(self):
+        """The batch as a pyarrow Table (needs the optional pyarrow dependency)."""
+        import pyarrow as pa
+
+        return pa.table({
+            c: pa.array(values, type=pa.int64() if c in COUNT_COLUMNS else pa.string())
+            for c, values in self.columns.items()
+        })
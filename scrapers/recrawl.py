@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""Revisit recently published articles and store them again only when they changed.
+
+    python scrapers/recrawl.py seed articles.csv          # start tracking scraped articles
+    python scrapers/recrawl.py run --output updates.csv   # recheck whatever is due
+    python scrapers/recrawl.py run --loop                 # ... forever
+
+Each tracked article has a next-check time that decays with age: every half
+hour while it is fresh, then every few hours, then daily, and it is retired
+after a week. Articles that keep coming back unchanged are backed off further
+within their tier, so refetches go to stories that are still being edited.
+
+Rechecks send If-None-Match / If-Modified-Since, so an unchanged page usually
+costs a 304 and no parse. Otherwise the page is extracted and its text hashed;
+only a new hash adds a row to `article_versions` and a record to the sink. A
+database sink replaces the article's row rather than adding a second one.
+
+Seeding ages each article from its publication date (or, without one, its
+scrape date), so a week-old article from an old CSV is not tracked at all.
+"""
+from __future__ import annotations
+import argparse
+import csv
+import hashlib
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import (Boolean, Column, Float, Integer, MetaData, String, Table, Text,
+                        func, insert, select, update)
+from sqlalchemy.engine import Engine
+
+import profiling
+import streaming
+from adapters import ADAPTERS, SourceAdapter, load_adapters
+from bodies import BodyCodec, is_encoded
+from dates import DateQuarantine
+from db import create_tables, get_engine
+from fetcher import Fetcher
+from records import ArticleRecord, InvalidRecord
+from sinks import DbSink, Sink, sink_for
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s"
+)
+
+metadata = MetaData()
+
+recrawl_schedule = Table(
+    "recrawl_schedule", metadata,
+    Column("article_url", Text, primary_key=True),
+    Column("source", String(32), nullable=False),
+    Column("section", Text),
+    Column("first_seen_at", Float, nullable=False),
+    Column("last_checked_at", Float),
+    Column("next_check_at", Float, nullable=False, index=True),
+    Column("etag", Text),
+    Column("last_modified", Text),
+    Column("content_hash", String(64)),
+    Column("version", Integer, nullable=False, default=1),
+    Column("unchanged_checks", Integer, nullable=False, default=0),
+    Column("retired", Boolean, nullable=False, default=False),
+)
+
+article_versions = Table(
+    "article_versions", metadata,
+    Column("article_url", Text, primary_key=True),
+    Column("version", Integer, primary_key=True),
+    Column("content_hash", String(64), nullable=False),
+    Column("fetched_at", Float, nullable=False),
+    Column("headline_text", Text),
+    Column("article_full_text", Text),
+)
+
+# ——— SCHEDULE ————————————————————————————————————————————
+HOUR = 3600
+# (age limit, base interval): articles change most in their first hours
+RECRAWL_TIERS = [
+    (6 * HOUR,       30 * 60),
+    (24 * HOUR,      2 * HOUR),
+    (3 * 24 * HOUR,  8 * HOUR),
+    (7 * 24 * HOUR,  24 * HOUR),
+]
+# each unchanged check doubles the interval, up to this many doublings
+MAX_BACKOFF_DOUBLINGS = 3
+
+
+def next_interval(age: float, unchanged_checks: int) -> float | None:
+    """Seconds until the next check, or None once the article is old enough to retire."""
+    for age_limit, interval in RECRAWL_TIERS:
+        if age < age_limit:
+            backed_off = interval * 2 ** min(unchanged_checks, MAX_BACKOFF_DOUBLINGS)
+            # never back off past the point where the next tier takes over
+            return min(backed_off, max(interval, age_limit - age))
+    return None
+
+
+def content_hash(record: ArticleRecord) -> str:
+    """Hash of the extracted headline and body, whitespace-normalized so markup shuffles don't count."""
+    text = " ".join(f"{record.headline_text or ''} {record.article_full_text or ''}".split())
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# ——— RECRAWLER ———————————————————————————————————————————
+class Recrawler:
+    def __init__(self, engine: Engine, adapters: list[SourceAdapter], sink: Sink,
+                 fetcher: Fetcher | None = None, codec: BodyCodec | None = None):
+        self.engine = engine
+        self.adapters = {a.name: a for a in adapters}
+        self.sink = sink
+        self.codec = codec
+        self.fetcher = fetcher or Fetcher(pool_size=sum(a.max_concurrency for a in adapters))
+        self.sessions = {a.name: self.fetcher.session_for(a) for a in adapters}
+        if isinstance(sink, DbSink):
+            # a changed article updates its row in the table rather than duplicating it
+            sink.replace = True
+        create_tables(engine, metadata, [recrawl_schedule, article_versions])
+
+    def track(self, source: str, record: ArticleRecord, seen_at: float | None = None) -> bool:
+        """Start tracking a scraped article; its record becomes version 1.
+
+        `seen_at` is when the article appeared (default: now); one already
+        past the last tier is not tracked.
+        """
+        now = time.time()
+        seen_at = seen_at or now
+        interval = next_interval(max(0.0, now - seen_at), 0)
+        if interval is None:
+            return False
+        url = record.article_url
+        digest = content_hash(record)
+        with self.engine.begin() as conn:
+            exists = conn.execute(
+                select(recrawl_schedule.c.article_url).where(recrawl_schedule.c.article_url == url)
+            ).first()
+            if exists:
+                return False
+            conn.execute(insert(recrawl_schedule).values(
+                article_url=url, source=source, section=record.article_section,
+                first_seen_at=seen_at, next_check_at=now + interval,
+                content_hash=digest, version=1, unchanged_checks=0, retired=False,
+            ))
+            conn.execute(insert(article_versions).values(
+                article_url=url, version=1, content_hash=digest, fetched_at=now,
+                headline_text=record.headline_text,
+                article_full_text=self._stored_body(record),
+            ))
+        return True
+
+    def _stored_body(self, record: ArticleRecord) -> str | None:
+        if self.codec is None:
+            return record.article_full_text
+        return self.codec.encode(record.source_name, record.article_full_text)
+
+    def due(self, limit: int = 500) -> list[Any]:
+        c = recrawl_schedule.c
+        with self.engine.connect() as conn:
+            return conn.execute(
+                select(recrawl_schedule)
+                .where(c.retired.is_(False), c.next_check_at <= time.time(),
+                       c.source.in_(list(self.adapters)))
+                .order_by(c.next_check_at).limit(limit)
+            ).all()
+
+    def recheck(self, row: Any) -> str:
+        """Conditionally refetch one article; returns "unchanged", "changed" or "failed"."""
+        adapter = self.adapters[row.source]
+        session = self.sessions[row.source]
+        headers = {}
+        if row.etag:
+            headers["If-None-Match"] = row.etag
+        if row.last_modified:
+            headers["If-Modified-Since"] = row.last_modified
+
+        now = time.time()
+        outcome = "unchanged"
+        values: dict[str, Any] = {"last_checked_at": now}
+        try:
+            with profiling.stage("fetch", row.article_url):
+                res = streaming.get(session, row.article_url, timeout=adapter.timeout, headers=headers,
+                                    caps=adapter.max_bytes, deadline=adapter.download_deadline)
+            if res.status_code != 304:
+                res.raise_for_status()
+                values["etag"] = res.headers.get("ETag")
+                values["last_modified"] = res.headers.get("Last-Modified")
+                with profiling.stage("extract", row.article_url):
+                    record = adapter.extract(row.section, row.article_url, res.content)
+                if record is None:
+                    raise ValueError("nothing extracted")
+                digest = content_hash(record)
+                if digest != row.content_hash:
+                    outcome = "changed"
+                    values.update(content_hash=digest, version=row.version + 1)
+                    self._store_version(row, record, digest, now)
+        except Exception as ex:
+            logging.warning("[%s] recheck failed %s: %s", row.source, row.article_url, ex)
+            outcome = "failed"
+        finally:
+            if adapter.request_delay:
+                time.sleep(adapter.request_delay)
+
+        unchanged = 0 if outcome == "changed" else row.unchanged_checks + 1
+        interval = next_interval(now - row.first_seen_at, unchanged)
+        values.update(unchanged_checks=unchanged,
+                      retired=interval is None,
+                      next_check_at=now + (interval or 0))
+        with self.engine.begin() as conn:
+            conn.execute(update(recrawl_schedule)
+                         .where(recrawl_schedule.c.article_url == row.article_url)
+                         .values(**values))
+        return outcome
+
+    def _store_version(self, row: Any, record: ArticleRecord, digest: str, now: float) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(insert(article_versions).values(
+                article_url=row.article_url, version=row.version + 1, content_hash=digest,
+                fetched_at=now, headline_text=record.headline_text,
+                article_full_text=self._stored_body(record),
+            ))
+        # downstream only ever sees content that actually changed
+        self.sink.write(record)
+
+    def run_once(self, workers: int | None = None) -> dict[str, int]:
+        rows = self.due()
+        workers = workers or sum(a.max_concurrency for a in self.adapters.values())
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="recrawl") as pool:
+            outcomes = list(pool.map(self.recheck, rows))
+        summary = {k: outcomes.count(k) for k in ("changed", "unchanged", "failed")}
+        logging.info("Rechecked %d articles: %s", len(rows), summary)
+        return summary
+
+    def next_due_in(self) -> float | None:
+        c = recrawl_schedule.c
+        with self.engine.connect() as conn:
+            nxt = conn.execute(select(func.min(c.next_check_at)).where(c.retired.is_(False))).scalar()
+        return None if nxt is None else max(0.0, nxt - time.time())
+
+
+# ——— MAIN ———————————————————————————————————————————————
+def seen_at(record: ArticleRecord) -> float | None:
+    """When an article appeared: its publication date, else its scrape date, as a Unix time."""
+    for value in (record.publication_date, record.scrape_date):
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def seed(recrawler: Recrawler, path: str) -> int:
+    """Track every article in an orchestrator CSV (articles table columns)."""
+    names = {a.source_name: a.name for a in recrawler.adapters.values()}
+    codec = recrawler.codec
+    tracked = 0
+    csv.field_size_limit(sys.maxsize)
+    with open(path, newline="", encoding="utf-8") as fp:
+        for row in csv.DictReader(fp):
+            if is_encoded(row.get("article_full_text")):
+                # the hash is over the plain text, like the one rechecks compute
+                codec = codec or BodyCodec(get_engine())
+                row["article_full_text"] = codec.decode(row["article_full_text"])
+            try:
+                record = ArticleRecord.from_mapping(row)
+            except InvalidRecord as ex:
+                logging.warning("Skipping %s: %s", row.get("article_url"), ex)
+                continue
+            source = names.get(record.source_name)
+            if source and recrawler.track(source, record, seen_at=seen_at(record)):
+                tracked += 1
+    logging.info("Tracking %d new articles from %s", tracked, path)
+    return tracked
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["seed", "run"])
+    parser.add_argument("csv", nargs="?", help="articles CSV to seed from")
+    parser.add_argument("--db", help="schedule database URL (default: the one in .env)")
+    parser.add_argument("--sources", nargs="+", choices=sorted(ADAPTERS), default=list(ADAPTERS))
+    parser.add_argument("--output", default="article_updates.csv",
+                        help="CSV, Parquet directory or database URL that receives every changed article")
+    parser.add_argument("--loop", action="store_true", help="keep rechecking as articles come due")
+    parser.add_argument("--compress-bodies", nargs="?", const="", metavar="DB_URL",
+                        help="store bodies compressed with the per-source dictionaries (default database: the one in .env)")
+    parser.add_argument("--date-quarantine", nargs="?", const="", metavar="DB_URL",
+                        help="keep unparseable publication dates for dates.py report (default database: the one in .env)")
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    profiling.start_from_args(args, f"recrawl-{args.command}")
+
+    codec = BodyCodec(get_engine(args.compress_bodies or None)) if args.compress_bodies is not None else None
+    quarantine = DateQuarantine(get_engine(args.date_quarantine or None)) if args.date_quarantine is not None else None
+    recrawler = Recrawler(get_engine(args.db), load_adapters(args.sources),
+                          sink_for(args.output, codec=codec, quarantine=quarantine), codec=codec)
+    if args.command == "seed":
+        if not args.csv:
+            parser.error("seed needs the articles CSV to read")
+        seed(recrawler, args.csv)
+        return
+
+    with recrawler.sink:
+        while True:
+            recrawler.run_once()
+            wait = recrawler.next_due_in()
+            if not args.loop or wait is None:
+                break
+            time.sleep(min(max(wait, 5.0), 300.0))
+
+
+if __name__ == "__main__":
+    main()
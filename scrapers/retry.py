@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""What happens to fetches that fail: per-host circuit breakers, a durable retry queue, dead letters.
+
+    python scrapers/orchestrator.py --retry-queue ...        # remember failures between runs
+    python scrapers/retry.py report                          # dead letters by source and reason
+    python scrapers/retry.py requeue --source cbs            # give dead letters another go
+
+`CircuitBreakers` sit in front of every request the shared `Fetcher` sends.
+After BREAKER_THRESHOLD consecutive connection errors, timeouts or 5xx/429
+answers from one host, the host's circuit opens and further requests fail
+at once with `CircuitOpen` instead of each waiting out its timeout. Once the
+cooldown has passed, one request at a time is let through as a probe. A
+successful probe closes the circuit; a failed one reopens it for twice as
+long, up to BREAKER_MAX_COOLDOWN.
+
+`RetryQueue` keeps failed article fetches in `fetch_retries` with their next
+attempt time, using exponential backoff with full jitter (the same schedule
+the frontier uses for its leases). URLs whose circuit was open are retried
+once it may have closed, and that doesn't count as an attempt. Permanent
+failures (4xx other than 408/425/429, bodies over their byte cap), URLs out
+of attempts and pages the extractor can't handle go to `dead_letters` with
+the reason.
+"""
+from __future__ import annotations
+import argparse
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+
+import requests
+from sqlalchemy import (Column, Float, Integer, MetaData, String, Table, Text, delete, func,
+                        insert, select)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+
+from db import create_tables, get_engine
+from streaming import ResponseTooLarge
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s"
+)
+
+metadata = MetaData()
+
+fetch_retries = Table(
+    "fetch_retries", metadata,
+    Column("url", Text, primary_key=True),
+    Column("source", String(32), nullable=False),
+    Column("section", Text),
+    Column("attempts", Integer, nullable=False),
+    Column("next_attempt_at", Float, nullable=False, index=True),
+    Column("last_error", Text),
+    Column("created_at", Float, nullable=False),
+    Column("updated_at", Float, nullable=False),
+)
+
+dead_letters = Table(
+    "dead_letters", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("url", Text, nullable=False, index=True),
+    Column("source", String(32), nullable=False),
+    Column("section", Text),
+    Column("stage", String(16), nullable=False),     # "fetch" | "extract" | "write"
+    Column("attempts", Integer, nullable=False),
+    Column("reason", Text, nullable=False),
+    Column("failed_at", Float, nullable=False),
+)
+
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+BREAKER_MAX_COOLDOWN = 600.0
+RETRYABLE_STATUS = {408, 425, 429}
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Seconds to wait before retry number `attempt` (1-based): exponential backoff with full jitter."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+# ——— CIRCUIT BREAKERS ————————————————————————————————————
+class CircuitOpen(requests.ConnectionError):
+    """A request refused without being sent because its host's circuit is open."""
+
+    def __init__(self, host: str, retry_at: float):
+        super().__init__(f"circuit open for {host} for another {max(0.0, retry_at - time.time()):.0f}s")
+        self.host = host
+        self.retry_at = retry_at
+
+
+@dataclass
+class _Circuit:
+    failures: int = 0
+    open_until: float | None = None
+    cooldown: float = BREAKER_COOLDOWN
+    probing: bool = False
+
+
+class CircuitBreakers:
+    """One circuit per host, shared by every thread of the process."""
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN,
+                 max_cooldown: float = BREAKER_MAX_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._circuits: dict[str, _Circuit] = {}
+        self._lock = threading.Lock()
+
+    def before(self, host: str) -> None:
+        """Raise CircuitOpen unless a request to `host` may go out now."""
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is None or circuit.open_until is None:
+                return
+            now = time.time()
+            if now < circuit.open_until:
+                raise CircuitOpen(host, circuit.open_until)
+            if circuit.probing:
+                # one probe at a time; the others wait for its verdict
+                raise CircuitOpen(host, now + self.cooldown)
+            circuit.probing = True
+
+    def success(self, host: str) -> None:
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is None:
+                return
+            if circuit.open_until is not None:
+                logging.info("Circuit for %s closed again", host)
+            del self._circuits[host]
+
+    def failure(self, host: str) -> None:
+        with self._lock:
+            circuit = self._circuits.setdefault(host, _Circuit(cooldown=self.cooldown))
+            circuit.failures += 1
+            if circuit.probing:
+                circuit.probing = False
+                circuit.cooldown = min(self.max_cooldown, circuit.cooldown * 2)
+            elif circuit.open_until is not None or circuit.failures < self.threshold:
+                return
+            circuit.open_until = time.time() + circuit.cooldown
+            logging.warning("Circuit for %s open for %.0fs after %d failures",
+                            host, circuit.cooldown, circuit.failures)
+
+
+# ——— FAILURE CLASSIFICATION ——————————————————————————————
+def is_retryable(ex: Exception) -> bool:
+    """Whether fetching again later may succeed: network trouble and overload, not 404s or oversized bodies."""
+    if isinstance(ex, ResponseTooLarge):
+        return False
+    res = getattr(ex, "response", None)
+    if isinstance(ex, requests.HTTPError) and res is not None:
+        return res.status_code >= 500 or res.status_code in RETRYABLE_STATUS
+    return True
+
+
+def retry_after(ex: Exception) -> float | None:
+    """Seconds asked for by a Retry-After header on the failed response, if any."""
+    res = getattr(ex, "response", None)
+    value = res.headers.get("Retry-After") if res is not None else None
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def describe(ex: Exception) -> str:
+    return f"{type(ex).__name__}: {ex}"
+
+
+# ——— RETRY QUEUE —————————————————————————————————————————
+class RetryQueue:
+    def __init__(self, engine: Engine, max_attempts: int = 5, backoff_base: float = 60,
+                 backoff_cap: float = 6 * 3600):
+        self.engine = engine
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._insert = postgresql.insert if engine.dialect.name == "postgresql" else sqlite.insert
+        # URLs this process knows to be queued, so successes elsewhere cost no query
+        self._queued: set[str] = set()
+        self._lock = threading.Lock()
+        create_tables(engine, metadata, [fetch_retries, dead_letters])
+
+    def due(self, source: str, limit: int = 500) -> list[tuple[str | None, str]]:
+        """(section, url) of the source's queued fetches whose next attempt is due."""
+        c = fetch_retries.c
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(c.section, c.url)
+                .where(c.source == source, c.next_attempt_at <= time.time())
+                .order_by(c.next_attempt_at).limit(limit)
+            ).all()
+        with self._lock:
+            self._queued.update(url for _, url in rows)
+        return [tuple(row) for row in rows]
+
+    def waiting(self, source: str) -> set[str]:
+        """The source's queued URLs that are still backing off."""
+        c = fetch_retries.c
+        with self.engine.connect() as conn:
+            urls = set(conn.execute(
+                select(c.url).where(c.source == source, c.next_attempt_at > time.time())
+            ).scalars())
+        with self._lock:
+            self._queued.update(urls)
+        return urls
+
+    def succeeded(self, url: str) -> None:
+        with self._lock:
+            if url not in self._queued:
+                return
+            self._queued.discard(url)
+        with self.engine.begin() as conn:
+            conn.execute(delete(fetch_retries).where(fetch_retries.c.url == url))
+
+    def fail(self, source: str, section: str | None, url: str, ex: Exception) -> str:
+        """Queue a failed fetch for a later attempt or dead-letter it; returns "deferred", "retry" or "dead"."""
+        c = fetch_retries.c
+        now = time.time()
+        with self.engine.begin() as conn:
+            attempts = conn.execute(select(c.attempts).where(c.url == url)).scalar() or 0
+            if isinstance(ex, CircuitOpen):
+                outcome, next_at = "deferred", ex.retry_at
+            else:
+                attempts += 1
+                if not is_retryable(ex) or attempts >= self.max_attempts:
+                    conn.execute(delete(fetch_retries).where(c.url == url))
+                    self._dead_letter(conn, source, section, url, "fetch", attempts, describe(ex))
+                    with self._lock:
+                        self._queued.discard(url)
+                    return "dead"
+                outcome = "retry"
+                next_at = now + max(backoff_delay(attempts, self.backoff_base, self.backoff_cap),
+                                    retry_after(ex) or 0.0)
+            values = {"source": source, "section": section, "attempts": attempts,
+                      "next_attempt_at": next_at, "last_error": describe(ex), "updated_at": now}
+            stmt = self._insert(fetch_retries).values(url=url, created_at=now, **values)
+            conn.execute(stmt.on_conflict_do_update(index_elements=["url"], set_=values))
+        with self._lock:
+            self._queued.add(url)
+        return outcome
+
+    def dead_letter(self, source: str, section: str | None, url: str, reason: str,
+                    stage: str = "extract", attempts: int = 1) -> None:
+        """Record a failure that retrying won't fix (e.g. a page the extractor can't read)."""
+        with self.engine.begin() as conn:
+            self._dead_letter(conn, source, section, url, stage, attempts, reason)
+
+    def _dead_letter(self, conn, source: str, section: str | None, url: str, stage: str,
+                     attempts: int, reason: str) -> None:
+        conn.execute(insert(dead_letters).values(
+            url=url, source=source, section=section, stage=stage, attempts=attempts,
+            reason=reason, failed_at=time.time(),
+        ))
+        logging.warning("[%s] dead letter (%s) %s: %s", source, stage, url, reason)
+
+    def requeue(self, source: str | None = None, stage: str = "fetch") -> int:
+        """Move dead letters back into the retry queue, due now, with a fresh attempt count."""
+        d = dead_letters.c
+        filters = [d.stage == stage] + ([d.source == source] if source else [])
+        now = time.time()
+        with self.engine.begin() as conn:
+            rows = conn.execute(
+                select(d.url, d.source, d.section, func.max(d.reason))
+                .where(*filters).group_by(d.url, d.source, d.section)
+            ).all()
+            if rows:
+                stmt = self._insert(fetch_retries).on_conflict_do_nothing(index_elements=["url"])
+                conn.execute(stmt, [
+                    {"url": url, "source": src, "section": section, "attempts": 0,
+                     "next_attempt_at": now, "last_error": reason, "created_at": now, "updated_at": now}
+                    for url, src, section, reason in rows
+                ])
+                conn.execute(delete(dead_letters).where(*filters))
+        return len(rows)
+
+    def report(self) -> list[tuple[str, str, str, int]]:
+        """(source, stage, reason, count) for the dead letters, most common first."""
+        d = dead_letters.c
+        with self.engine.connect() as conn:
+            return [tuple(row) for row in conn.execute(
+                select(d.source, d.stage, d.reason, func.count().label("n"))
+                .group_by(d.source, d.stage, d.reason).order_by(func.count().desc())
+            )]
+
+
+# ——— MAIN ———————————————————————————————————————————————
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="retry queue database URL (default: the one in .env)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("report", help="dead letters grouped by source, stage and reason")
+    rq = sub.add_parser("requeue", help="put dead-lettered fetches back in the retry queue")
+    rq.add_argument("--source", help="only this source (adapter name, e.g. cbs)")
+    rq.add_argument("--stage", choices=["fetch", "extract", "write"], default="fetch")
+    args = parser.parse_args(argv)
+
+    queue = RetryQueue(get_engine(args.db))
+    if args.command == "report":
+        for source, stage, reason, n in queue.report():
+            print(f"{n:6d}  {source:10s} {stage:8s} {reason}")
+    else:
+        logging.info("Requeued %d URLs", queue.requeue(args.source, args.stage))
+
+
+if __name__ == "__main__":
+    main()
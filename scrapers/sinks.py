@@ -0,0 +1,293 @@
+"""Where article records go: CSV, Parquet or a database table.
+
+Every sink buffers records in a columnar `RecordBatch` and writes it as one
+block – `writerows` for CSV, one row group for Parquet, one executemany for a
+database – once `batch_size` records are waiting, once the oldest has waited
+`max_delay` seconds (checked on the next write), and on close. `sink_for`
+picks the sink from an output target:
+
+    articles.csv                      -> CsvSink
+    articles.parquet / out/parquet/   -> ParquetSink (needs pyarrow)
+    postgresql://... / sqlite:///...  -> DbSink (the `articles` table)
+
+Before a batch is written its publication dates are normalized to UTC in one
+vectorized pass; the ones that don't parse are stored empty and go to the
+`quarantine` if there is one, else to the log (see dates.py). Records from the
+extraction pipeline arrive normalized already (see pipeline.py) and pass
+through unchanged. With a `codec`, bodies are stored compressed with their
+source's dictionary (see bodies.py).
+"""
+from __future__ import annotations
+import csv
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+
+from bodies import BodyCodec
+from dates import DateQuarantine, normalize_column, quarantine_rejects
+from db import get_engine
+from records import ARTICLE_COLUMNS, ArticleRecord, RecordBatch
+
+
+class Sink:
+    """Thread-safe, batched writer of ArticleRecords."""
+
+    def __init__(self, batch_size: int = 100, max_delay: float = 5.0, codec: BodyCodec | None = None,
+                 quarantine: DateQuarantine | None = None):
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.codec = codec
+        self.quarantine = quarantine
+        self._batch = RecordBatch()
+        self._oldest: float | None = None
+        self._lock = threading.Lock()
+
+    def existing_urls(self) -> set[str]:
+        raise NotImplementedError
+
+    def open(self) -> "Sink":
+        return self
+
+    def write(self, record: ArticleRecord) -> None:
+        with self._lock:
+            self._batch.append(record)
+            if self.codec is not None:
+                bodies = self._batch.columns["article_full_text"]
+                bodies[-1] = self.codec.encode(record.source_name, bodies[-1])
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            if len(self._batch) >= self.batch_size or time.monotonic() - self._oldest >= self.max_delay:
+                self._flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        if len(self._batch):
+            self._normalize_dates(self._batch)
+            self._write_batch(self._batch)
+            self._batch.clear()
+        self._oldest = None
+
+    def _normalize_dates(self, batch: RecordBatch) -> None:
+        columns = batch.columns
+        dates = columns["publication_date"]
+        stored, bad = normalize_column(columns["source_name"], dates)
+        quarantine_rejects(self.quarantine, [(columns["article_url"][i], columns["source_name"][i], dates[i])
+                                             for i in bad])
+        dates[:] = stored
+
+    def _write_batch(self, batch: RecordBatch) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "Sink":
+        return self.open()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# ——— CSV —————————————————————————————————————————————————
+# the headers of the scrapers' CSVs from before ARTICLE_COLUMNS, by the column they hold
+LEGACY_HEADERS = {
+    "source_name": ("Source", "source"),
+    "article_url": ("Article URL", "URL", "url"),
+    "article_section": ("Article Section", "Section", "section"),
+    "publication_date": ("Publication Date", "pub_date"),
+    "headline_text": ("Headline (Text)", "Headline", "headline"),
+    "headline_word_count": ("Headline Length", "headline_len"),
+    "article_word_count": ("Article Word Count", "Word Count", "word_count"),
+    "num_internal_links": ("Number of Internal Links", "Internal Links", "internal_links"),
+    "num_external_links": ("Number of External Links", "External Links", "external_links"),
+    "article_full_text": ("Full Article Text", "Article Body Text", "Article Text", "article_text"),
+    "scrape_date": ("Scrape Date",),
+}
+_COLUMN_FOR = {old: column for column, names in LEGACY_HEADERS.items() for old in names}
+
+
+def _column_names(header: list[str]) -> list[str]:
+    """`header` with each legacy name replaced by the ARTICLE_COLUMNS name it stands for."""
+    return [_COLUMN_FOR.get(name, name) for name in header]
+
+
+class CsvSink(Sink):
+    """CSV of article records with an ARTICLE_COLUMNS header, appended to by default.
+
+    A file written before some columns existed, or by a scraper from before
+    ARTICLE_COLUMNS (see LEGACY_HEADERS), is rewritten to the full header
+    once, the first time it is appended to.
+    """
+
+    def __init__(self, path: str, append: bool = True, **kwargs):
+        super().__init__(**kwargs)
+        self.path = Path(path)
+        self.append = append
+        self._fp = None
+        self._writer = None
+
+    def existing_urls(self) -> set[str]:
+        if not self.append or not self.path.exists():
+            return set()
+        csv.field_size_limit(sys.maxsize)
+        with open(self.path, newline="", encoding="utf-8") as fp:
+            reader = csv.reader(fp)
+            header = next(reader, None)
+            if header is None:
+                return set()
+            header = _column_names(header)
+            if "article_url" not in header:
+                raise ValueError(f"{self.path} has no article URL column")
+            url = header.index("article_url")
+            return {row[url] for row in reader if len(row) > url}
+
+    def open(self) -> "CsvSink":
+        write_hdr = not self.append or not self.path.exists() or self.path.stat().st_size == 0
+        if not write_hdr:
+            with open(self.path, newline="", encoding="utf-8") as fp:
+                header = next(csv.reader(fp), None)
+            if header != ARTICLE_COLUMNS:
+                self._migrate(header or [])
+        self._fp = open(self.path, "a" if self.append else "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._fp)
+        if write_hdr:
+            self._writer.writerow(ARTICLE_COLUMNS)
+        return self
+
+    def _migrate(self, header: list[str]) -> None:
+        """Rewrite a CSV with legacy names or fewer ARTICLE_COLUMNS (an older release) to the full header."""
+        columns = _column_names(header)
+        if not set(columns) <= set(ARTICLE_COLUMNS) or len(set(columns)) < len(columns):
+            raise ValueError(f"{self.path} has different columns than the articles table; "
+                             f"write to a new file instead of appending to it")
+        renamed = [f"{old} -> {new}" for old, new in zip(header, columns) if old != new]
+        if renamed:
+            logging.warning("Renaming columns %s in %s before appending to it", ", ".join(renamed), self.path)
+        missing = [c for c in ARTICLE_COLUMNS if c not in columns]
+        if missing:
+            logging.warning("Adding columns %s to %s before appending to it", ", ".join(missing), self.path)
+        csv.field_size_limit(sys.maxsize)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(self.path, newline="", encoding="utf-8") as src, \
+                open(tmp, "w", newline="", encoding="utf-8") as dst:
+            reader = csv.reader(src)
+            next(reader)
+            writer = csv.writer(dst)
+            writer.writerow(ARTICLE_COLUMNS)
+            writer.writerows([row.get(c, "") for c in ARTICLE_COLUMNS]
+                             for row in (dict(zip(columns, values)) for values in reader))
+        os.replace(tmp, self.path)
+
+    def _write_batch(self, batch: RecordBatch) -> None:
+        self._writer.writerows(batch.rows())
+        self._fp.flush()
+
+    def close(self) -> None:
+        if self._fp:
+            super().close()
+            self._fp.close()
+            self._fp = None
+
+
+# ——— PARQUET —————————————————————————————————————————————
+class ParquetSink(Sink):
+    """A directory of Parquet files; each run adds its own part file, one row group per batch."""
+
+    def __init__(self, path: str, batch_size: int = 1000, **kwargs):
+        super().__init__(batch_size=batch_size, **kwargs)
+        self.path = Path(path)
+        self._writer = None
+
+    def _parts(self) -> list[Path]:
+        return sorted(self.path.glob("*.parquet")) if self.path.is_dir() else []
+
+    def existing_urls(self) -> set[str]:
+        import pyarrow.parquet as pq
+
+        urls: set[str] = set()
+        for part in self._parts():
+            urls.update(pq.read_table(part, columns=["article_url"]).column(0).to_pylist())
+        return urls
+
+    def _write_batch(self, batch: RecordBatch) -> None:
+        table = batch.to_arrow()
+        if self._writer is None:
+            import pyarrow.parquet as pq
+
+            self.path.mkdir(parents=True, exist_ok=True)
+            part = self.path / f"part-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.parquet"
+            self._writer = pq.ParquetWriter(part, table.schema, compression="zstd")
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        super().close()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+# ——— DATABASE ————————————————————————————————————————————
+PLACEHOLDERS = {"qmark": "?", "format": "%s", "pyformat": "%s"}
+
+
+class DbSink(Sink):
+    """Rows inserted into an existing table (the dashboard's `articles` by default).
+
+    Only the ARTICLE_COLUMNS the table actually has are written, and each
+    batch is one executemany over plain tuples. With `replace`, a record
+    replaces the row already stored for its URL instead of adding another
+    (the table has no key to upsert on, so it is a delete then an insert).
+    """
+
+    def __init__(self, engine: Engine, table: str = "articles", batch_size: int = 500,
+                 replace: bool = False, **kwargs):
+        super().__init__(batch_size=batch_size, **kwargs)
+        self.engine = engine
+        self.table = table
+        self.replace = replace
+        self.columns: list[str] = []
+        self._sql = ""
+
+    def existing_urls(self) -> set[str]:
+        with self.engine.connect() as conn:
+            return {url for (url,) in conn.exec_driver_sql(f"SELECT article_url FROM {self.table}")}
+
+    def open(self) -> "DbSink":
+        present = {c["name"] for c in inspect(self.engine).get_columns(self.table)}
+        self.columns = [c for c in ARTICLE_COLUMNS if c in present]
+        try:
+            mark = PLACEHOLDERS[self.engine.dialect.paramstyle]
+        except KeyError:
+            raise ValueError(f"unsupported DB-API paramstyle {self.engine.dialect.paramstyle!r}") from None
+        self._sql = (f"INSERT INTO {self.table} ({', '.join(self.columns)}) "
+                     f"VALUES ({', '.join([mark] * len(self.columns))})")
+        self._delete_sql = f"DELETE FROM {self.table} WHERE article_url = {mark}"
+        return self
+
+    def _write_batch(self, batch: RecordBatch) -> None:
+        rows = list(batch.rows(self.columns))
+        with self.engine.begin() as conn:
+            if self.replace:
+                # the last record for a URL wins, within the batch as in the table
+                url = self.columns.index("article_url")
+                rows = list({row[url]: row for row in rows}.values())
+                conn.exec_driver_sql(self._delete_sql, [(row[url],) for row in rows])
+            conn.exec_driver_sql(self._sql, rows)
+
+
+def sink_for(target: str, **kwargs) -> Sink:
+    """The sink for an --output value: a database URL, a Parquet path, or a CSV file."""
+    if "://" in target:
+        return DbSink(get_engine(target), **kwargs)
+    if target.rstrip("/").endswith("parquet"):
+        return ParquetSink(target, **kwargs)
+    return CsvSink(target, **kwargs)
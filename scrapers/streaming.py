@@ -0,0 +1,147 @@
+"""Streaming, size-capped response reading.
+
+`get` sends the request with `stream=True` and reads the (already
+decompressed) body in chunks, so a fetch never holds more than its cap in
+memory and never outlives its deadline:
+
+* a per-content-type byte cap – HTML pages get a few MB, sitemaps the 50 MB
+  the sitemap protocol allows – enforced up front from Content-Length and
+  again while reading (`ResponseTooLarge`);
+* a time-to-last-byte deadline on top of requests' per-read timeout, which
+  a server trickling bytes would otherwise never trip (`DownloadDeadlineExceeded`);
+* optionally, `until`: article containers to watch for. Each chunk is fed to
+  an incremental HTMLParser, and reading stops as soon as the first matching
+  container has closed; everything after it (comments, recirculation, footer
+  scripts) is never downloaded. `response.truncated` records whether that
+  happened. Only body-only crawls pass it (see `SourceAdapter.fetch_response`),
+  since the whole-page link counts need the rest of the page.
+
+The body ends up in `response.content` as usual, so callers don't change.
+"""
+from __future__ import annotations
+import codecs
+import time
+from html.parser import HTMLParser
+
+import requests
+
+CHUNK_SIZE = 64 * 1024
+MB = 1024 * 1024
+MAX_BYTES = {
+    "text/html": 5 * MB,
+    "application/xhtml+xml": 5 * MB,
+    "application/rss+xml": 10 * MB,
+    "application/atom+xml": 10 * MB,
+    "application/xml": 50 * MB,
+    "text/xml": 50 * MB,
+}
+DEFAULT_MAX_BYTES = 5 * MB
+DEFAULT_DEADLINE = 30.0
+
+# (tag, attribute, value) – value matches one whitespace-separated token of the
+# attribute (so class lists work); attribute None matches the bare tag
+Container = tuple[str, str | None, str | None]
+
+
+class ResponseTooLarge(requests.RequestException):
+    pass
+
+
+class DownloadDeadlineExceeded(requests.Timeout):
+    pass
+
+
+def byte_cap(content_type: str | None, caps: dict[str, int] | None = None) -> int:
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if caps and media_type in caps:
+        return caps[media_type]
+    return MAX_BYTES.get(media_type, DEFAULT_MAX_BYTES)
+
+
+class ContainerWatcher(HTMLParser):
+    """Incremental parser that notices when the first matching container closes."""
+
+    def __init__(self, containers: list[Container]):
+        super().__init__(convert_charrefs=False)
+        self.containers = containers
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._tag: str | None = None    # tag name of the container once it opened
+        self._depth = 0
+        self.closed = False
+
+    def _matches(self, tag: str, attrs: list[tuple[str, str | None]]) -> bool:
+        for want_tag, attr, value in self.containers:
+            if tag != want_tag:
+                continue
+            if attr is None:
+                return True
+            for name, got in attrs:
+                if name == attr and got and value in got.split():
+                    return True
+        return False
+
+    def handle_starttag(self, tag, attrs):
+        if self._tag is None:
+            if self._matches(tag, attrs):
+                self._tag, self._depth = tag, 1
+        elif tag == self._tag:
+            self._depth += 1
+
+    def handle_endtag(self, tag):
+        if tag == self._tag:
+            self._depth -= 1
+            if self._depth == 0:
+                self.closed = True
+
+    def feed_bytes(self, chunk: bytes) -> bool:
+        """Feed the next chunk; True once the container has closed."""
+        if not self.closed:
+            self.feed(self._decoder.decode(chunk))
+        return self.closed
+
+
+def read_body(res: requests.Response, caps: dict[str, int] | None = None,
+              deadline: float = DEFAULT_DEADLINE, until: list[Container] | None = None) -> bytes:
+    """Read a streamed response's body within its byte cap and deadline, up to the end of `until`."""
+    started = time.monotonic()
+    cap = byte_cap(res.headers.get("Content-Type"), caps)
+    declared = res.headers.get("Content-Length")
+    if declared and declared.isdigit() and int(declared) > cap:
+        res.close()
+        raise ResponseTooLarge(f"{res.url}: Content-Length {declared} over the {cap} byte cap")
+
+    watcher = ContainerWatcher(until) if until else None
+    chunks, size, truncated, complete = [], 0, False, False
+    try:
+        for chunk in res.iter_content(CHUNK_SIZE):
+            size += len(chunk)
+            if size > cap:
+                raise ResponseTooLarge(f"{res.url}: body over the {cap} byte cap")
+            if time.monotonic() - started > deadline:
+                raise DownloadDeadlineExceeded(f"{res.url}: body not complete after {deadline:.0f}s")
+            chunks.append(chunk)
+            if watcher is not None and watcher.feed_bytes(chunk):
+                truncated = True
+                break
+        else:
+            complete = True
+    finally:
+        # a fully read connection goes back to the pool; a cut-off or failed one is dropped
+        res._content_consumed = complete
+        res.close()
+    res._content = b"".join(chunks)
+    res._content_consumed = True
+    res.truncated = truncated
+    return res._content
+
+
+def get(session, url: str, timeout: float, headers: dict[str, str] | None = None,
+        caps: dict[str, int] | None = None, deadline: float = DEFAULT_DEADLINE,
+        until: list[Container] | None = None, **kwargs) -> requests.Response:
+    """`session.get` that streams the body through `read_body`.
+
+    `session` can be a Session or the requests module itself.
+    """
+    res = session.get(url, headers=headers, timeout=timeout, stream=True, **kwargs)
+    read_body(res, caps=caps, deadline=deadline, until=until)
+    return res
@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+"""Trending terms: per-day term counts kept up to date at ingest, with cached TF-IDF and burst scores.
+
+    python scrapers/orchestrator.py --terms ...                 # count terms while crawling
+    python scrapers/terms.py ingest --since 2025-06-01          # backfill from the articles table
+    python scrapers/terms.py rescore --since 2025-06-01         # recompute cached scores
+
+Bodies are tokenized once, in the extraction worker that already holds the
+text (`tokenize`). The parent adds each article's counts to sparse per-day
+tables, so the dashboard never reads a body:
+
+* `term_counts` – occurrences (tf) and articles containing the term (df) per
+  (day, source, section, term);
+* `term_days` – articles and tokens per (day, source, section), the denominators.
+
+Term ids come from a stable vocabulary, `term_vocab`. A term gets an id once
+PROMOTE_MIN_DF articles published within CANDIDATE_DAYS days of each other use
+it, and ids are never reused. Everything else (typos, names seen once) is
+counted in one of HASH_BUCKETS negative hashed ids, so the long tail costs a
+bounded number of rows. The index remembers the recent counts of those
+candidate terms across ingest batches, so a term that turns up one article at
+a time (a trickle from the poller) is still promoted, and on promotion its
+counts so far move from its bucket to its new id.
+
+After a batch is ingested, only the (day, source) pairs it touched, and
+the days of those sources within WINDOW_DAYS after them (whose history just
+changed), are rescored into `term_scores`. For each section, and for the whole source
+(section ""), it keeps the top TOP_TERMS terms by each of two scores:
+
+* tfidf – the term's share of the day's tokens, times log inverse document
+  frequency over every source's articles that day;
+* burst – a binomial z-score of today's document frequency against the same
+  source and section over the previous WINDOW_DAYS days, so rising terms
+  stand out and perennial ones ("president", "police") don't.
+
+Adding a day's articles therefore costs work proportional to that day: its
+own counts plus one bounded look-back window. Articles are counted once,
+by URL (`term_articles`).
+"""
+from __future__ import annotations
+import argparse
+import logging
+import math
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import date, timedelta
+
+from sqlalchemy import (Column, Float, Integer, MetaData, PrimaryKeyConstraint, String, Table, Text,
+                        delete, func, insert, select, text)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+
+from db import create_tables, get_engine
+from records import ArticleRecord
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s"
+)
+
+metadata = MetaData()
+
+term_vocab = Table(
+    "term_vocab", metadata,
+    Column("term_id", Integer, primary_key=True, autoincrement=True),
+    Column("term", Text, nullable=False, unique=True),
+    Column("added_at", Float, nullable=False),
+)
+
+term_counts = Table(
+    "term_counts", metadata,
+    Column("day", String(10), nullable=False),
+    Column("source", String(32), nullable=False),
+    Column("section", Text, nullable=False),
+    Column("term_id", Integer, nullable=False),
+    Column("tf", Integer, nullable=False),
+    Column("df", Integer, nullable=False),
+    PrimaryKeyConstraint("day", "source", "section", "term_id"),
+)
+
+term_days = Table(
+    "term_days", metadata,
+    Column("day", String(10), nullable=False),
+    Column("source", String(32), nullable=False),
+    Column("section", Text, nullable=False),
+    Column("docs", Integer, nullable=False),
+    Column("tokens", Integer, nullable=False),
+    PrimaryKeyConstraint("day", "source", "section"),
+)
+
+term_articles = Table(
+    "term_articles", metadata,
+    Column("article_url", Text, primary_key=True),
+    Column("day", String(10), nullable=False),
+)
+
+term_scores = Table(
+    "term_scores", metadata,
+    Column("day", String(10), nullable=False),
+    Column("source", String(32), nullable=False),
+    Column("section", Text, nullable=False),     # "" for the whole source
+    Column("term_id", Integer, nullable=False),
+    Column("tf", Integer, nullable=False),
+    Column("df", Integer, nullable=False),
+    Column("tfidf", Float, nullable=False),
+    Column("burst", Float, nullable=False),
+    PrimaryKeyConstraint("day", "source", "section", "term_id"),
+)
+
+ALL_SECTIONS = ""
+VOCAB_SIZE = 100_000
+HASH_BUCKETS = 1 << 16
+PROMOTE_MIN_DF = 3
+CANDIDATE_DAYS = 2
+WINDOW_DAYS = 28
+TOP_TERMS = 50
+FLUSH_ARTICLES = 500
+FLUSH_SECONDS = 60
+# pseudo-counts for the burst baseline, so a term never seen before scores high but finite
+PRIOR_DF, PRIOR_DOCS = 0.5, 1.0
+
+_TOKEN_RE = re.compile(r"[a-z][a-z'-]+[a-z]")
+_DAY_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+STOPWORDS = frozenset("""
+about above after again against all also and any are aren't around because been before being
+below between both but can can't could couldn't did didn't does doesn't doing don't down during
+each even ever every few for from further get gets got had hadn't has hasn't have haven't having
+her here hers herself him himself his how i'm i've into isn't it's its itself just last least
+let's like made make many may more most much must new not now off once one only other our ours
+ourselves out over own per said same say says she she's should shouldn't since some still such
+than that that's the their theirs them themselves then there there's these they they're this
+those though through too two under until upon very was wasn't way we're we've well were weren't
+what what's when where which while who who's whom why will with within without won't would
+wouldn't year years yet you you're your yours yourself yourselves
+""".split())
+
+
+# ——— TOKENIZING (pure functions, safe to run in worker processes) ——
+def tokenize(body: str) -> dict[str, int]:
+    """Term -> occurrences in one article body: lower-case words of 3+ letters, minus stopwords."""
+    counts: Counter = Counter()
+    for token in _TOKEN_RE.findall(body.lower().replace("’", "'")):
+        if token.endswith("'s"):
+            token = token[:-2]
+        if len(token) > 2 and token not in STOPWORDS:
+            counts[token] += 1
+    return dict(counts)
+
+
+def hashed_id(term: str) -> int:
+    """The shared bucket of a term outside the vocabulary (negative, so it can't clash with an id)."""
+    return -1 - zlib.crc32(term.encode("utf-8")) % HASH_BUCKETS
+
+
+def day_of(publication_date: str | None, scrape_date: str | None) -> str | None:
+    """YYYY-MM-DD the article is counted under: its publication date, else when it was scraped."""
+    for value in (publication_date, scrape_date):
+        if value and _DAY_RE.match(value):
+            return value[:10]
+    return None
+
+
+# ——— INDEX ———————————————————————————————————————————————
+class TermIndex:
+    """Accumulates per-article term counts and folds them into the day tables in batches."""
+
+    def __init__(self, engine: Engine, flush_every: int = FLUSH_ARTICLES, max_delay: float = FLUSH_SECONDS):
+        self.engine = engine
+        self.flush_every = flush_every
+        self.max_delay = max_delay
+        self._oldest = 0.0
+        self._insert = postgresql.insert if engine.dialect.name == "postgresql" else sqlite.insert
+        self._pending: list[tuple[str, str, str, str, dict[str, int]]] = []
+        # (day, source, section, term) -> [tf, df] of terms not in the vocabulary yet, for CANDIDATE_DAYS
+        self._candidates: dict[tuple[str, str, str, str], list[int]] = {}
+        self._newest = ""
+        self._lock = threading.Lock()
+        create_tables(engine, metadata, [term_vocab, term_counts, term_days, term_articles, term_scores])
+        with engine.connect() as conn:
+            self.vocab: dict[str, int] = dict(conn.execute(select(term_vocab.c.term, term_vocab.c.term_id)).all())
+
+    def term_id(self, term: str) -> int:
+        return self.vocab.get(term) or hashed_id(term)
+
+    def add(self, record: ArticleRecord, counts: dict[str, int]) -> None:
+        """Count one article's terms (from `tokenize`); ingested once `flush_every` are waiting
+        or the oldest has waited `max_delay` seconds, so a slow trickle still shows up."""
+        day = day_of(record.publication_date, record.scrape_date)
+        if day is None or not counts:
+            return
+        with self._lock:
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.append((record.article_url, day, record.source_name,
+                                  record.article_section or ALL_SECTIONS, counts))
+            if len(self._pending) < self.flush_every and time.monotonic() - self._oldest < self.max_delay:
+                return
+            batch, self._pending = self._pending, []
+        self.ingest(batch)
+
+    def flush(self) -> None:
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if batch:
+            self.ingest(batch)
+
+    # —— ingest ——
+    def ingest(self, batch: list[tuple[str, str, str, str, dict[str, int]]],
+               touched: set[tuple[str, str]] | None = None) -> int:
+        """Add (url, day, source, section, counts) articles not counted before; returns how many.
+
+        The scores that depend on the new counts are recomputed, unless a
+        `touched` set is passed: then its (day, source) pairs are collected
+        there for one `rescore_after` once the caller is done ingesting.
+        """
+        by_url = {item[0]: item for item in batch}
+        with self.engine.connect() as conn:
+            known = set(conn.execute(
+                select(term_articles.c.article_url).where(term_articles.c.article_url.in_(list(by_url)))
+            ).scalars())
+        fresh = [item for url, item in by_url.items() if url not in known]
+        if not fresh:
+            return 0
+        moved = self._promote(fresh)
+
+        # (day, source, section) -> [docs, tokens, tf by term id, df by term id]
+        groups: dict[tuple[str, str, str], list] = {}
+        for _, day, source, section, counts in fresh:
+            group = groups.setdefault((day, source, section), [0, 0, Counter(), Counter()])
+            ids: Counter = Counter()
+            for term, n in counts.items():
+                ids[self.term_id(term)] += n
+            group[0] += 1
+            group[1] += sum(counts.values())
+            group[2].update(ids)
+            group[3].update(ids.keys())
+        # (day, source, section, term id) -> [tf, df] to add, one row per key for the upsert
+        deltas: dict[tuple[str, str, str, int], list[int]] = {}
+        for (day, source, section), g in groups.items():
+            for tid, tf in g[2].items():
+                deltas[day, source, section, tid] = [tf, g[3][tid]]
+        for day, source, section, term, tf, df in moved:
+            for tid, sign in ((self.vocab[term], 1), (hashed_id(term), -1)):
+                delta = deltas.setdefault((day, source, section, tid), [0, 0])
+                delta[0] += sign * tf
+                delta[1] += sign * df
+
+        days_stmt = self._insert(term_days)
+        counts_stmt = self._insert(term_counts)
+        with self.engine.begin() as conn:
+            conn.execute(insert(term_articles), [{"article_url": url, "day": day} for url, day, *_ in fresh])
+            conn.execute(
+                days_stmt.on_conflict_do_update(
+                    index_elements=["day", "source", "section"],
+                    set_={"docs": term_days.c.docs + days_stmt.excluded.docs,
+                          "tokens": term_days.c.tokens + days_stmt.excluded.tokens}),
+                [{"day": day, "source": source, "section": section, "docs": g[0], "tokens": g[1]}
+                 for (day, source, section), g in groups.items()],
+            )
+            conn.execute(
+                counts_stmt.on_conflict_do_update(
+                    index_elements=["day", "source", "section", "term_id"],
+                    set_={"tf": term_counts.c.tf + counts_stmt.excluded.tf,
+                          "df": term_counts.c.df + counts_stmt.excluded.df}),
+                [{"day": day, "source": source, "section": section, "term_id": tid, "tf": tf, "df": df}
+                 for (day, source, section, tid), (tf, df) in deltas.items()],
+            )
+        pairs = {(day, source) for day, source, _ in groups} | {(day, source) for day, source, *_ in moved}
+        if touched is None:
+            self.rescore_after(pairs)
+        else:
+            touched.update(pairs)
+        logging.info("Counted terms of %d articles over %d days", len(fresh), len({k[0] for k in groups}))
+        return len(fresh)
+
+    def _promote(self, batch: list[tuple[str, str, str, str, dict[str, int]]]) -> list[tuple]:
+        """Give vocabulary ids to the unknown terms used by PROMOTE_MIN_DF+ recent articles.
+
+        Counts the batch's unknown terms together with the candidates remembered
+        from earlier batches. Returns the remembered (day, source, section, term,
+        tf, df) counts of the promoted terms: they went into hashed buckets, and
+        the caller moves them to the new ids.
+        """
+        batch_counts: dict[tuple[str, str, str, str], list[int]] = {}
+        for _, day, source, section, counts in batch:
+            for term, n in counts.items():
+                if term not in self.vocab:
+                    entry = batch_counts.setdefault((day, source, section, term), [0, 0])
+                    entry[0] += n
+                    entry[1] += 1
+        df: Counter = Counter()
+        for key, (_, n) in batch_counts.items():
+            df[key[3]] += n
+        for key, (_, n) in self._candidates.items():
+            if key[3] in df:
+                df[key[3]] += n
+        room = VOCAB_SIZE - len(self.vocab)
+        new = [term for term, n in df.most_common(max(room, 0)) if n >= PROMOTE_MIN_DF]
+        if new:
+            now = time.time()
+            with self.engine.begin() as conn:
+                conn.execute(self._insert(term_vocab).on_conflict_do_nothing(index_elements=["term"]),
+                             [{"term": term, "added_at": now} for term in new])
+                # another node may have added some of them first; use whatever ids won
+                self.vocab.update(conn.execute(
+                    select(term_vocab.c.term, term_vocab.c.term_id).where(term_vocab.c.term.in_(new))
+                ).all())
+
+        moved = [(*key, tf, n) for key, (tf, n) in self._candidates.items() if key[3] in self.vocab]
+        self._newest = max([self._newest] + [day for _, day, *_ in batch])
+        oldest = (date.fromisoformat(self._newest) - timedelta(days=CANDIDATE_DAYS)).isoformat()
+        candidates = {key: v for key, v in self._candidates.items()
+                      if key[3] not in self.vocab and key[0] >= oldest}
+        for key, (tf, n) in batch_counts.items():
+            if key[3] not in self.vocab and key[0] >= oldest:
+                entry = candidates.setdefault(key, [0, 0])
+                entry[0] += tf
+                entry[1] += n
+        self._candidates = candidates
+        return moved
+
+    # —— scores ——
+    def rescore_after(self, touched: set[tuple[str, str]]) -> None:
+        """Rescore each touched (day, source) and the following WINDOW_DAYS days of that source.
+
+        A day's burst scores use the days before it as history, so late
+        articles for day D change D+1..D+WINDOW_DAYS as well.
+        """
+        if not touched:
+            return
+        d = term_days.c
+        last = (date.fromisoformat(max(day for day, _ in touched)) + timedelta(days=WINDOW_DAYS)).isoformat()
+        with self.engine.connect() as conn:
+            counted = conn.execute(
+                select(d.day, d.source).distinct()
+                .where(d.source.in_({source for _, source in touched}),
+                       d.day > min(day for day, _ in touched), d.day <= last)
+            ).all()
+        stale = set(touched)
+        for day, source in touched:
+            end = (date.fromisoformat(day) + timedelta(days=WINDOW_DAYS)).isoformat()
+            stale.update((d2, s2) for d2, s2 in counted if s2 == source and day < d2 <= end)
+        for day, source in sorted(stale):
+            self.rescore(day, source)
+
+    def rescore(self, day: str, source: str) -> None:
+        """Recompute the cached top terms of one source on one day, per section and overall."""
+        c, d = term_counts.c, term_days.c
+        start = (date.fromisoformat(day) - timedelta(days=WINDOW_DAYS)).isoformat()
+        with self.engine.connect() as conn:
+            today = conn.execute(
+                select(c.section, c.term_id, c.tf, c.df).where(c.day == day, c.source == source)
+            ).all()
+            totals = {s: (docs, tokens) for s, docs, tokens in conn.execute(
+                select(d.section, d.docs, d.tokens).where(d.day == day, d.source == source))}
+            # idf over every source's articles of the day
+            corpus_docs = conn.execute(select(func.sum(d.docs)).where(d.day == day)).scalar() or 0
+            corpus_df = dict(conn.execute(
+                select(c.term_id, func.sum(c.df)).where(c.day == day).group_by(c.term_id)).all())
+            past_df = conn.execute(
+                select(c.section, c.term_id, func.sum(c.df))
+                .where(c.source == source, c.day >= start, c.day < day, c.term_id > 0)
+                .group_by(c.section, c.term_id)
+            ).all()
+            past_docs = dict(conn.execute(
+                select(d.section, func.sum(d.docs))
+                .where(d.source == source, d.day >= start, d.day < day).group_by(d.section)).all())
+
+        # section -> term id -> [tf, df]; the whole source is one more "section"
+        current: dict[str, dict[int, list[int]]] = {}
+        for section, tid, tf, df in today:
+            for key in {section, ALL_SECTIONS}:
+                entry = current.setdefault(key, {}).setdefault(tid, [0, 0])
+                entry[0] += tf
+                entry[1] += df
+        history: dict[str, Counter] = {}
+        for section, tid, df in past_df:
+            for key in {section, ALL_SECTIONS}:
+                history.setdefault(key, Counter())[tid] += df
+        totals[ALL_SECTIONS] = tuple(sum(v) for v in zip(*totals.values())) if totals else (0, 0)
+        past_docs[ALL_SECTIONS] = sum(past_docs.values())
+
+        rows = []
+        for section, terms in current.items():
+            docs, tokens = totals.get(section, (0, 0))
+            if not docs or not tokens:
+                continue
+            seen_docs = past_docs.get(section, 0)
+            seen_df = history.get(section, Counter())
+            scored = []
+            for tid, (tf, df) in terms.items():
+                if tid < 0:  # hashed buckets mix unrelated terms
+                    continue
+                tfidf = tf / tokens * math.log((1 + corpus_docs) / (1 + corpus_df.get(tid, 0)))
+                p = min((seen_df[tid] + PRIOR_DF) / (seen_docs + PRIOR_DOCS), 0.99)
+                burst = (df - docs * p) / math.sqrt(docs * p * (1 - p))
+                scored.append((tid, tf, df, tfidf, burst))
+            keep = {s[0]: s for s in sorted(scored, key=lambda s: -s[4])[:TOP_TERMS]}
+            keep.update((s[0], s) for s in sorted(scored, key=lambda s: -s[3])[:TOP_TERMS])
+            rows.extend({"day": day, "source": source, "section": section, "term_id": tid,
+                         "tf": tf, "df": df, "tfidf": tfidf, "burst": burst}
+                        for tid, tf, df, tfidf, burst in keep.values())
+
+        with self.engine.begin() as conn:
+            conn.execute(delete(term_scores).where(term_scores.c.day == day, term_scores.c.source == source))
+            if rows:
+                conn.execute(insert(term_scores), rows)
+
+
+# ——— MAIN ———————————————————————————————————————————————
+def backfill(index: TermIndex, articles: Engine, since: str | None, until: str | None) -> int:
+    """Count the terms of stored articles published in [since, until] (ISO dates)."""
+    from bodies import BodyCodec
+
+    codec = BodyCodec(articles)
+    where, params = ["article_full_text IS NOT NULL", "article_url > :after"], {"limit": index.flush_every}
+    if since:
+        where.append("publication_date >= :since")
+        params["since"] = since
+    if until:
+        where.append("publication_date < :until")
+        params["until"] = (date.fromisoformat(until) + timedelta(days=1)).isoformat()
+    # a page at a time, keyed on article_url: the term tables are usually in the
+    # same database, and SQLite won't commit an ingest under an open cursor
+    query = text(
+        "SELECT article_url, source_name, article_section, publication_date, scrape_date, article_full_text "
+        f"FROM articles WHERE {' AND '.join(where)} ORDER BY article_url LIMIT :limit"
+    )
+    added = 0
+    # scored once at the end, so each day sees the whole backfill in its history
+    touched: set[tuple[str, str]] = set()
+    last = ""
+    while True:
+        with articles.connect() as conn:
+            rows = conn.execute(query, {**params, "after": last}).all()
+        if not rows:
+            break
+        batch = []
+        for url, source, section, published, scraped, body in rows:
+            day = day_of(published, scraped)
+            counts = tokenize(codec.decode(body) or "")
+            if day and counts:
+                batch.append((url, day, source, section or ALL_SECTIONS, counts))
+        if batch:
+            added += index.ingest(batch, touched)
+        last = rows[-1].article_url
+    index.rescore_after(touched)
+    return added
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="term tables database URL (default: the one in .env)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ing = sub.add_parser("ingest", help="count the terms of articles already in the articles table")
+    ing.add_argument("--articles-db", help="database holding the articles table (default: --db)")
+    rs = sub.add_parser("rescore", help="recompute the cached scores")
+    for p in (ing, rs):
+        p.add_argument("--since", type=date.fromisoformat, help="first publication day (YYYY-MM-DD)")
+        p.add_argument("--until", type=date.fromisoformat, help="last publication day (YYYY-MM-DD)")
+    args = parser.parse_args(argv)
+    since = args.since.isoformat() if args.since else None
+    until = args.until.isoformat() if args.until else None
+
+    engine = get_engine(args.db)
+    index = TermIndex(engine)
+    if args.command == "ingest":
+        articles = get_engine(args.articles_db) if args.articles_db else engine
+        logging.info("Counted %d new articles", backfill(index, articles, since, until))
+        return
+
+    d = term_days.c
+    query = select(d.day, d.source).distinct()
+    if since:
+        query = query.where(d.day >= since)
+    if until:
+        query = query.where(d.day <= until)
+    with engine.connect() as conn:
+        pairs = conn.execute(query.order_by(d.day)).all()
+    for day, source in pairs:
+        index.rescore(day, source)
+    logging.info("Rescored %d source-days", len(pairs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import requests
+from bs4 import BeautifulSoup
+from datetime import datetime, timezone
+
+import profiling
+import streaming
+from adapters import SourceAdapter
+from links import count_links
+from metadata import soup_metadata
+from records import ArticleRecord
+from sinks import CsvSink
+
+# Script version of scraper.ipynb so The Tab can run alongside the other sources.
+
+SOURCE = "The Tab"
+BASE_URL = "https://thetab.com"
+SECTIONS = ["news", "entertainment", "trends", "gaming", "politics", "opinion", "guides"]
+CSV_PATH = "the_tab_articles.csv"
+
+
+def get_article_links(section, session=requests):
+    section_url = f"{BASE_URL}/{section}"
+    res = streaming.get(session, section_url, timeout=10)
+    soup = BeautifulSoup(res.content, "html.parser")
+
+    links = []
+    for link in soup.select("a[href*='/202']"):  # Find all 202x article links
+        article_url = link["href"]
+        if not article_url.startswith("http"):
+            article_url = BASE_URL + article_url
+        links.append(article_url)
+    return links
+
+
+def parse_article_html(section, article_url, content):
+    return parse_article_soup(section, article_url, BeautifulSoup(content, "html.parser"))
+
+
+def parse_article_soup(section, article_url, art_soup):
+    meta = soup_metadata(art_soup)
+    headline_tag = art_soup.find("h1")
+    headline = headline_tag.get_text(strip=True) if headline_tag else meta.headline
+    if not headline:
+        return None
+
+    paragraphs = art_soup.find_all("p")
+    article_text = " ".join(p.get_text(strip=True) for p in paragraphs)
+    word_count = len(article_text.split())
+
+    # Count internal and external links, page-wide and inside the article paragraphs
+    links = count_links(art_soup, article_url, body=paragraphs)
+
+    pub_date = meta.published
+
+    return ArticleRecord(
+        source_name=SOURCE,
+        article_url=article_url,
+        article_section=section,
+        publication_date=pub_date,
+        headline_text=headline,
+        headline_word_count=len(headline.split()),
+        article_word_count=word_count,
+        num_internal_links=links.internal,
+        num_external_links=links.external,
+        num_internal_links_within_body=links.internal_within_body,
+        num_external_links_within_body=links.external_within_body,
+        article_full_text=article_text,
+        scrape_date=datetime.now(timezone.utc).isoformat(),
+    )
+
+
+class TheTabAdapter(SourceAdapter):
+    name = "thetab"
+    source_name = SOURCE
+    sections = {section: f"{BASE_URL}/{section}" for section in SECTIONS}
+    max_concurrency = 4
+
+    def discover(self, session):
+        links = set()
+        for section, url in self.sections.items():
+            try:
+                links.update(self.discover_section(session, section, url))
+            except Exception as e:
+                print(f"Failed to fetch section {url} | {e}")
+        return links
+
+    def discover_section(self, session, section, url):
+        return {(section, u) for u in get_article_links(section, session=session)}
+
+    def extract_soup(self, section, url, soup):
+        return parse_article_soup(section, url, soup)
+
+
+def main():
+    # Skip articles already saved by a previous run
+    sink = CsvSink(CSV_PATH)
+    seen_urls = sink.existing_urls()
+    sink.open()
+    added = 0
+
+    for section in SECTIONS:
+        try:
+            print(f"Scraping section: {BASE_URL}/{section}")
+            with profiling.stage("discover", section):
+                article_urls = get_article_links(section)
+            for article_url in article_urls:
+                if article_url in seen_urls:
+                    continue
+                try:
+                    with profiling.stage("article", article_url):
+                        art_res = streaming.get(requests, article_url, timeout=10)
+                        article = parse_article_html(section, article_url, art_res.content)
+                    if article:
+                        sink.write(article)
+                        seen_urls.add(article_url)
+                        added += 1
+                except Exception as e:
+                    print(f"Error parsing article: {article_url} | {e}")
+        except Exception as e:
+            print(f"Failed to fetch section {BASE_URL}/{section} | {e}")
+
+    sink.close()
+    print(f"Added {added} new articles. Total saved: {len(seen_urls)}.")
+
+
+if __name__ == "__main__":
+    profiling.start_from_argv("thetab")
+    main()
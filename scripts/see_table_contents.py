@@ -2,8 +2,15 @@ import psycopg2
 from psycopg2 import Error
 import csv
 import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
 
+# stored bodies may be compressed; the export decodes them with the scrapers' codec
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scrapers"))
+from bodies import BodyCodec
+from db import get_engine
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -14,7 +21,7 @@ DB_PASSWORD = os.getenv("DB_PASSWORD", "")
 DB_PORT = os.getenv("DB_PORT", "5432")
 
 def export_table_to_csv():
-    """Exports the entire 'articles' table to a CSV file."""
+    """Exports the entire 'articles' table to a CSV file, with article bodies decompressed."""
     connection = None
     try:
         connection = psycopg2.connect(
@@ -30,6 +37,10 @@ def export_table_to_csv():
         cursor.execute(select_table_sql)
         results = cursor.fetchall()
         column_names = [desc[0] for desc in cursor.description]
+        if "article_full_text" in column_names:
+            body = column_names.index("article_full_text")
+            codec = BodyCodec(get_engine())
+            results = [row[:body] + (codec.decode(row[body]),) + row[body + 1:] for row in results]
 
         with open("articles_table_export.csv", "w", newline='', encoding='utf-8') as csvfile:
             writer = csv.writer(csvfile)
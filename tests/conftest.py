@@ -0,0 +1,47 @@
+"""Shared fixtures. The scrapers and the dashboard are run as scripts from their
+own directories, so their modules are imported the same way here; the recorded
+pages in benchmarks/fixtures double as test pages (see benchmarks/corpus.py)."""
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+
+from site_pages import Site
+
+ROOT = Path(__file__).resolve().parent.parent
+for directory in ("scrapers", "article-visualization", "benchmarks"):
+    sys.path.insert(0, str(ROOT / directory))
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """A file-backed SQLite database, so worker threads share it like a real one."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def site():
+    """A local site to crawl (see site_pages.py)."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = served.pages.get(self.path)
+            self.send_response(200 if body is not None else 404)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body or b"")))
+            self.end_headers()
+            self.wfile.write(body or b"")
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    served = Site(httpd)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield served
+    httpd.shutdown()
+    httpd.server_close()
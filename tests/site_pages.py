@@ -0,0 +1,31 @@
+"""Pages for the crawl tests, and the local site that serves them (the `site` fixture)."""
+from http.server import ThreadingHTTPServer
+
+
+def tab_article(headline: str, text: str = "", published: str = "2025-06-16T14:32:22+00:00") -> bytes:
+    """A small page in The Tab's markup: everything its extractor reads."""
+    text = text or f"{headline} was the talk of campus all week. " * 20
+    return f"""<html><head>
+<meta property="article:published_time" content="{published}">
+<title>{headline}</title>
+</head><body>
+<h1>{headline}</h1>
+<p>{text}</p>
+<p>Read more on <a href="/uk/news">the news page</a> or <a href="https://www.bbc.co.uk/news">the BBC</a>.</p>
+</body></html>""".encode()
+
+
+class Site:
+    """`pages` (path -> body) served from localhost; any other path is a 404."""
+
+    def __init__(self, httpd: ThreadingHTTPServer):
+        self.httpd = httpd
+        self.pages: dict[str, bytes] = {}
+
+    def add(self, path: str, body: bytes) -> str:
+        self.pages[path] = body
+        return self.url(path)
+
+    def url(self, path: str) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{path}"
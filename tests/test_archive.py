@@ -0,0 +1,79 @@
+import csv
+
+import pytest
+
+from archive import HtmlArchive, _timestamp, decode_record, encode_record, reextract
+from site_pages import tab_article
+
+
+def test_record_round_trip_keeps_only_cache_headers():
+    headers = {"Content-Type": "text/html", "ETag": '"v1"', "Set-Cookie": "x=1"}
+    rec = decode_record(encode_record("https://a.test/1", "abc", "news", 1750000000.25, 200, headers, b"<p>hi</p>"))
+    assert (rec.url, rec.source, rec.section, rec.status, rec.content) == (
+        "https://a.test/1", "abc", "news", 200, b"<p>hi</p>")
+    assert rec.fetched_at == pytest.approx(1750000000.25)
+    assert rec.headers == {"Content-Type": "text/html", "ETag": '"v1"'}
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = HtmlArchive(str(tmp_path / "raw"), segment_bytes=200)
+    yield archive
+    archive.close()
+
+
+def test_get_returns_the_latest_capture_or_one_at_a_time(archive):
+    for at, body in ((100.0, b"first"), (200.0, b"second"), (300.0, b"third")):
+        archive.append("https://a.test/1", "abc", "news", 200, {}, body, fetched_at=at)
+    assert archive.get("https://a.test/1").content == b"third"
+    assert archive.get("https://a.test/1", at=250).content == b"second"
+    assert archive.get("https://a.test/1", at=50) is None
+    assert archive.get("https://a.test/other") is None
+
+
+def test_small_segments_roll_over_and_stay_readable(archive):
+    for i in range(5):
+        archive.append(f"https://a.test/{i}", "abc", None, 200, {}, b"x" * 300, fetched_at=100.0 + i)
+    assert len(list(archive.dir.glob("segment-*.warc.zst"))) > 1
+    assert [r.url for r in archive.iter_records()] == [f"https://a.test/{i}" for i in range(5)]
+
+
+def test_entries_filter_by_source_time_and_latest(archive):
+    archive.append("https://a.test/1", "abc", None, 200, {}, b"old", fetched_at=100.0)
+    archive.append("https://a.test/1", "abc", None, 200, {}, b"new", fetched_at=200.0)
+    archive.append("https://c.test/1", "cbs", None, 200, {}, b"cbs", fetched_at=150.0)
+    assert [r.content for r in archive.iter_records(sources=["abc"])] == [b"new"]
+    assert len(archive.entries(latest_only=False)) == 3
+    assert [r.content for r in archive.iter_records(since=120, until=180)] == [b"cbs"]
+
+
+def test_reopened_archive_appends_after_existing_records(tmp_path):
+    first = HtmlArchive(str(tmp_path / "raw"))
+    first.append("https://a.test/1", "abc", None, 200, {}, b"one", fetched_at=1.0)
+    first.close()
+    second = HtmlArchive(str(tmp_path / "raw"))
+    second.append("https://a.test/2", "abc", None, 200, {}, b"two", fetched_at=2.0)
+    second.close()
+    assert [r.content for r in second.iter_records()] == [b"one", b"two"]
+
+
+def test_since_and_until_read_an_offset_and_default_to_utc():
+    assert _timestamp("2025-06-01T14:00:00") == _timestamp("2025-06-01T14:00:00+00:00") == 1748786400
+    assert _timestamp("2025-06-01T10:00:00-04:00") == 1748786400
+
+
+def test_reextract_runs_the_extractors_over_archived_pages(archive, tmp_path):
+    urls = [f"https://thetab.com/uk/2025/06/story-{i}" for i in range(3)]
+    for url in urls:
+        archive.append(url, "thetab", "news", 200, {"Content-Type": "text/html"}, tab_article("An early draft"))
+        archive.append(url, "thetab", "news", 200, {"Content-Type": "text/html"}, tab_article(f"Story {url[-1]}"))
+    archive.append("https://thetab.com/uk/gone", "thetab", "news", 404, {}, b"")
+
+    out = tmp_path / "reextracted.csv"
+    summary = reextract(archive, str(out), processes=1)
+    # only the latest capture of each URL, and not the 404
+    assert summary["pages"] == summary["scraped"] == len(urls)
+    with open(out, newline="", encoding="utf-8") as fp:
+        rows = list(csv.DictReader(fp))
+    assert sorted(row["article_url"] for row in rows) == urls
+    assert sorted(row["headline_text"] for row in rows) == ["Story 0", "Story 1", "Story 2"]
@@ -0,0 +1,58 @@
+import pytest
+from sqlalchemy import text
+
+from data_prep import article_page_query
+
+
+@pytest.fixture
+def articles(engine):
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE articles (source_name TEXT, article_url TEXT, article_section TEXT, "
+            "publication_date TEXT, headline_text TEXT, headline_word_count INTEGER, "
+            "article_word_count INTEGER, num_internal_links INTEGER, num_external_links INTEGER)"
+        ))
+        rows = [
+            # two articles share a timestamp, so the URL has to break the tie
+            ("ABC News", f"https://abc.test/{i}", "news", f"2025-06-{10 + i // 2:02d}T08:00:00+00:00")
+            for i in range(7)
+        ] + [
+            ("CBS News", "https://cbs.test/1", "news", "2025-06-11T08:00:00+00:00"),
+            ("ABC News", "https://abc.test/old", "news", "2025-05-01T08:00:00+00:00"),
+        ]
+        conn.execute(text(
+            "INSERT INTO articles VALUES (:source, :url, :section, :date, 'headline', 1, 100, 2, 3)"
+        ), [dict(zip(("source", "url", "section", "date"), row)) for row in rows])
+    return engine
+
+
+def fetch(engine, cursor=None, page_size=3):
+    query, params = article_page_query(
+        ["ABC News"], "2025-06-01T00:00:00+00:00", "2025-07-01T00:00:00+00:00", [], cursor, page_size,
+    )
+    with engine.connect() as conn:
+        return conn.execute(query, params).all()
+
+
+def test_pages_cover_every_row_once_newest_first(articles):
+    seen, cursor = [], None
+    while True:
+        rows = fetch(articles, cursor)
+        page = rows[:3]
+        seen.extend(row.url for row in page)
+        if len(rows) <= 3:
+            break
+        cursor = (page[-1].pub_date, page[-1].url)
+    assert seen == [f"https://abc.test/{i}" for i in (6, 5, 4, 3, 2, 1, 0)]
+
+
+def test_one_extra_row_signals_an_older_page(articles):
+    assert len(fetch(articles, page_size=3)) == 4
+    assert len(fetch(articles, page_size=7)) == 7
+
+
+def test_keywords_are_escaped_for_like():
+    _, params = article_page_query(["ABC News"], "a", "b", ["50%", "a_b"], None, 10)
+    assert params["kw0"] == "%50\\%%"
+    assert params["kw1"] == "%a\\_b%"
+    assert params["limit"] == 11
@@ -0,0 +1,48 @@
+import json
+import urllib.request
+
+import pytest
+
+from corpus import FIXTURES, StandInServer, load_manifest, pages
+
+
+def test_manifest_lists_existing_pages_for_every_source():
+    manifest = load_manifest()
+    assert all((FIXTURES / entry["path"]).is_file() for entry in manifest)
+    assert {entry["source"] for entry in manifest if entry["kind"] == "article"} == {
+        "abc", "cbs", "buzzfeed", "thetab"}
+
+
+def test_standin_serves_the_recorded_bytes():
+    entry, raw = pages("abc")[0]
+    with StandInServer() as standin:
+        with urllib.request.urlopen(standin.url_for(entry)) as res:
+            assert res.read() == raw
+
+
+@pytest.fixture(scope="module")
+def harness():
+    pytest.importorskip("playwright")  # the suite imports every extractor, CBS's included
+    import run
+    return run
+
+
+def test_run_benchmark_reruns_setup_outside_the_timing(harness):
+    states, calls = [], []
+    timings = harness.run_benchmark(lambda: states.append(len(states)) or states[-1], calls.append,
+                                    number=2, repeat=3)
+    assert len(timings) == 3 and all(t >= 0 for t in timings)
+    # a fresh state per repeat, shared by that repeat's calls
+    assert calls == [0, 0, 1, 1, 2, 2]
+
+
+def test_compare_flags_only_slowdowns_past_the_threshold(harness, tmp_path):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({
+        "meta": {"git_sha": "abc1234", "timestamp": "2025-06-01T00:00:00"},
+        "results": {"fast": {"median": 1.0}, "slow": {"median": 1.0}},
+    }))
+    current = {"results": {"fast": {"median": 1.05}, "slow": {"median": 1.5}, "new": {"median": 9.0}}}
+    assert not harness.compare(current, str(baseline), threshold=1.2)
+    current["results"]["slow"]["median"] = 1.1
+    assert harness.compare(current, str(baseline), threshold=1.2)
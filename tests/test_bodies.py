@@ -0,0 +1,126 @@
+import csv
+import random
+
+import pytest
+from sqlalchemy import inspect, text
+
+from bodies import MIN_SAMPLES, PREFIX, BodyCodec, compress_csv, compress_table, csv_bodies, is_encoded
+
+WORDS = ("council budget school road county vote week mayor plan said told residents state federal "
+         "storm coast police report court judge ruling market prices energy health hospital").split()
+BYLINE = "By The Associated Press. Copyright 2025 The Associated Press. All rights reserved. "
+BLURB = " Sign up for our newsletter to get the day's top stories delivered to your inbox every morning."
+
+
+def bodies(n, seed=0):
+    rng = random.Random(seed)
+    return [BYLINE + " ".join(rng.choice(WORDS) for _ in range(rng.randint(150, 300))) + BLURB
+            for _ in range(n)]
+
+
+@pytest.fixture
+def codec(engine):
+    return BodyCodec(engine)
+
+
+def test_is_encoded():
+    assert is_encoded("zstd:1:abc")
+    assert not is_encoded("Plain body") and not is_encoded("") and not is_encoded(None)
+
+
+def test_without_dictionaries_bodies_pass_through(codec, engine):
+    assert codec.encode("ABC News", "Plain body") == "Plain body"
+    assert codec.decode("Plain body") == "Plain body" and codec.decode(None) is None
+    # readers don't create the table
+    assert not inspect(engine).has_table("body_dictionaries")
+
+
+def test_training_needs_enough_samples(codec):
+    with pytest.raises(ValueError, match="need at least"):
+        codec.train("ABC News", bodies(MIN_SAMPLES - 1) + ["", None])
+
+
+def test_round_trip_with_a_trained_dictionary(codec):
+    dict_id = codec.train("ABC News", bodies(200))
+    body = bodies(1, seed=99)[0]
+    encoded = codec.encode("ABC News", body)
+    assert encoded.startswith(f"{PREFIX}{dict_id}:")
+    assert len(encoded) < len(body) / 2
+    assert codec.decode(encoded) == body
+    # already encoded, from another source, or too short to shrink: left alone
+    assert codec.encode("ABC News", encoded) == encoded
+    assert codec.encode("CBS News", body) == body
+    assert codec.encode("ABC News", "Short.") == "Short."
+
+
+def test_old_versions_stay_readable(codec, engine):
+    first = codec.train("ABC News", bodies(200))
+    old = codec.encode("ABC News", bodies(1, seed=99)[0])
+    second = codec.train("ABC News", bodies(200, seed=1))
+    assert second != first and codec.dictionary_for("ABC News") == second
+    assert codec.encode("ABC News", bodies(1, seed=99)[0]).startswith(f"{PREFIX}{second}:")
+    assert codec.decode(old) == bodies(1, seed=99)[0]
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT version FROM body_dictionaries ORDER BY id")).scalars().all() == [1, 2]
+
+
+def test_a_dictionary_trained_elsewhere_is_loaded_on_demand(engine):
+    reader = BodyCodec(engine)
+    assert reader.dictionary_for("ABC News") is None
+    writer = BodyCodec(engine)
+    writer.train("ABC News", bodies(200))
+    encoded = writer.encode("ABC News", bodies(1, seed=99)[0])
+    assert reader.decode(encoded) == bodies(1, seed=99)[0]
+    with pytest.raises(KeyError, match="999"):
+        reader.decode(f"{PREFIX}999:abc")
+
+
+def test_compress_csv_in_place(codec, tmp_path):
+    codec.train("ABC News", bodies(200))
+    path = tmp_path / "old.csv"
+    originals = bodies(5, seed=7)
+    with open(path, "w", newline="", encoding="utf-8") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(["Source", "Headline", "Full Article Text"])
+        writer.writerows([["ABC News", f"Headline {i}", body] for i, body in enumerate(originals)])
+        writer.writerow(["CBS News", "No dictionary", "Left as it is"])
+
+    before, after = compress_csv(codec, str(path))
+    assert after < before / 2
+    stored = list(csv_bodies(str(path)))
+    assert all(is_encoded(body) for _, body in stored[:5])
+    assert [codec.decode(body) for _, body in stored] == originals + ["Left as it is"]
+    # a second pass re-encodes to the same result
+    assert compress_csv(codec, str(path))[1] == after
+
+
+def test_compress_table(codec, engine):
+    codec.train("ABC News", bodies(200))
+    originals = bodies(3, seed=7)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE articles (source_name TEXT, article_url TEXT, article_full_text TEXT)"))
+        conn.execute(text("INSERT INTO articles VALUES ('ABC News', :url, :body)"),
+                     [{"url": f"https://abcnews.go.com/{i}", "body": b} for i, b in enumerate(originals)])
+    before, after = compress_table(codec, engine, batch_size=2)
+    assert after < before / 2
+    with engine.connect() as conn:
+        stored = conn.execute(text("SELECT article_full_text FROM articles ORDER BY article_url")).scalars().all()
+    assert [codec.decode(body) for body in stored] == originals
+
+
+def test_compress_table_keeps_each_duplicate_rows_body(codec, engine):
+    codec.train("ABC News", bodies(200))
+    first, second, other = bodies(3, seed=7)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE articles (source_name TEXT, article_url TEXT, article_full_text TEXT)"))
+        # the same URL scraped twice, before and after an edit, around a second URL
+        conn.execute(text("INSERT INTO articles VALUES ('ABC News', :url, :body)"), [
+            {"url": "https://abcnews.go.com/1", "body": first},
+            {"url": "https://abcnews.go.com/2", "body": other},
+            {"url": "https://abcnews.go.com/1", "body": second},
+        ])
+    compress_table(codec, engine, batch_size=1)
+    with engine.connect() as conn:
+        stored = conn.execute(text("SELECT article_full_text FROM articles ORDER BY rowid")).scalars().all()
+    assert all(is_encoded(body) for body in stored)
+    assert [codec.decode(body) for body in stored] == [first, other, second]
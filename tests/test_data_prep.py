@@ -0,0 +1,30 @@
+import pandas as pd
+
+from data_prep import parse_stored_dates, prepare_articles
+
+
+def articles(**overrides):
+    frame = pd.DataFrame({
+        "source": ["ABC News", None],
+        "pub_date": ["2025-06-02T10:00:00+00:00", "2025-06-03T23:59:59+00:00"],
+        "headline_len": ["7", "x"],
+        "word_count": [300, 500],
+        "internal_links": [4, None],
+        "external_links": [1, 2],
+    })
+    return frame.assign(**overrides)
+
+
+def test_prepare_articles_types_the_columns_the_charts_use():
+    df = prepare_articles(articles())
+    assert list(df["source"]) == ["ABC News", "Unknown"]
+    assert str(df["pub_date"].dt.tz) == "UTC"
+    assert df["pub_date"].iloc[1] == pd.Timestamp("2025-06-03 23:59:59", tz="UTC")
+    assert df["headline_len"].iloc[0] == 7 and pd.isna(df["headline_len"].iloc[1])
+    assert list(df["num_links"]) == [5, 2]
+    assert df.attrs["excluded_dates"] == 0
+
+
+def test_parse_stored_dates_accepts_datetime_columns():
+    naive = pd.Series(pd.to_datetime(["2025-06-02 10:00:00"]))
+    assert str(parse_stored_dates(naive).dt.tz) == "UTC"
@@ -0,0 +1,164 @@
+import csv
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from data_prep import parse_stored_dates, prepare_articles
+from dates import DateQuarantine, normalize_column, normalize_csv, normalize_dates, normalize_table
+from records import ARTICLE_COLUMNS, ArticleRecord
+from sinks import CsvSink
+
+
+@pytest.mark.parametrize("source, raw, stored", [
+    ("ABC News", "2025-06-01T14:00:00Z", "2025-06-01T14:00:00+00:00"),
+    ("BuzzFeed", "2025-06-19T23:01:02.000Z", "2025-06-19T23:01:02+00:00"),
+    ("CBS News", "2025-06-01T10:00:00-0400", "2025-06-01T14:00:00+00:00"),
+    ("CBS News", "2025-06-01T10:00:00-04:00", "2025-06-01T14:00:00+00:00"),
+    ("The Tab", "2025-06-01 15:00:00+01:00", "2025-06-01T14:00:00+00:00"),
+    # naive times are in the source's own timezone
+    ("ABC News", "2025-06-01T10:00:00", "2025-06-01T14:00:00+00:00"),
+    ("The Tab", "2025-01-15T09:30:00", "2025-01-15T09:30:00+00:00"),
+    ("Somewhere else", "2025-06-01T10:00:00", "2025-06-01T10:00:00+00:00"),
+    # bylines
+    ("ABC News", "June 1, 2025, 10:05 PM", "2025-06-02T02:05:00+00:00"),
+    ("CBS News", "Updated on: June 1, 2025 / 10:05 PM EDT", "2025-06-02T02:05:00+00:00"),
+    ("CBS News", "June 1, 2025", "2025-06-01T04:00:00+00:00"),
+    ("The Tab", "1 June 2025", "2025-05-31T23:00:00+00:00"),
+    # RFC 2822, as in feeds, with a numeric offset or a zone name
+    ("The Tab", "Sun, 01 Jun 2025 14:00:00 +0000", "2025-06-01T14:00:00+00:00"),
+    ("ABC News", "Sun, 01 Jun 2025 14:00:00 GMT", "2025-06-01T14:00:00+00:00"),
+    ("ABC News", "01 Jun 2025 16:00:00 +0200", "2025-06-01T14:00:00+00:00"),
+    ("BuzzFeed", "Sun, 01 Jun 2025 14:00:00 UT", "2025-06-01T14:00:00+00:00"),
+    # the hour a DST change repeats is read as standard time
+    ("ABC News", "2025-11-02T01:30:00", "2025-11-02T06:30:00+00:00"),
+])
+def test_normalize_column_formats(source, raw, stored):
+    assert normalize_column([source], [raw]) == ([stored], [])
+
+
+def test_unparseable_and_empty_dates():
+    stored, bad = normalize_column(["ABC News"] * 4 + ["CBS News"],
+                                   ["yesterday", None, "  ", "2025-06-01T14:00:00Z", "June 41, 2025"])
+    assert stored == [None, None, None, "2025-06-01T14:00:00+00:00", None]
+    assert bad == [0, 4]
+
+
+def test_normalize_dates_keeps_the_index():
+    values = pd.Series(["2025-06-01T14:00:00Z", None, "1 June 2025"], index=[10, 20, 30])
+    sources = pd.Series(["ABC News", "ABC News", "The Tab"], index=values.index)
+    parsed = normalize_dates(sources, values)
+    assert list(parsed.index) == [10, 20, 30] and pd.isna(parsed[20])
+    assert str(parsed.dt.tz) == "UTC"
+
+
+# ——— quarantine ——
+def test_quarantine_add_report_release(engine):
+    quarantine = DateQuarantine(engine)
+    quarantine.add([("https://a.test/1", "ABC News", "yesterday"), ("https://a.test/2", "ABC News", "soon")])
+    quarantine.add([("https://a.test/1", "ABC News", "last week"), ("https://c.test/1", "CBS News", "?")])
+    assert quarantine.report() == [("ABC News", 2, "last week"), ("CBS News", 1, "?")]
+    entries = quarantine.entries().set_index("article_url")
+    assert entries.loc["https://a.test/1", "raw_value"] == "last week"
+    quarantine.release(["https://a.test/1", "https://c.test/1"])
+    assert list(quarantine.entries()["article_url"]) == ["https://a.test/2"]
+
+
+def test_sinks_store_normalized_dates_and_quarantine_the_rest(engine, tmp_path):
+    quarantine = DateQuarantine(engine)
+    path = tmp_path / "articles.csv"
+    with CsvSink(str(path), quarantine=quarantine) as sink:
+        for i, raw in enumerate(["June 1, 2025, 10:05 PM", "sometime"]):
+            sink.write(ArticleRecord(source_name="ABC News", article_url=f"https://a.test/{i}", publication_date=raw))
+    with open(path, newline="", encoding="utf-8") as fp:
+        assert [r["publication_date"] for r in csv.DictReader(fp)] == ["2025-06-02T02:05:00+00:00", ""]
+    assert quarantine.report() == [("ABC News", 1, "sometime")]
+
+
+# ——— rewriting stored dates ——
+def test_normalize_csv_in_an_old_layout(engine, tmp_path):
+    path = tmp_path / "cbs.csv"
+    with open(path, "w", newline="", encoding="utf-8") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(["Source", "URL", "Headline", "Publication Date"])
+        writer.writerow(["CBS News", "https://c.test/1", "A", "June 1, 2025 / 10:05 PM"])
+        writer.writerow(["CBS News", "https://c.test/2", "B", "2025-06-01T14:00:00+00:00"])
+        writer.writerow(["CBS News", "https://c.test/3", "C", "Tomorrow"])
+    quarantine = DateQuarantine(engine)
+    assert normalize_csv(str(path), quarantine) == (1, 1)
+    with open(path, newline="", encoding="utf-8") as fp:
+        rows = list(csv.DictReader(fp))
+    assert [r["Publication Date"] for r in rows] == ["2025-06-02T02:05:00+00:00", "2025-06-01T14:00:00+00:00", ""]
+    assert [r["Headline"] for r in rows] == ["A", "B", "C"]
+    assert list(quarantine.entries()["raw_value"]) == ["Tomorrow"]
+
+
+def test_normalize_table_releases_what_parses_now(engine):
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE TABLE articles ({', '.join(c + ' TEXT' for c in ARTICLE_COLUMNS)})"))
+        conn.execute(text("INSERT INTO articles (source_name, article_url, publication_date) VALUES (:s, :u, :d)"), [
+            {"s": "ABC News", "u": f"https://a.test/{i}", "d": d} for i, d in enumerate([
+                "June 1, 2025, 10:05 PM", "2025-06-01T14:00:00+00:00", "2025-06-01T14:00:00Z", "never", None,
+            ])
+        ])
+    quarantine = DateQuarantine(engine)
+    # held from an earlier run, before its format was known; the row itself was stored empty
+    quarantine.add([("https://a.test/4", "ABC News", "01 Jun 2025 14:00:00 +0000")])
+    assert normalize_table(engine, quarantine, chunk_size=2) == (3, 1)
+    with engine.connect() as conn:
+        stored = conn.execute(text("SELECT publication_date FROM articles ORDER BY article_url")).scalars().all()
+    assert stored == ["2025-06-02T02:05:00+00:00", "2025-06-01T14:00:00+00:00", "2025-06-01T14:00:00+00:00",
+                      None, "2025-06-01T14:00:00+00:00"]
+    assert list(quarantine.entries()["article_url"]) == ["https://a.test/3"]
+
+
+def test_normalize_table_keeps_each_duplicate_rows_date(engine):
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE articles (source_name TEXT, article_url TEXT, publication_date TEXT)"))
+        # the same article scraped from two sections, at different times, around a second URL
+        conn.execute(text("INSERT INTO articles VALUES ('ABC News', :u, :d)"), [
+            {"u": "https://a.test/1", "d": "June 1, 2025, 10:05 PM"},
+            {"u": "https://a.test/2", "d": "2025-06-03T10:00:00Z"},
+            {"u": "https://a.test/1", "d": "2025-06-02T09:00:00Z"},
+            {"u": "https://a.test/2", "d": "2025-06-03T10:00:00Z"},
+        ])
+    # chunks of one URL: a URL's rows are never split across chunks
+    assert normalize_table(engine, DateQuarantine(engine), chunk_size=1) == (4, 0)
+    with engine.connect() as conn:
+        stored = conn.execute(text("SELECT article_url, publication_date FROM articles ORDER BY rowid")).all()
+    assert stored == [("https://a.test/1", "2025-06-02T02:05:00+00:00"),
+                      ("https://a.test/2", "2025-06-03T10:00:00+00:00"),
+                      ("https://a.test/1", "2025-06-02T09:00:00+00:00"),
+                      ("https://a.test/2", "2025-06-03T10:00:00+00:00")]
+
+
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")  # sqlite3's default timestamp converter
+def test_naive_timestamps_from_a_normalized_column_are_utc(tmp_path):
+    # a TIMESTAMP column drops the offset of the normalized dates written to it
+    engine = create_engine(f"sqlite:///{tmp_path / 'typed.db'}",
+                           connect_args={"detect_types": sqlite3.PARSE_DECLTYPES})
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE articles (source_name TEXT, article_url TEXT, publication_date TIMESTAMP)"))
+        conn.execute(text("INSERT INTO articles VALUES ('ABC News', 'https://a.test/1', '2025-06-01 14:00:00')"))
+        assert isinstance(conn.execute(text("SELECT publication_date FROM articles")).scalar(), datetime)
+    assert normalize_table(engine, DateQuarantine(engine)) == (0, 0)
+    engine.dispose()
+
+
+# ——— dashboard ——
+def test_dashboard_drops_dates_that_were_never_normalized():
+    frame = pd.DataFrame({
+        "source": ["ABC News"] * 3,
+        "pub_date": ["2025-06-02T10:00:00+00:00", "June 2, 2025, 10:00 AM", "2025-06-02T10:00:00Z"],
+        "headline_len": [7, 8, 9],
+        "word_count": [300, 400, 500],
+        "internal_links": [4, 5, 6],
+        "external_links": [1, 2, 3],
+    })
+    df = prepare_articles(frame)
+    assert list(df["pub_date"]) == [pd.Timestamp("2025-06-02 10:00", tz="UTC")]
+    assert list(df["word_count"]) == [300]
+    assert df.attrs["excluded_dates"] == 2
+    assert parse_stored_dates(pd.Series(["2025-06-02T10:00:00"])).isna().all()
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+from sqlalchemy import text
+
+from corpus import pages
+from dedup import (BANDS, NUM_PERM, NearDuplicateIndex, add_cluster_column, band_keys, cluster_id_for,
+                   minhash_signature, shingle_hashes, similarity)
+from pipeline import ExtractionPipeline
+from sinks import DbSink
+
+STORY = " ".join(
+    f"The council voted {i} times on the new budget for schools and roads in the county."
+    for i in range(30)
+)
+
+
+def edited(text, every=40):
+    """`text` with every `every`-th word changed, like a lightly edited wire copy."""
+    words = text.split()
+    return " ".join(w + "x" if i % every == 0 else w for i, w in enumerate(words))
+
+
+def test_shingles_are_case_and_punctuation_insensitive():
+    assert np.array_equal(shingle_hashes("One two, three FOUR five six"), shingle_hashes("one two three four five six"))
+    assert len(shingle_hashes("one two three four five six")) == 2
+    assert shingle_hashes("").size == 0
+
+
+def test_signature_is_deterministic_and_sized():
+    sig = minhash_signature(STORY)
+    assert sig.shape == (NUM_PERM,)
+    assert np.array_equal(sig, minhash_signature(STORY))
+    assert minhash_signature("   ") is None
+
+
+def test_similarity_estimates_overlap():
+    original = minhash_signature(STORY)
+    assert similarity(original, minhash_signature(edited(STORY))) > 0.8
+    other = minhash_signature(" ".join(f"Storm number {i} hits the coast overnight." for i in range(60)))
+    assert similarity(original, other) < 0.2
+
+
+def test_near_duplicates_share_a_band():
+    keys = band_keys(minhash_signature(STORY))
+    assert len(keys) == BANDS
+    assert set(keys) & set(band_keys(minhash_signature(edited(STORY))))
+
+
+@pytest.fixture
+def index(engine):
+    return NearDuplicateIndex(engine)
+
+
+def test_assign_clusters_near_duplicates(index):
+    original = index.assign("https://a.test/1", "abc", minhash_signature(STORY))
+    copy = index.assign("https://b.test/1", "cbs", minhash_signature(edited(STORY)))
+    unrelated = index.assign("https://a.test/2", "abc", minhash_signature("Something else entirely " * 20))
+    assert original == (cluster_id_for("https://a.test/1"), False)
+    assert copy == (original[0], True)
+    assert unrelated == (cluster_id_for("https://a.test/2"), False)
+    assert index.known_urls(duplicates_only=True) == {"https://b.test/1"}
+
+
+def test_assign_keeps_the_stored_cluster_of_a_known_url(index):
+    index.assign("https://a.test/1", "abc", minhash_signature(STORY))
+    index.assign("https://b.test/1", "cbs", minhash_signature(edited(STORY)))
+    changed = minhash_signature("The story was rewritten completely " * 20)
+    # neither has the other as an LSH candidate any more, and neither is inserted twice
+    assert index.assign("https://b.test/1", "cbs", changed) == (cluster_id_for("https://a.test/1"), True)
+    assert index.assign("https://a.test/1", "abc", changed) == (cluster_id_for("https://a.test/1"), False)
+    assert index.known_urls() == {"https://a.test/1", "https://b.test/1"}
+
+
+def test_body_without_words_gets_its_own_cluster(index):
+    assert index.assign("https://a.test/empty", "abc", None) == (cluster_id_for("https://a.test/empty"), False)
+    assert index.known_urls() == set()
+
+
+def test_db_sink_stores_the_cluster_in_a_table_from_before_dedup(engine):
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE articles (source_name TEXT, article_url TEXT, headline_text TEXT)"))
+    index = NearDuplicateIndex(engine)
+    add_cluster_column(engine)      # a second node starting up
+    entry, raw = pages("abc")[0]
+    with DbSink(engine) as sink, ExtractionPipeline(sink, processes=1, dedup=index) as pipeline:
+        pipeline.submit("abc", "news", entry["url"], raw)
+        pipeline.submit("abc", "world", entry["url"] + "?syndicated", raw)
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT article_url, duplicate_cluster_id FROM articles ORDER BY article_url")).all()
+    assert rows == [(entry["url"], cluster_id_for(entry["url"])),
+                    (entry["url"] + "?syndicated", cluster_id_for(entry["url"]))]
+
+
+def test_add_cluster_column_leaves_a_missing_table_alone(engine):
+    add_cluster_column(engine, "nowhere")
+    NearDuplicateIndex(engine)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT name FROM sqlite_master WHERE name IN ('articles', 'nowhere')")).all() == []
@@ -0,0 +1,134 @@
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from adapters import SourceAdapter
+from feeds import MAX_CHILD_SITEMAPS, canonicalize, feed_links, parse_feed
+
+RSS = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Politics</title>
+  <item><link>https://Example.com/politics/a?utm_source=rss#top</link></item>
+  <item><guid>https://example.com/politics/b</guid></item>
+  <item><guid isPermaLink="false">tag:example.com,2025:c</guid></item>
+</channel></rss>"""
+
+ATOM = b"""<?xml version="1.0"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <entry><link rel="edit" href="/edit/1"/><link href="https://example.com/politics/b"/></entry>
+  <entry><link rel="alternate" href="/politics/d"/></entry>
+</feed>"""
+
+URLSET = b"""<?xml version="1.0"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
+        xmlns:news="http://www.google.com/schemas/sitemap-news/0.9">
+  <url><loc>https://example.com/politics/e</loc><news:news/></url>
+  <url><loc> </loc></url>
+</urlset>"""
+
+
+def sitemap_index(urls):
+    locs = "".join(f"<sitemap><loc>{u}</loc></sitemap>" for u in urls)
+    return f'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{locs}</sitemapindex>'.encode()
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def feed_server(tmp_path):
+    """Serves the files written to tmp_path; yields (directory, base URL)."""
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=str(tmp_path)))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    host, port = httpd.server_address[:2]
+    yield tmp_path, f"http://{host}:{port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.mark.parametrize("url, canonical", [
+    ("http://WWW.Example.com:80/a/b#comments", "https://www.example.com/a/b"),
+    ("https://example.com/a?id=3&utm_medium=x&cid=rss&ftag=y", "https://example.com/a?id=3"),
+    ("https://example.com", "https://example.com/"),
+    ("https://example.com:8443/a", "https://example.com:8443/a"),
+    ("mailto:tips@example.com", None),
+    ("https://example.com:bad/a", None),
+])
+def test_canonicalize(url, canonical):
+    assert canonicalize(url) == canonical
+
+
+def test_canonicalize_resolves_relative_links():
+    assert canonicalize("../b?UTM_CAMPAIGN=z", base="https://example.com/news/a/") == "https://example.com/news/b"
+
+
+def test_parse_rss_atom_and_sitemaps():
+    assert parse_feed(RSS) == (["https://Example.com/politics/a?utm_source=rss#top",
+                                "https://example.com/politics/b"], [])
+    assert parse_feed(ATOM) == (["https://example.com/politics/b", "/politics/d"], [])
+    assert parse_feed(URLSET) == (["https://example.com/politics/e"], [])
+    assert parse_feed(sitemap_index(["https://example.com/s1.xml"])) == ([], ["https://example.com/s1.xml"])
+    with pytest.raises(ValueError):
+        parse_feed(b"<html><body/></html>")
+
+
+def test_feed_links_merges_feeds_and_follows_one_index_level(feed_server):
+    directory, base = feed_server
+    (directory / "rss.xml").write_bytes(RSS)
+    (directory / "atom.xml").write_bytes(ATOM)
+    (directory / "news.xml").write_bytes(URLSET)
+    children = [f"{base}/news.xml"] + [f"{base}/old-{i}.xml" for i in range(MAX_CHILD_SITEMAPS)]
+    (directory / "index.xml").write_bytes(sitemap_index(children))
+    for i in range(MAX_CHILD_SITEMAPS):
+        # an index inside an index isn't followed
+        (directory / f"old-{i}.xml").write_bytes(sitemap_index([f"{base}/never.xml"]))
+
+    endpoints = [f"{base}/rss.xml", f"{base}/missing.xml", f"{base}/atom.xml", f"{base}/index.xml"]
+    with requests.Session() as session:
+        links = feed_links(session, endpoints)
+    host = base.split("//")[1]
+    assert links == [
+        "https://example.com/politics/a",
+        "https://example.com/politics/b",
+        f"https://{host}/politics/d",
+        "https://example.com/politics/e",
+    ]
+
+
+def test_feed_links_filters_with_accept(feed_server):
+    directory, base = feed_server
+    (directory / "rss.xml").write_bytes(RSS)
+    with requests.Session() as session:
+        links = feed_links(session, [f"{base}/rss.xml"], accept=lambda url: url.endswith("/b"))
+    assert links == ["https://example.com/politics/b"]
+
+
+class StandInSource(SourceAdapter):
+    source_name = "Stand-in"
+
+    def __init__(self, feeds):
+        self.feeds = {"Politics": feeds}
+        self.scraped = []
+
+    def discover_section(self, session, section, url):
+        self.scraped.append(url)
+        return {(section, "https://example.com/politics/from-page")}
+
+
+def test_section_page_is_scraped_only_without_feed_links(feed_server):
+    directory, base = feed_server
+    (directory / "rss.xml").write_bytes(RSS)
+    empty = f"{base}/empty.xml"
+    (directory / "empty.xml").write_bytes(b"<rss><channel/></rss>")
+    with requests.Session() as session:
+        fed = StandInSource([f"{base}/rss.xml"])
+        assert ("Politics", "https://example.com/politics/b") in fed.discover_feed_first(session, "Politics", "page")
+        assert fed.scraped == []
+        unfed = StandInSource([empty])
+        assert unfed.discover_feed_first(session, "Politics", "page") == {
+            ("Politics", "https://example.com/politics/from-page")}
+        assert unfed.scraped == ["page"]
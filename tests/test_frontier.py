@@ -0,0 +1,101 @@
+import time
+
+from frontier import DONE, FAILED, PENDING, Frontier
+
+
+def articles(*paths, host="abc.test"):
+    return [("news", f"https://{host}/{p}") for p in paths]
+
+
+def test_add_ignores_known_urls(engine):
+    frontier = Frontier(engine)
+    assert frontier.add("article", "abc", articles("a", "b")) == 2
+    assert frontier.add("article", "abc", articles("b", "c")) == 1
+    assert frontier.counts() == {("article", PENDING): 3}
+
+
+def test_claim_leases_each_item_to_one_owner(engine):
+    frontier = Frontier(engine, per_domain=10)
+    frontier.add("article", "abc", articles("a", "b", "c"))
+    first = frontier.claim("node-1", limit=2)
+    second = frontier.claim("node-2", limit=10)
+    assert len(first) == 2 and len(second) == 1
+    assert {l.url for l in first}.isdisjoint(l.url for l in second)
+    assert all(l.attempts == 1 for l in first + second)
+    assert frontier.claim("node-3", limit=10) == []
+
+
+def test_claim_caps_items_per_domain(engine):
+    frontier = Frontier(engine, per_domain=2)
+    frontier.add("article", "abc", articles("a", "b", "c", host="one.test") + articles("d", host="two.test"))
+    leases = frontier.claim("node", limit=10)
+    domains = [l.url.split("/")[2] for l in leases]
+    assert domains.count("one.test") == 2 and domains.count("two.test") == 1
+
+
+def test_claim_filters_by_source_and_kind(engine):
+    frontier = Frontier(engine)
+    frontier.add("section", "abc", articles("politics"))
+    frontier.add("article", "cbs", articles("x", host="cbs.test"))
+    assert [l.kind for l in frontier.claim("node", 10, kinds=["section"])] == ["section"]
+    assert [l.source for l in frontier.claim("node", 10, source="cbs")] == ["cbs"]
+
+
+def test_expired_lease_is_reclaimed_and_old_owner_cannot_finish(engine):
+    frontier = Frontier(engine, lease_seconds=-1)  # every lease is already expired
+    frontier.add("article", "abc", articles("a"))
+    [stale] = frontier.claim("slow-node", 1)
+    [fresh] = frontier.claim("other-node", 1)
+    assert fresh.attempts == 2
+    assert not frontier.complete(stale)
+    assert frontier.complete(fresh)
+    assert frontier.counts() == {("article", DONE): 1}
+
+
+def test_fail_retries_with_backoff_then_gives_up(engine):
+    frontier = Frontier(engine, max_attempts=2, backoff_base=0, backoff_cap=0)
+    frontier.add("article", "abc", articles("a"))
+    [lease] = frontier.claim("node", 1)
+    assert frontier.fail(lease, "timeout")
+    assert frontier.counts() == {("article", PENDING): 1}
+    [lease] = frontier.claim("node", 1)
+    assert frontier.fail(lease, "timeout")
+    assert frontier.counts() == {("article", FAILED): 1}
+    assert not frontier.has_pending()
+
+
+def test_backoff_keeps_a_failed_item_out_of_claims(engine):
+    frontier = Frontier(engine, backoff_base=3600, backoff_cap=3600)
+    frontier.add("article", "abc", articles("a"))
+    [lease] = frontier.claim("node", 1)
+    frontier.fail(lease, "503")
+    assert frontier.claim("node", 1) == []
+    assert frontier.has_pending("abc")
+
+
+def test_unretryable_failure_is_final(engine):
+    frontier = Frontier(engine)
+    frontier.add("article", "abc", articles("a"))
+    [lease] = frontier.claim("node", 1)
+    frontier.fail(lease, "404", retryable=False)
+    assert frontier.counts() == {("article", FAILED): 1}
+
+
+def test_defer_does_not_use_up_an_attempt(engine):
+    frontier = Frontier(engine)
+    frontier.add("article", "abc", articles("a"))
+    [lease] = frontier.claim("node", 1)
+    assert frontier.defer(lease, until=time.time() - 1, error="circuit open")
+    [again] = frontier.claim("node", 1)
+    assert again.attempts == 1
+
+
+def test_refresh_after_reopens_finished_items(engine):
+    frontier = Frontier(engine)
+    frontier.add("section", "abc", articles("politics"))
+    [lease] = frontier.claim("node", 1)
+    frontier.complete(lease)
+    frontier.add("section", "abc", articles("politics"), refresh_after=3600)
+    assert frontier.counts() == {("section", DONE): 1}
+    frontier.add("section", "abc", articles("politics"), refresh_after=-1)
+    assert frontier.counts() == {("section", PENDING): 1}
@@ -0,0 +1,64 @@
+import pytest
+from bs4 import BeautifulSoup
+
+from adapters import load_adapter
+from corpus import pages
+from links import EXTERNAL, INTERNAL, LinkCounts, classify, count_links, registrable_domain, site_of
+
+
+@pytest.mark.parametrize("host, domain", [
+    ("www.cbsnews.com", "cbsnews.com"),
+    ("assets.CBSNews.com.", "cbsnews.com"),
+    ("cbsnews.com", "cbsnews.com"),
+    ("www.bbc.co.uk", "bbc.co.uk"),
+    ("abcnews.go.com", "abcnews.go.com"),
+    ("192.168.0.1", "192.168.0.1"),
+])
+def test_registrable_domain(host, domain):
+    assert registrable_domain(host) == domain
+
+
+@pytest.mark.parametrize("href, kind", [
+    ("/politics/story", INTERNAL),
+    ("?page=2", INTERNAL),
+    ("#comments", INTERNAL),
+    ("https://www.cbsnews.com/news/a", INTERNAL),
+    ("//cbsnews.com/video", INTERNAL),
+    ("HTTPS://twitter.com/CBSNews", EXTERNAL),
+    ("https://www.paramountplus.com/", EXTERNAL),
+    ("mailto:tips@cbsnews.com", None),
+    ("tel:+15555550100", None),
+    ("javascript:void(0)", None),
+    ("  ", None),
+    ("http://[::1", None),
+])
+def test_classify(href, kind):
+    assert classify(site_of("https://www.cbsnews.com/news/story/"), href) == kind
+
+
+def test_shared_suffix_subdomains_are_separate_sites():
+    site = site_of("https://abcnews.go.com/Politics/story")
+    assert classify(site, "https://abcnews.go.com/US") == INTERNAL
+    assert classify(site, "https://espn.go.com/nba") == EXTERNAL
+
+
+def test_count_links_splits_page_and_body():
+    soup = BeautifulSoup(
+        '<nav><a href="/">Home</a><a href="https://facebook.com/x">Share</a></nav>'
+        '<article><p><a href="https://www.thetab.com/uk/b">Related</a> and '
+        '<a href="https://gov.uk/guidance">source</a> <a href="mailto:a@b.c">mail</a></p></article>'
+        '<a name="anchor-without-href">top</a>',
+        "html.parser",
+    )
+    counts = count_links(soup, "https://thetab.com/uk/a", body=soup.find_all("article"))
+    assert counts == LinkCounts(internal=2, external=2, internal_within_body=1, external_within_body=1)
+    assert count_links(soup, "https://thetab.com/uk/a") == LinkCounts(2, 2, 0, 0)
+
+
+def test_extractors_count_links_on_recorded_pages():
+    adapter = load_adapter("abc")
+    for entry, content in pages("abc"):
+        record = adapter.extract("Politics", entry["url"], content)
+        assert record.num_internal_links > 0
+        assert record.num_internal_links_within_body <= record.num_internal_links
+        assert record.num_external_links_within_body <= record.num_external_links
@@ -0,0 +1,110 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bs4 import BeautifulSoup
+
+from adapters import load_adapter
+from corpus import pages
+from metadata import PageMetadata, parse_timestamp, scan_metadata, soup_metadata
+from records import ARTICLE_COLUMNS, METADATA_COLUMNS
+
+
+def page(head="", body="", ld=None):
+    script = f'<script type="application/ld+json">{json.dumps(ld)}</script>' if ld is not None else ""
+    return f"<html><head>{head}{script}</head><body>{body}</body></html>".encode()
+
+
+OPENGRAPH = ('<title>Site title</title>'
+             '<meta property="og:title" content="OpenGraph headline">'
+             '<meta property="article:published_time" content="2025-06-01T14:00:00Z">')
+
+
+def test_parse_timestamp():
+    assert parse_timestamp("2025-06-01T14:00:00Z") == datetime(2025, 6, 1, 14, tzinfo=timezone.utc)
+    # offset without a colon, as CBS sends it
+    assert parse_timestamp("2025-06-01T10:00:00-0400").utcoffset() == timedelta(hours=-4)
+    assert parse_timestamp("June 1, 2025") is None
+    assert parse_timestamp(None) is None and parse_timestamp("") is None
+
+
+def test_has_needs_every_field():
+    meta = PageMetadata(headline="A headline")
+    assert meta.has(("headline",))
+    assert not meta.has(("headline", "published"))
+
+
+def test_scan_reads_meta_tags():
+    meta = scan_metadata(page(OPENGRAPH))
+    assert (meta.headline, meta.published) == ("OpenGraph headline", "2025-06-01T14:00:00Z")
+
+
+def test_json_ld_beats_meta_tags():
+    ld = {"@context": "https://schema.org", "@graph": [
+        {"@type": "Organization", "name": "Not an article"},
+        {"@type": ["NewsArticle"], "headline": "JSON-LD headline", "datePublished": "2025-06-02T09:00:00Z",
+         "mainEntityOfPage": {"@id": "https://example.com/story"}},
+    ]}
+    html = page('<meta property="og:title" content="OpenGraph headline">', ld=ld)
+    for meta in (scan_metadata(html, need=("headline", "published", "canonical_url")),
+                 soup_metadata(BeautifulSoup(html, "html.parser"))):
+        assert meta.headline == "JSON-LD headline"
+        assert meta.published == "2025-06-02T09:00:00Z"
+        assert meta.canonical_url == "https://example.com/story"
+
+
+def test_falls_back_to_title_and_time_tag():
+    html = page("<title> Title headline </title>", '<time datetime="2025-06-03">June 3</time>')
+    meta = scan_metadata(html)
+    assert (meta.headline, meta.published) == ("Title headline", "2025-06-03")
+
+
+def test_scan_stops_once_fields_are_found():
+    # the JSON-LD block would win, but the meta tags before it already hold both fields
+    html = page(OPENGRAPH, ld={"@type": "NewsArticle", "headline": "JSON-LD headline"})
+    assert scan_metadata(html).headline == "OpenGraph headline"
+    assert scan_metadata(html, need=("headline", "section")).headline == "JSON-LD headline"
+    # with head_only, nothing in the body is looked at
+    html = page("<title>Title</title>", '<time datetime="2025-06-03"></time>')
+    assert scan_metadata(html, head_only=True).published is None
+    assert scan_metadata(html).published == "2025-06-03"
+
+
+def test_missing_fields_stay_none():
+    meta = scan_metadata(page(body="<p>No metadata here.</p>"))
+    assert meta == PageMetadata()
+    assert scan_metadata(page(ld="not an object")) == PageMetadata()
+
+
+@pytest.mark.parametrize("source", ["abc", "thetab", "buzzfeed"])
+def test_scan_matches_soup_on_recorded_pages(source):
+    for _, content in pages(source):
+        scanned = scan_metadata(content)
+        parsed = soup_metadata(BeautifulSoup(content, "html.parser"))
+        assert scanned.headline and scanned.published
+        assert (scanned.headline, scanned.published) == (parsed.headline, parsed.published)
+
+
+def test_extract_metadata_fills_only_metadata_columns():
+    adapter = load_adapter("thetab")
+    entry, content = pages("thetab")[0]
+    record = adapter.extract_metadata("news", entry["url"], content)
+    full = adapter.extract("news", entry["url"], content)
+    assert record.headline_text == full.headline_text
+    assert record.headline_word_count == len(record.headline_text.split())
+    assert parse_timestamp(record.publication_date) == parse_timestamp(full.publication_date)
+    for column in ARTICLE_COLUMNS:
+        if column not in METADATA_COLUMNS:
+            assert getattr(record, column) is None
+
+
+def test_extract_metadata_falls_back_to_the_extractor():
+    adapter = load_adapter("thetab")
+    entry, content = pages("thetab")[0]
+    # without structured metadata, the DOM extractor finds the headline
+    soup = BeautifulSoup(content, "html.parser")
+    for tag in soup.find_all(["meta", "script", "title"]):
+        tag.decompose()
+    record = adapter.extract_metadata("news", entry["url"], str(soup).encode())
+    assert record.headline_text == adapter.extract("news", entry["url"], content).headline_text
+    assert record.article_full_text is None and record.scrape_date
@@ -0,0 +1,87 @@
+import json
+import urllib.request
+
+import pytest
+import requests
+
+from corpus import StandInServer, pages
+from metrics import BUCKETS, CrawlMetrics, Histogram, TimedHTTPAdapter
+
+
+def test_histogram_buckets_and_quantiles():
+    hist = Histogram()
+    assert hist.quantile(0.5) is None
+    for value in (0.0005, 0.003, 0.003, 0.2, 100.0):
+        hist.observe(value)
+    assert hist.count == 5 and hist.sum == pytest.approx(100.2065)
+    assert hist.counts[0] == 1 and hist.counts[-1] == 1
+    assert hist.quantile(0.5) == 0.005
+    assert hist.quantile(0.8) == 0.25
+    assert hist.quantile(1.0) == float("inf")
+    assert len(hist.counts) == len(BUCKETS) + 1
+
+
+@pytest.fixture(scope="module")
+def standin():
+    with StandInServer() as server:
+        yield server
+
+
+@pytest.fixture
+def session():
+    session = requests.Session()
+    session.mount("http://", TimedHTTPAdapter())
+    yield session
+    session.close()
+
+
+def test_responses_are_timed_and_counted(standin, session):
+    metrics = CrawlMetrics()
+    entry, raw = pages("abc")[0]
+    res = session.get(standin.url_for(entry))
+    assert res.connect_seconds >= 0 and res.ttfb_seconds >= 0
+    missing = session.get(f"{standin.base_url}/missing.html")
+    metrics.record_response("abc", "Politics", res)
+    metrics.record_response("abc", "Politics", missing)
+
+    summary = metrics.summary()
+    [counts] = summary["domains"].values()
+    assert counts["Politics"]["requests"] == 2
+    assert counts["Politics"]["bytes"] == len(raw) + len(missing.content)
+    assert counts["Politics"]["status_200"] == counts["Politics"]["status_404"] == 1
+    assert summary["stages"]["ttfb"]["abc"]["count"] == 2
+    assert summary["requests"] == 2
+
+
+def test_errors_without_a_response_are_counted_by_class():
+    metrics = CrawlMetrics()
+    metrics.record_error("abc", None, "https://abc.test/a", requests.ConnectTimeout("slow"))
+    assert metrics.summary()["domains"]["abc.test"]["-"] == {"requests": 1, "error_ConnectTimeout": 1}
+
+
+def test_prometheus_exposition(tmp_path):
+    metrics = CrawlMetrics()
+    metrics.observe("parse", "abc", 0.02)
+    metrics.observe("parse", "abc", 3.0)
+    metrics.record_error("abc", "news", "https://abc.test/a", requests.ReadTimeout("slow"))
+    text = metrics.prometheus()
+    assert 'crawl_stage_seconds_bucket{stage="parse",source="abc",le="0.025"} 1' in text
+    assert 'crawl_stage_seconds_bucket{stage="parse",source="abc",le="+Inf"} 2' in text
+    assert 'crawl_stage_seconds_count{stage="parse",source="abc"} 2' in text
+    assert 'crawl_errors_total{domain="abc.test",section="news",error="ReadTimeout"} 1' in text
+
+    path = tmp_path / "metrics.json"
+    metrics.write_summary(str(path), run="test")
+    assert json.loads(path.read_text())["run"] == "test"
+
+
+def test_serve_exposes_metrics_over_http():
+    metrics = CrawlMetrics()
+    metrics.observe("write", "abc", 0.001)
+    metrics.serve(0, host="127.0.0.1")
+    try:
+        host, port = metrics._server.server_address[:2]
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics") as res:
+            assert 'stage="write"' in res.read().decode()
+    finally:
+        metrics.close()
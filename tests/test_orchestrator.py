@@ -0,0 +1,71 @@
+import csv
+
+import pytest
+
+import orchestrator
+from adapters import load_adapter
+from fetcher import DEFAULT_HEADERS, Fetcher
+from sinks import CsvSink
+from site_pages import tab_article
+from the_tab_scraper import TheTabAdapter
+
+
+class StandInTab(TheTabAdapter):
+    """The Tab, discovering pages on the local test site instead of the real one."""
+
+    def __init__(self, urls):
+        self.urls = urls
+
+    def discover(self, session):
+        return {("news", url) for url in self.urls}
+
+
+def test_load_adapter_rejects_an_unknown_source():
+    with pytest.raises(ValueError, match="Unknown source"):
+        load_adapter("nope")
+
+
+def test_sessions_share_the_pool_but_not_headers():
+    fetcher = Fetcher(pool_size=2)
+    plain, tab = load_adapter("abc"), load_adapter("thetab")
+    plain.headers = {"X-Test": "abc"}
+    first, second = fetcher.session_for(plain), fetcher.session_for(tab)
+    assert first.get_adapter("https://a.test") is second.get_adapter("https://b.test")
+    assert first.headers["X-Test"] == "abc" and "X-Test" not in second.headers
+    assert second.headers["User-Agent"] == DEFAULT_HEADERS["User-Agent"]
+    fetcher.close()
+
+
+def test_run_scrapes_every_discovered_page_once(site, tmp_path):
+    urls = [site.add(f"/uk/2025/06/story-{i}", tab_article(f"Story {i}")) for i in range(3)]
+    out = tmp_path / "articles.csv"
+
+    [summary] = orchestrator.run([StandInTab(urls)], CsvSink(str(out)), workers=2, processes=1)
+    assert summary["fetched"] == summary["scraped"] == len(urls)
+    assert summary["fetch_failed"] == summary["extract_failed"] == 0
+    with open(out, newline="", encoding="utf-8") as fp:
+        rows = list(csv.DictReader(fp))
+    assert sorted(row["article_url"] for row in rows) == sorted(urls)
+    assert all(row["source_name"] == "The Tab" and row["headline_text"] for row in rows)
+
+    # a second run finds everything already in the sink
+    [again] = orchestrator.run([StandInTab(urls)], CsvSink(str(out)), workers=2, processes=1)
+    assert again["fetched"] == 0
+
+
+def test_a_missing_page_counts_as_a_failed_fetch(site, tmp_path):
+    [summary] = orchestrator.run([StandInTab([site.url("/uk/missing")])], CsvSink(str(tmp_path / "a.csv")),
+                                 processes=1)
+    assert summary["fetched"] == 0 and summary["fetch_failed"] == 1
+
+
+def test_a_page_that_cant_be_archived_is_still_extracted(site, tmp_path, caplog):
+    class FullDisk:
+        def append(self, *args):
+            raise OSError("No space left on device")
+
+    urls = [site.add(f"/uk/2025/06/story-{i}", tab_article(f"Story {i}")) for i in range(3)]
+    [summary] = orchestrator.run([StandInTab(urls)], CsvSink(str(tmp_path / "a.csv")), processes=1,
+                                 archive=FullDisk())
+    assert summary["fetched"] == summary["scraped"] == len(urls) and summary["fetch_failed"] == 0
+    assert caplog.text.count("could not archive") == len(urls)
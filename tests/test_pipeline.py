@@ -0,0 +1,146 @@
+import csv
+import time
+
+from sqlalchemy import select
+
+from corpus import pages
+from dates import DateQuarantine
+from dedup import NearDuplicateIndex
+from pipeline import ExtractionPipeline, extract_record
+from records import ARTICLE_COLUMNS, PAGE_COLUMNS
+from retry import RetryQueue, dead_letters
+from sinks import CsvSink
+from site_pages import tab_article
+from terms import TermIndex, term_articles
+
+HEADLINE = ARTICLE_COLUMNS.index("headline_text")
+PUBLISHED = ARTICLE_COLUMNS.index("publication_date")
+STORIES = {f"https://thetab.com/uk/2025/06/story-{i}": tab_article(f"Story {i}") for i in range(3)}
+
+
+def test_extract_record_returns_plain_values():
+    entry, raw = pages("abc")[0]
+    source, url, values, error, signature, timings, terms, bad_date = extract_record("abc", "news", entry["url"], raw)
+    assert (source, url, error) == ("abc", entry["url"], None)
+    assert isinstance(values, tuple) and len(values) == len(ARTICLE_COLUMNS)
+    assert values[HEADLINE].startswith("Pint-size pioneer")
+    assert signature is None and terms is None and bad_date is None
+    assert values[PUBLISHED] == "2025-06-23T14:48:00+00:00"     # normalized from "...Z"
+    assert all(t >= 0 for t in timings)
+
+
+def test_extract_record_adds_signature_and_terms_on_request():
+    entry, raw = pages("abc")[0]
+    *_, signature, _, terms, _ = extract_record("abc", "news", entry["url"], raw,
+                                             with_signature=True, with_terms=True)
+    assert isinstance(signature, bytes) and len(signature) == 128 * 8
+    assert terms and all(isinstance(n, int) for n in terms.values())
+
+
+def test_extract_record_leaves_the_page_link_counts_empty_when_body_only():
+    url, raw = next(iter(STORIES.items()))
+    *_, full, _, _, _, _, _ = extract_record("thetab", "news", url, raw)
+    *_, cut, _, _, _, _, _ = extract_record("thetab", "news", url, raw, body_only=True)
+    for i, column in enumerate(ARTICLE_COLUMNS):
+        if column in PAGE_COLUMNS:
+            assert full[i] is not None and cut[i] is None
+        elif column != "scrape_date":
+            assert cut[i] == full[i], column
+
+
+def test_extract_record_reports_failures_instead_of_raising():
+    *_, values, error, _, _, _, _ = extract_record("thetab", "news", "https://thetab.com/uk/x", b"<html></html>")
+    assert values is None and error == "nothing extracted"
+    *_, values, error, _, _, _, _ = extract_record("nope", "news", "https://x.test/", b"")
+    assert values is None and error.startswith("ValueError")
+
+
+def test_pipeline_writes_extracted_pages_and_counts_failures(tmp_path):
+    out = tmp_path / "articles.csv"
+    sink = CsvSink(str(out))
+    with sink, ExtractionPipeline(sink, processes=1, queue_size=2) as pipeline:
+        for url, raw in STORIES.items():
+            pipeline.submit("thetab", "news", url, raw)
+        pipeline.submit("thetab", "news", "https://thetab.com/uk/empty", b"<html></html>")
+
+    assert pipeline.stats["thetab"]["scraped"] == len(STORIES)
+    assert pipeline.stats["thetab"]["extract_failed"] == 1
+    with open(out, newline="", encoding="utf-8") as fp:
+        urls = {row["article_url"] for row in csv.DictReader(fp)}
+    assert urls == set(STORIES)
+
+
+def test_the_sink_and_the_term_index_get_the_same_utc_date(tmp_path, engine):
+    entry, raw = pages("thetab")[0]
+    # just after midnight in London is still the day before in UTC
+    late = raw.replace(b"2025-06-16T14:32:22+00:00", b"2025-06-17T00:30:00+01:00")
+    undated = raw.replace(b"2025-06-16T14:32:22+00:00", b"sometime")
+    quarantine = DateQuarantine(engine)
+    sink = CsvSink(str(tmp_path / "articles.csv"), quarantine=quarantine)
+    with sink, ExtractionPipeline(sink, processes=1, terms=TermIndex(engine)) as pipeline:
+        pipeline.submit("thetab", "news", "https://thetab.com/uk/late", late)
+        pipeline.submit("thetab", "news", "https://thetab.com/uk/undated", undated)
+    with open(tmp_path / "articles.csv", newline="", encoding="utf-8") as fp:
+        dates = {row["article_url"]: row["publication_date"] for row in csv.DictReader(fp)}
+    assert dates == {"https://thetab.com/uk/late": "2025-06-16T23:30:00+00:00", "https://thetab.com/uk/undated": ""}
+    assert quarantine.report() == [("The Tab", 1, "sometime")]
+    with engine.connect() as conn:
+        days = dict(conn.execute(select(term_articles.c.article_url, term_articles.c.day)).all())
+    assert days["https://thetab.com/uk/late"] == "2025-06-16"
+
+
+def test_pipeline_replaces_a_pool_whose_worker_died(tmp_path):
+    sink = CsvSink(str(tmp_path / "articles.csv"))
+    (first, first_raw), *rest = STORIES.items()
+    with sink, ExtractionPipeline(sink, processes=1) as pipeline:
+        pipeline.submit("thetab", "news", first, first_raw)
+        until(lambda: pipeline.stats.get("thetab", {}).get("scraped") == 1)
+        broken = pipeline._pool
+        for worker in list(broken._processes.values()):
+            worker.kill()                   # as the OOM killer would
+        until(lambda: broken._broken)
+        for url, raw in rest:
+            pipeline.submit("thetab", "news", url, raw)
+    assert pipeline._pool is not broken
+    assert pipeline.stats["thetab"]["scraped"] == 1 + len(rest)
+
+
+def test_a_page_inside_a_broken_pool_is_an_extraction_failure(tmp_path, engine):
+    sink = CsvSink(str(tmp_path / "articles.csv"))
+    retries = RetryQueue(engine)
+    slow = b"<html><body><h1>Slow</h1>" + b"<p>Paragraph.</p>" * 1_000_000 + b"</body></html>"
+    url, raw = next(iter(STORIES.items()))
+    with sink, ExtractionPipeline(sink, processes=1, retries=retries) as pipeline:
+        pipeline.submit("thetab", "news", "https://thetab.com/uk/slow", slow)
+        until(lambda: pipeline._pool._processes)
+        time.sleep(0.5)
+        broken = pipeline._pool
+        for worker in list(broken._processes.values()):
+            worker.kill()
+        until(lambda: broken._broken)
+        pipeline.submit("thetab", "news", url, raw)
+    counts = pipeline.stats["thetab"]
+    assert (counts["extract_failed"], counts["scraped"]) == (1, 1)
+    with engine.connect() as conn:
+        assert conn.execute(select(dead_letters.c.url, dead_letters.c.stage)).all() == \
+            [("https://thetab.com/uk/slow", "extract")]
+
+
+def test_pipeline_skips_confirmed_duplicates(tmp_path, engine):
+    sink = CsvSink(str(tmp_path / "articles.csv"))
+    url, raw = next(iter(STORIES.items()))
+    with sink, ExtractionPipeline(sink, processes=1, dedup=NearDuplicateIndex(engine),
+                                  skip_duplicates=True) as pipeline:
+        pipeline.submit("thetab", "news", url, raw)
+        pipeline.submit("thetab", "features", url + "?syndicated", raw)
+
+    counts = pipeline.stats["thetab"]
+    assert (counts["scraped"], counts["duplicates"]) == (1, 1)
+    assert len(sink.existing_urls()) == 1
+
+
+def until(condition, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
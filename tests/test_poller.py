@@ -0,0 +1,150 @@
+import csv
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import insert, select
+
+from corpus import StandInServer, pages
+from pipeline import ExtractionPipeline
+from poller import (HOUR, PRIOR_EVENTS, PRIOR_EXPOSURE, RATE_HALF_LIFE, PublishRate, SectionPoller,
+                    next_interval, section_polls)
+from retry import RetryQueue
+from sinks import CsvSink
+from the_tab_scraper import TheTabAdapter
+
+
+class StandInTab(TheTabAdapter):
+    """The Tab with one section whose listing is whatever the test sets."""
+
+    sections = {"news": "stand-in"}
+
+    def __init__(self):
+        self.listing = set()
+
+    def discover_feed_first(self, session, section, url):
+        if isinstance(self.listing, Exception):
+            raise self.listing
+        return {(section, u) for u in self.listing}
+
+
+@pytest.fixture
+def poller(engine, tmp_path):
+    poller = SectionPoller(engine, [StandInTab()], CsvSink(str(tmp_path / "articles.csv")),
+                           min_interval=60, max_interval=2 * HOUR, workers=2, processes=1)
+    yield poller
+    poller.fetcher.close()
+
+
+def polls(engine):
+    with engine.connect() as conn:
+        return conn.execute(select(section_polls).order_by(section_polls.c.id)).all()
+
+
+# ——— rate estimate ——
+def test_first_poll_only_starts_the_clock():
+    rate = PublishRate()
+    assert rate.per_hour() == pytest.approx(HOUR * PRIOR_EVENTS / PRIOR_EXPOSURE)
+    rate.update(1000.0, 250)
+    assert rate.events == 0 and rate.last_polled_at == 1000.0
+
+
+def test_rate_follows_new_links_and_decays():
+    rate = PublishRate()
+    rate.update(0.0, 0)
+    for i in range(1, 25):
+        rate.update(i * HOUR, 6)
+    assert rate.per_hour() == pytest.approx(6, rel=0.1)
+    # a long quiet spell brings it down again
+    rate.update(24 * HOUR + 4 * RATE_HALF_LIFE, 0)
+    assert rate.per_hour() < 1
+
+
+def test_next_interval_is_clamped():
+    assert next_interval(4, 60, 7200) == 900
+    assert next_interval(1000, 60, 7200) == 60
+    assert next_interval(0.01, 60, 7200) == 7200
+    assert next_interval(0, 60, 7200) == 7200
+
+
+# ——— schedule ——
+def test_restore_carries_the_schedule_over(poller, engine):
+    now = time.time()
+    with engine.begin() as conn:
+        conn.execute(insert(section_polls), [
+            {"source": "thetab", "section": "news", "polled_at": now - 2 * HOUR + i * 600,
+             "listed": 30, "new": 0, "interval": 600}
+            for i in range(12)
+        ])
+    poller.restore()
+    [(due, _, source, section)] = poller._heap
+    rate = poller.rates[("thetab", "news")]
+    assert (source, section) == ("thetab", "news")
+    assert rate.last_polled_at == pytest.approx(now - 600)
+    assert due == pytest.approx(max(now, rate.last_polled_at + poller._interval(rate)), abs=1)
+    assert due > now
+
+
+def test_sections_without_history_are_due_now(poller):
+    poller.restore()
+    stop = threading.Event()
+    assert poller._next_due(stop) == ("thetab", "news")
+    stop.set()
+    assert poller._next_due(stop) is None
+
+
+# ——— polling ——
+def test_poll_fetches_only_new_links_and_logs_them(poller, engine, tmp_path):
+    adapter = poller.adapters["thetab"]
+    with StandInServer() as standin:
+        urls = sorted({standin.url_for(entry) for entry, _ in pages("thetab")})
+        adapter.listing = set(urls)
+        with poller.sink, ExtractionPipeline(poller.sink, processes=1) as pipeline, \
+                ThreadPoolExecutor(max_workers=2) as fetch_pool:
+            poller.poll("thetab", "news", fetch_pool, pipeline)
+            poller.poll("thetab", "news", fetch_pool, pipeline)
+
+    first, second = polls(engine)
+    assert (first.listed, first.new) == (len(urls), len(urls))
+    assert (second.listed, second.new) == (len(urls), 0)
+    assert all(60 <= p.interval <= 2 * HOUR for p in (first, second))
+    assert len(poller._heap) == 2
+    with open(tmp_path / "articles.csv", newline="", encoding="utf-8") as fp:
+        assert sorted(row["article_url"] for row in csv.DictReader(fp)) == urls
+
+
+def poll_and_wait(poller):
+    """One poll of The Tab's section, returning once its fetches are stored."""
+    with poller.sink, ExtractionPipeline(poller.sink, processes=1, on_done=poller._settle) as pipeline, \
+            ThreadPoolExecutor(max_workers=2) as fetch_pool:
+        poller.poll("thetab", "news", fetch_pool, pipeline)
+
+
+def test_a_link_is_seen_once_stored_or_failed_for_good(poller, engine):
+    with StandInServer() as standin:
+        stored = standin.url_for(pages("thetab")[0][0])
+        gone = standin.base_url + "/gone"                   # 404: fetching again won't help
+        down = "http://127.0.0.1:1/down"                    # refused: it might next time
+        poller.adapters["thetab"].listing = {stored, gone, down}
+        poll_and_wait(poller)
+        assert (poller.seen, poller.pending) == ({stored, gone}, set())
+        poll_and_wait(poller)
+    assert [p.new for p in polls(engine)] == [3, 1]
+
+
+def test_a_link_waiting_in_the_retry_queue_stays_pending(poller, engine):
+    poller.retries = RetryQueue(engine, backoff_base=HOUR)
+    poller.adapters["thetab"].listing = {"http://127.0.0.1:1/down"}
+    poll_and_wait(poller)
+    poll_and_wait(poller)
+    assert [p.new for p in polls(engine)] == [1, 0]
+    assert (poller.seen, poller.pending) == (set(), {"http://127.0.0.1:1/down"})
+
+
+def test_failed_poll_keeps_the_section_scheduled(poller, engine):
+    poller.adapters["thetab"].listing = ConnectionError("feed down")
+    poller.poll("thetab", "news", None, None)
+    assert polls(engine) == []
+    [(due, _, _, _)] = poller._heap
+    assert due > time.time()
@@ -0,0 +1,81 @@
+import argparse
+import threading
+import time
+
+import pytest
+
+import profiling
+from profiling import Profiler
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(1000))
+
+
+def test_stage_is_a_no_op_without_a_profiler():
+    assert profiling.active() is None
+    with profiling.stage("parse", "https://a.test/"):
+        pass
+    assert profiling.stage("parse") is profiling.stage("extract")
+
+
+def test_unknown_mode_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="Unknown profile mode"):
+        Profiler(tmp_path, mode="perf")
+
+
+def test_sample_mode_writes_stacks_by_stage(tmp_path):
+    profiler = Profiler(tmp_path, interval=0.001).start()
+    try:
+        with profiling.stage("parse", "https://a.test/1"):
+            busy(0.1)
+        with profiling.stage("parse", "https://a.test/2"):
+            pass
+    finally:
+        top = profiler.stop()
+    assert profiling.active() is None
+    folded = (tmp_path / "main.folded").read_text()
+    assert any(line.startswith("parse;") and "busy (test_profiling.py" in line for line in folded.splitlines())
+    items = (tmp_path / "main-items.tsv").read_text().splitlines()
+    assert items[0] == "stage\titem\tcalls\tseconds"
+    assert items[1].startswith("parse\thttps://a.test/1\t1\t")
+    assert "wall time by labelled stage" in top.read_text()
+
+
+def test_cprofile_mode_writes_pstats(tmp_path):
+    profiler = Profiler(tmp_path, mode="cprofile").start()
+    try:
+        with profiling.stage("extract", "https://a.test/1"):
+            busy(0.01)
+    finally:
+        profiler.stop()
+    assert (tmp_path / "main.pstats").stat().st_size > 0
+    assert "busy" in (tmp_path / "main-top.txt").read_text()
+
+
+class PoppedMeanwhile(list):
+    """A label stack that was non-empty when checked and is empty when read."""
+
+    def __bool__(self):
+        return True
+
+
+def test_sampler_survives_a_stage_closing_while_it_reads_the_labels(tmp_path):
+    profiler = Profiler(tmp_path, interval=0.001).start()
+    try:
+        profiler._labels[threading.get_ident()] = PoppedMeanwhile()
+        busy(0.05)
+        assert profiler._sampler.is_alive()
+    finally:
+        profiler.stop()
+    assert any(stack[0] == "-" for stack in profiler.samples)
+
+
+def test_profile_flags():
+    parser = argparse.ArgumentParser()
+    profiling.add_arguments(parser)
+    assert parser.parse_args([]).profile is None
+    args = parser.parse_args(["--profile", "--profile-mode", "cprofile"])
+    assert (args.profile, args.profile_mode) == ("profiles", "cprofile")
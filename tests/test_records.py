@@ -0,0 +1,83 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from records import ARTICLE_COLUMNS, METADATA_COLUMNS, ArticleRecord, InvalidRecord, RecordBatch
+
+URL = "https://abcnews.go.com/Politics/story?id=1"
+
+
+def test_values_are_coerced():
+    record = ArticleRecord(
+        source_name="ABC News", article_url=URL, article_section="",
+        publication_date=datetime(2025, 6, 1, 14, tzinfo=timezone.utc),
+        headline_word_count="7", article_word_count=np.int64(300), num_internal_links=4.0,
+    )
+    assert record.article_section is None
+    assert record.publication_date == "2025-06-01T14:00:00+00:00"
+    assert (record.headline_word_count, record.article_word_count, record.num_internal_links) == (7, 300, 4)
+    assert record.num_external_links is None
+
+
+@pytest.mark.parametrize("fields, message", [
+    ({"article_url": URL}, "source_name is required"),
+    ({"source_name": "ABC News", "article_url": "  "}, "article_url is required"),
+    ({"source_name": "ABC News", "article_url": "/Politics/story"}, "not an http"),
+    ({"source_name": "ABC News", "article_url": URL, "article_word_count": -1}, "negative"),
+    ({"source_name": "ABC News", "article_url": URL, "article_word_count": 2.5}, "whole number"),
+    ({"source_name": "ABC News", "article_url": URL, "headline_text": 12}, "must be text"),
+])
+def test_invalid_records_are_refused(fields, message):
+    with pytest.raises(InvalidRecord, match=message):
+        ArticleRecord(**fields)
+
+
+def test_unknown_columns_and_extra_values_are_type_errors():
+    with pytest.raises(TypeError, match="headline"):
+        ArticleRecord(source_name="ABC News", article_url=URL, headline="typo")
+    with pytest.raises(TypeError):
+        ArticleRecord(*range(len(ARTICLE_COLUMNS) + 1))
+
+
+def test_positional_mapping_and_values_round_trip():
+    record = ArticleRecord("ABC News", URL, "Politics", headline_text="Headline", num_external_links=2)
+    assert record.values()[:3] == ("ABC News", URL, "Politics")
+    assert ArticleRecord(*record.values()) == record
+    assert ArticleRecord.from_values(record.values()) == record
+    row = {c: "" if v is None else str(v) for c, v in record.as_dict().items()}
+    assert ArticleRecord.from_mapping({**row, "unrelated": "x"}) == record
+
+
+def test_metadata_only_keeps_just_the_metadata_columns():
+    record = ArticleRecord(source_name="ABC News", article_url=URL, headline_text="Headline",
+                           article_full_text="Body", article_word_count=1)
+    trimmed = record.metadata_only()
+    assert trimmed.headline_text == "Headline"
+    assert trimmed.article_full_text is None and trimmed.article_word_count is None
+    assert all(getattr(trimmed, c) == getattr(record, c) for c in METADATA_COLUMNS)
+
+
+def test_batch_collects_columns():
+    batch = RecordBatch()
+    records = [ArticleRecord(source_name="ABC News", article_url=f"{URL}{i}", article_word_count=i)
+               for i in range(3)]
+    for record in records:
+        batch.append(record)
+    assert len(batch) == 3
+    assert batch.columns["article_word_count"] == [0, 1, 2]
+    assert list(batch.rows(["article_word_count", "source_name"])) == [(0, "ABC News"), (1, "ABC News"),
+                                                                        (2, "ABC News")]
+    assert list(batch.rows()) == [r.values() for r in records]
+    batch.clear()
+    assert len(batch) == 0 and list(batch.rows()) == []
+
+
+def test_batch_to_arrow():
+    pytest.importorskip("pyarrow", exc_type=ImportError)
+    batch = RecordBatch()
+    batch.append(ArticleRecord(source_name="ABC News", article_url=URL, article_word_count=10))
+    table = batch.to_arrow()
+    assert table.column_names == ARTICLE_COLUMNS
+    assert str(table.schema.field("article_word_count").type) == "int64"
+    assert table.column("article_url").to_pylist() == [URL]
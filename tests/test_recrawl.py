@@ -0,0 +1,133 @@
+import csv
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select, text, update
+
+import recrawl
+from adapters import load_adapter
+from corpus import StandInServer, pages
+from records import ARTICLE_COLUMNS, ArticleRecord
+from recrawl import (HOUR, MAX_BACKOFF_DOUBLINGS, RECRAWL_TIERS, Recrawler, article_versions,
+                     content_hash, next_interval, recrawl_schedule, seen_at)
+from sinks import DbSink
+
+
+def record(url="https://thetab.com/uk/a", body="Some body text.", **fields):
+    return ArticleRecord(source_name="The Tab", article_url=url, article_section="news",
+                         headline_text="Headline", article_full_text=body, **fields)
+
+
+@pytest.fixture
+def articles_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE TABLE articles ({', '.join(c + ' TEXT' for c in ARTICLE_COLUMNS)})"))
+    return engine
+
+
+@pytest.fixture
+def recrawler(articles_table):
+    return Recrawler(articles_table, [load_adapter("thetab")], DbSink(articles_table, batch_size=1))
+
+
+def schedule(engine):
+    with engine.connect() as conn:
+        return conn.execute(select(recrawl_schedule)).all()
+
+
+def make_due(engine):
+    with engine.begin() as conn:
+        conn.execute(update(recrawl_schedule).values(next_check_at=0))
+
+
+# ——— schedule ——
+def test_interval_follows_the_age_tiers():
+    assert next_interval(0, 0) == RECRAWL_TIERS[0][1]
+    assert next_interval(12 * HOUR, 0) == RECRAWL_TIERS[1][1]
+    assert next_interval(RECRAWL_TIERS[-1][0], 0) is None
+
+
+def test_unchanged_checks_back_off_but_not_past_the_tier():
+    base = RECRAWL_TIERS[1][1]
+    assert next_interval(7 * HOUR, 1) == 2 * base
+    assert next_interval(7 * HOUR, 99) == min(base * 2 ** MAX_BACKOFF_DOUBLINGS, 24 * HOUR - 7 * HOUR)
+    # an hour before the tier ends, the next check still lands at its boundary at the latest
+    assert next_interval(23 * HOUR, 5) == base
+
+
+def test_content_hash_ignores_whitespace_only():
+    assert content_hash(record(body="a  b\n c")) == content_hash(record(body="a b c"))
+    assert content_hash(record(body="a b c")) != content_hash(record(body="a b d"))
+
+
+def test_seen_at_prefers_publication_date():
+    published = record(publication_date="2025-06-02T10:00:00+00:00", scrape_date="2025-06-05T10:00:00+00:00")
+    assert seen_at(published) == datetime(2025, 6, 2, 10, tzinfo=timezone.utc).timestamp()
+    scraped = record(scrape_date="2025-06-05T10:00:00+00:00")
+    assert seen_at(scraped) == datetime(2025, 6, 5, 10, tzinfo=timezone.utc).timestamp()
+    assert seen_at(record()) is None
+
+
+# ——— tracking ——
+def test_track_stores_version_one_once(recrawler, engine):
+    assert recrawler.track("thetab", record())
+    assert not recrawler.track("thetab", record())
+    with engine.connect() as conn:
+        assert conn.execute(select(article_versions.c.version)).scalars().all() == [1]
+
+
+def test_track_ages_from_seen_at(recrawler, engine):
+    now = time.time()
+    assert recrawler.track("thetab", record("https://thetab.com/uk/day-old"), seen_at=now - 30 * HOUR)
+    assert not recrawler.track("thetab", record("https://thetab.com/uk/stale"), seen_at=now - 8 * 24 * HOUR)
+    [row] = schedule(engine)
+    assert row.first_seen_at == pytest.approx(now - 30 * HOUR, abs=5)
+    assert row.next_check_at - now == pytest.approx(RECRAWL_TIERS[2][1], abs=5)
+
+
+def test_seed_skips_articles_past_the_last_tier(recrawler, tmp_path):
+    now = datetime.now(timezone.utc)
+    path = tmp_path / "articles.csv"
+    with open(path, "w", newline="", encoding="utf-8") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(ARTICLE_COLUMNS)
+        for name, age in (("new", timedelta(hours=1)), ("old", timedelta(days=30))):
+            published = (now - age).strftime("%Y-%m-%dT%H:%M:%S+00:00")
+            writer.writerow(record(f"https://thetab.com/uk/{name}", publication_date=published).values())
+    assert recrawl.seed(recrawler, str(path)) == 1
+
+
+# ——— rechecks ——
+def test_recheck_stores_changes_once_and_replaces_the_row(recrawler, engine):
+    entry, _ = pages("thetab")[0]
+    with StandInServer() as standin:
+        url = standin.url_for(entry)
+        recrawler.track("thetab", record(url, body="An earlier draft."))
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO articles (source_name, article_url) VALUES ('The Tab', :url)"), {"url": url})
+
+        with recrawler.sink:
+            make_due(engine)
+            [row] = recrawler.due()
+            assert recrawler.recheck(row) == "changed"
+            make_due(engine)
+            [row] = recrawler.due()
+            # the stand-in answers If-Modified-Since with a 304
+            assert recrawler.recheck(row) == "unchanged"
+
+    with engine.connect() as conn:
+        assert conn.execute(select(article_versions.c.version)).scalars().all() == [1, 2]
+        stored = conn.execute(text("SELECT headline_text FROM articles")).scalars().all()
+    [row] = schedule(engine)
+    assert len(stored) == 1 and stored[0].startswith("The chilling text")
+    assert (row.version, row.unchanged_checks, row.retired) == (2, 1, False)
+
+
+def test_failed_recheck_keeps_the_article_scheduled(recrawler, engine):
+    with StandInServer() as standin:
+        recrawler.track("thetab", record(f"{standin.base_url}/thetab/missing.html"))
+        [row] = schedule(engine)
+        assert recrawler.recheck(row) == "failed"
+    [row] = schedule(engine)
+    assert row.version == 1 and row.unchanged_checks == 1 and not row.retired
@@ -0,0 +1,192 @@
+import socket
+import time
+from email.utils import formatdate
+
+import pytest
+import requests
+from sqlalchemy import select, update
+
+import fetcher
+from fetcher import Fetcher
+from retry import (CircuitBreakers, CircuitOpen, RetryQueue, backoff_delay, dead_letters, fetch_retries,
+                   is_retryable, retry_after)
+from streaming import ResponseTooLarge
+
+URL = "https://www.cbsnews.com/news/a/"
+
+
+def http_error(status, **headers):
+    res = requests.Response()
+    res.status_code = status
+    res.headers.update(headers)
+    return requests.HTTPError(f"{status} error", response=res)
+
+
+def test_backoff_grows_up_to_the_cap():
+    for attempt, bound in ((1, 60), (3, 240), (20, 3600)):
+        delays = [backoff_delay(attempt, 60, 3600) for _ in range(200)]
+        assert all(0 <= d <= bound for d in delays)
+        assert max(delays) > bound / 2
+
+
+def test_failure_classification():
+    assert is_retryable(requests.ConnectTimeout("slow"))
+    assert is_retryable(http_error(503)) and is_retryable(http_error(429))
+    assert not is_retryable(http_error(404)) and not is_retryable(http_error(410))
+    assert not is_retryable(ResponseTooLarge("body over the 5242880 byte cap"))
+    assert retry_after(http_error(429, **{"Retry-After": "120"})) == 120
+    in_a_minute = formatdate(time.time() + 60, usegmt=True)
+    assert retry_after(http_error(503, **{"Retry-After": in_a_minute})) == pytest.approx(60, abs=2)
+    assert retry_after(http_error(503, **{"Retry-After": "soon"})) is None
+    assert retry_after(requests.ConnectionError("down")) is None
+
+
+# ——— circuit breakers ——
+def test_circuit_opens_after_consecutive_failures():
+    breakers = CircuitBreakers(threshold=3, cooldown=60)
+    for _ in range(2):
+        breakers.failure("a.test")
+    breakers.before("a.test")
+    breakers.success("a.test")          # a success resets the count
+    for _ in range(2):
+        breakers.failure("a.test")
+    breakers.before("a.test")
+    breakers.failure("a.test")
+    with pytest.raises(CircuitOpen) as refused:
+        breakers.before("a.test")
+    assert refused.value.retry_at == pytest.approx(time.time() + 60, abs=1)
+    breakers.before("b.test")           # other hosts are unaffected
+
+
+def test_one_probe_after_the_cooldown():
+    breakers = CircuitBreakers(threshold=1, cooldown=0.1, max_cooldown=0.3)
+    breakers.failure("a.test")
+    time.sleep(0.13)
+    breakers.before("a.test")           # the probe goes out
+    with pytest.raises(CircuitOpen):
+        breakers.before("a.test")       # and nothing else until it's answered
+    breakers.failure("a.test")          # failed probe: open for twice as long
+    time.sleep(0.13)
+    with pytest.raises(CircuitOpen):
+        breakers.before("a.test")
+    time.sleep(0.13)
+    breakers.before("a.test")
+    breakers.success("a.test")          # successful probe closes it
+    breakers.before("a.test")
+    breakers.before("a.test")
+
+
+def test_fetcher_stops_sending_to_a_failing_host():
+    with socket.socket() as sock:       # a port nothing listens on
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    fetcher = Fetcher(pool_size=1, breakers=CircuitBreakers(threshold=2, cooldown=60))
+    session = requests.Session()
+    session.mount("http://", fetcher.http_adapter)
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError) as failed:
+            session.get(f"http://127.0.0.1:{port}/", timeout=2)
+        assert not isinstance(failed.value, CircuitOpen)
+    with pytest.raises(CircuitOpen):
+        session.get(f"http://127.0.0.1:{port}/", timeout=2)
+    fetcher.close()
+
+
+def test_a_probe_that_raises_anything_reopens_the_circuit(monkeypatch):
+    breakers = CircuitBreakers(threshold=1, cooldown=0.1)
+    shared = Fetcher(pool_size=1, breakers=breakers)
+    session = requests.Session()
+    session.mount("http://", shared.http_adapter)
+
+    def broken_send(self, request, *args, **kwargs):
+        raise ValueError("not a requests error")
+
+    monkeypatch.setattr(fetcher.TimedHTTPAdapter, "send", broken_send)
+    breakers.failure("a.test")
+    time.sleep(0.13)
+    with pytest.raises(ValueError):
+        session.get("http://a.test/", timeout=2)   # the probe
+    with pytest.raises(CircuitOpen) as refused:
+        breakers.before("a.test")
+    # reopened for twice the cooldown, not stuck waiting on a probe that will never answer
+    assert refused.value.retry_at == pytest.approx(time.time() + 0.2, abs=0.05)
+    time.sleep(0.25)
+    breakers.before("a.test")
+    shared.close()
+
+
+# ——— retry queue ——
+@pytest.fixture
+def queue(engine):
+    return RetryQueue(engine, max_attempts=3, backoff_base=60, backoff_cap=600)
+
+
+def queued(engine):
+    with engine.connect() as conn:
+        return {row.url: row for row in conn.execute(select(fetch_retries))}
+
+
+def letters(engine):
+    with engine.connect() as conn:
+        return conn.execute(select(dead_letters)).all()
+
+
+def make_due(engine):
+    with engine.begin() as conn:
+        conn.execute(update(fetch_retries).values(next_attempt_at=0))
+
+
+def test_retryable_failures_back_off(queue, engine):
+    assert queue.fail("cbs", "us", URL, requests.ReadTimeout("slow")) == "retry"
+    row = queued(engine)[URL]
+    assert row.attempts == 1 and 0 <= row.next_attempt_at - time.time() <= 60
+    assert row.last_error == "ReadTimeout: slow"
+    assert queue.waiting("cbs") == {URL} and queue.due("cbs") == []
+    make_due(engine)
+    assert queue.due("cbs") == [("us", URL)] and queue.due("abc") == []
+
+
+def test_retry_after_is_honoured(queue, engine):
+    queue.fail("cbs", "us", URL, http_error(429, **{"Retry-After": "3000"}))
+    assert queued(engine)[URL].next_attempt_at - time.time() == pytest.approx(3000, abs=5)
+
+
+def test_open_circuit_defers_without_using_an_attempt(queue, engine):
+    queue.fail("cbs", "us", URL, requests.ConnectionError("refused"))
+    retry_at = time.time() + 45
+    assert queue.fail("cbs", "us", URL, CircuitOpen("www.cbsnews.com", retry_at)) == "deferred"
+    row = queued(engine)[URL]
+    assert row.attempts == 1 and row.next_attempt_at == pytest.approx(retry_at)
+
+
+def test_permanent_and_exhausted_failures_are_dead_lettered(queue, engine):
+    assert queue.fail("cbs", "us", URL, http_error(404)) == "dead"
+    other = URL.replace("/a/", "/b/")
+    assert [queue.fail("cbs", "us", other, http_error(503)) for _ in range(3)] == ["retry", "retry", "dead"]
+    assert queued(engine) == {}
+    assert sorted((d.url, d.stage, d.attempts) for d in letters(engine)) == [(URL, "fetch", 1), (other, "fetch", 3)]
+
+
+def test_success_clears_a_queued_url(queue, engine):
+    queue.fail("cbs", "us", URL, requests.ReadTimeout("slow"))
+    # another process only learns the URL is queued from due / waiting
+    other = RetryQueue(engine)
+    other.succeeded(URL)
+    assert URL in queued(engine)
+    other.waiting("cbs")
+    other.succeeded(URL)
+    assert queued(engine) == {}
+
+
+def test_report_and_requeue(queue, engine):
+    queue.fail("cbs", "us", URL, http_error(404))
+    queue.dead_letter("cbs", "us", URL.replace("/a/", "/c/"), "ValueError: no headline")
+    queue.dead_letter("abc", None, "https://abcnews.go.com/x", "ValueError: no headline")
+    assert sorted(queue.report()) == [("abc", "extract", "ValueError: no headline", 1),
+                                      ("cbs", "extract", "ValueError: no headline", 1),
+                                      ("cbs", "fetch", "HTTPError: 404 error", 1)]
+    assert queue.requeue("cbs") == 1
+    row = queued(engine)[URL]
+    assert row.attempts == 0 and row.next_attempt_at <= time.time()
+    assert len(letters(engine)) == 2
+    assert queue.requeue(stage="extract") == 2 and letters(engine) == []
@@ -0,0 +1,149 @@
+import csv
+import shutil
+import time
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+
+from records import ARTICLE_COLUMNS, ArticleRecord
+from sinks import CsvSink, DbSink, ParquetSink, sink_for
+
+DATA = Path(__file__).resolve().parents[1] / "data"
+
+
+def record(i, **fields):
+    return ArticleRecord(source_name="The Tab", article_url=f"https://thetab.com/uk/{i}",
+                         headline_text=f"Headline {i}", **fields)
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as fp:
+        return list(csv.reader(fp))
+
+
+# ——— batching ——
+def test_batches_are_written_by_size_and_on_close(tmp_path):
+    path = tmp_path / "articles.csv"
+    with CsvSink(str(path), batch_size=2) as sink:
+        sink.write(record(0))
+        assert len(read_csv(path)) < 2           # at most the header
+        sink.write(record(1))
+        assert len(read_csv(path)) == 3
+        sink.write(record(2))
+    assert [row[1] for row in read_csv(path)[1:]] == [f"https://thetab.com/uk/{i}" for i in range(3)]
+
+
+def test_a_waiting_batch_is_written_after_max_delay(tmp_path):
+    path = tmp_path / "articles.csv"
+    with CsvSink(str(path), batch_size=100, max_delay=0.05) as sink:
+        sink.write(record(0))
+        time.sleep(0.1)
+        sink.write(record(1))
+        assert len(read_csv(path)) == 3
+
+
+# ——— CSV ——
+def test_csv_appends_under_one_header(tmp_path):
+    path = tmp_path / "articles.csv"
+    with CsvSink(str(path)) as sink:
+        sink.write(record(0))
+    with CsvSink(str(path)) as sink:
+        assert sink.existing_urls() == {"https://thetab.com/uk/0"}
+        sink.write(record(1))
+    rows = read_csv(path)
+    assert rows[0] == ARTICLE_COLUMNS and len(rows) == 3
+    with CsvSink(str(path), append=False) as sink:
+        assert sink.existing_urls() == set()
+        sink.write(record(2))
+    assert len(read_csv(path)) == 2
+
+
+def test_csv_from_an_older_release_gets_the_new_columns(tmp_path, caplog):
+    path = tmp_path / "articles.csv"
+    old_columns = [c for c in ARTICLE_COLUMNS if c != "duplicate_cluster_id"]
+    with open(path, "w", newline="", encoding="utf-8") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(old_columns)
+        writer.writerow(["The Tab", "https://thetab.com/uk/old"] + [""] * (len(old_columns) - 2))
+    with CsvSink(str(path)) as sink:
+        sink.write(record(1, duplicate_cluster_id="abc123"))
+    assert "duplicate_cluster_id" in caplog.text
+    with open(path, newline="", encoding="utf-8") as fp:
+        rows = list(csv.DictReader(fp))
+    assert [r["article_url"] for r in rows] == ["https://thetab.com/uk/old", "https://thetab.com/uk/1"]
+    assert [r["duplicate_cluster_id"] for r in rows] == ["", "abc123"]
+    assert not (tmp_path / "articles.csv.tmp").exists()
+
+
+@pytest.mark.parametrize("legacy, url, headline", [
+    ("buzzfeed_articles.csv", "URL", "Headline"),
+    ("the_tab_articles.csv", "url", "headline"),
+    ("cbs_article_links.csv", "Article URL", "Headline (Text)"),
+])
+def test_a_scrapers_legacy_csv_is_renamed_and_appended_to(tmp_path, caplog, legacy, url, headline):
+    path = tmp_path / legacy
+    shutil.copy(DATA / legacy, path)
+    with open(path, newline="", encoding="utf-8") as fp:
+        old = list(csv.DictReader(fp))
+    with CsvSink(str(path)) as sink:
+        assert sink.existing_urls() == {row[url] for row in old}
+        sink.write(record("new"))
+    assert f"{url} -> article_url" in caplog.text
+    with open(path, newline="", encoding="utf-8") as fp:
+        rows = list(csv.DictReader(fp))
+    assert list(rows[0]) == ARTICLE_COLUMNS
+    assert [(r["article_url"], r["headline_text"]) for r in rows] == \
+        [(row[url], row[headline]) for row in old] + [("https://thetab.com/uk/new", "Headline new")]
+
+
+def test_csv_with_other_columns_is_refused(tmp_path):
+    path = tmp_path / "links.csv"
+    path.write_text("url,title\nhttps://thetab.com/uk/a,A\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="different columns"):
+        CsvSink(str(path)).open()
+    assert path.read_text(encoding="utf-8").startswith("url,title")
+
+
+# ——— database ——
+@pytest.fixture
+def narrow_table(engine):
+    """An `articles` table without the newer columns."""
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE articles (source_name TEXT, article_url TEXT, "
+                          "headline_text TEXT, article_word_count INTEGER)"))
+    return engine
+
+
+def stored(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT article_url, headline_text, article_word_count FROM articles "
+                                 "ORDER BY article_url")).all()
+
+
+def test_db_sink_writes_the_columns_the_table_has(narrow_table):
+    with DbSink(narrow_table, batch_size=2) as sink:
+        assert sink.columns == ["source_name", "article_url", "headline_text", "article_word_count"]
+        for i in range(3):
+            sink.write(record(i, article_word_count=10 * i, duplicate_cluster_id="x"))
+    assert stored(narrow_table) == [(f"https://thetab.com/uk/{i}", f"Headline {i}", 10 * i) for i in range(3)]
+    assert DbSink(narrow_table).existing_urls() == {f"https://thetab.com/uk/{i}" for i in range(3)}
+
+
+def test_db_sink_replace_keeps_one_row_per_url(narrow_table):
+    with DbSink(narrow_table) as sink:
+        sink.write(record(0))
+        sink.write(record(1))
+    with DbSink(narrow_table, replace=True) as sink:
+        sink.write(record(0, article_word_count=1))
+        sink.write(record(0, article_word_count=2))
+    assert stored(narrow_table) == [("https://thetab.com/uk/0", "Headline 0", 2),
+                                    ("https://thetab.com/uk/1", "Headline 1", None)]
+
+
+def test_sink_for_picks_the_sink_from_the_target(tmp_path):
+    assert isinstance(sink_for(str(tmp_path / "articles.csv")), CsvSink)
+    assert isinstance(sink_for(str(tmp_path / "out" / "parquet") + "/"), ParquetSink)
+    assert isinstance(sink_for(str(tmp_path / "articles.parquet")), ParquetSink)
+    db = sink_for(f"sqlite:///{tmp_path / 'articles.db'}", batch_size=7)
+    assert isinstance(db, DbSink) and db.batch_size == 7 and db.table == "articles"
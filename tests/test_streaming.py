@@ -0,0 +1,123 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import streaming
+from adapters import SourceAdapter
+from streaming import (DEFAULT_MAX_BYTES, MB, ContainerWatcher, DownloadDeadlineExceeded, ResponseTooLarge,
+                       byte_cap, read_body)
+
+BODY = b"<p>" + b"x" * 4000 + b"</p>"
+ARTICLE = b'<html><body><div class="story article__body"><div><p>Body.</p></div></div>'
+# many read chunks long, so cutting after the article skips most of it
+FOOTER = b"<footer>" + b"<a href='/more'>more</a>" * 40_000 + b"</footer></body></html>"
+
+
+class Handler(BaseHTTPRequestHandler):
+    """/declared sends a Content-Length, /undeclared closes the connection
+    instead, /trickle sends the body a piece at a time, /article sends an
+    article and then a long footer."""
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        if self.path == "/declared":
+            self.send_header("Content-Length", str(len(BODY)))
+            self.end_headers()
+            self.wfile.write(BODY)
+            return
+        self.send_header("Connection", "close")
+        self.end_headers()
+        if self.path == "/undeclared":
+            self.wfile.write(BODY)
+        elif self.path == "/article":
+            self.wfile.write(ARTICLE + FOOTER)
+        else:
+            for _ in range(4):
+                self.wfile.write(b"<p>slow</p>")
+                self.wfile.flush()
+                time.sleep(0.1)
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    host, port = httpd.server_address[:2]
+    yield f"http://{host}:{port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_byte_cap_by_content_type():
+    assert byte_cap("text/html; charset=utf-8") == 5 * MB
+    assert byte_cap("Application/XML") == 50 * MB
+    assert byte_cap(None) == byte_cap("image/png") == DEFAULT_MAX_BYTES
+    assert byte_cap("text/html", {"text/html": 100}) == 100
+
+
+@pytest.mark.parametrize("path", ["/declared", "/undeclared"])
+def test_body_within_the_cap_is_read(server, path):
+    res = streaming.get(requests, server + path, timeout=5)
+    assert res.content == BODY and res.text.startswith("<p>")
+
+
+def test_declared_length_over_the_cap_fails_before_reading(server):
+    res = requests.get(server + "/declared", stream=True, timeout=5)
+    with pytest.raises(ResponseTooLarge, match="Content-Length"):
+        read_body(res, caps={"text/html": 1000})
+
+
+def test_undeclared_body_over_the_cap_fails_while_reading(server):
+    with pytest.raises(ResponseTooLarge, match="body over"):
+        streaming.get(requests, server + "/undeclared", timeout=5, caps={"text/html": 1000})
+
+
+def test_slow_body_misses_the_deadline(server):
+    with pytest.raises(DownloadDeadlineExceeded):
+        streaming.get(requests, server + "/trickle", timeout=5, deadline=0.15)
+    # callers that handle requests.Timeout handle a missed deadline too
+    assert issubclass(DownloadDeadlineExceeded, requests.Timeout)
+    assert streaming.get(requests, server + "/trickle", timeout=5).content == b"<p>slow</p>" * 4
+
+
+def test_adapter_fetch_uses_its_caps(server):
+    class Tiny(SourceAdapter):
+        max_bytes = {"text/html": 1000}
+
+    with requests.Session() as session:
+        with pytest.raises(ResponseTooLarge):
+            Tiny().fetch(session, server + "/declared")
+        assert SourceAdapter().fetch(session, server + "/declared") == BODY
+
+
+def test_container_watcher_waits_for_the_outermost_container_to_close():
+    watcher = ContainerWatcher([("div", "class", "article__body")])
+    assert not watcher.feed_bytes(b'<div class="promo"><div class="article__body-x"></div></div>')
+    assert not watcher.feed_bytes(b'<div class="story article__body"><div><p>caf\xc3')
+    assert not watcher.feed_bytes(b"\xa9</p></div>")
+    assert watcher.feed_bytes(b"</div><footer>")
+
+
+def test_until_stops_reading_once_the_container_has_closed(server):
+    res = streaming.get(requests, server + "/article", timeout=5, until=[("div", "class", "article__body")])
+    assert res.truncated and res.content.startswith(ARTICLE) and len(res.content) < len(ARTICLE + FOOTER)
+    res = streaming.get(requests, server + "/article", timeout=5, until=[("section", None, None)])
+    assert not res.truncated and res.content == ARTICLE + FOOTER
+
+
+def test_adapter_cuts_at_its_container_only_for_a_body_only_fetch(server):
+    class Boxed(SourceAdapter):
+        article_container = [("article", None, None), ("div", "class", "article__body")]
+
+    with requests.Session() as session:
+        assert Boxed().fetch_response(session, server + "/article").content == ARTICLE + FOOTER
+        res = Boxed().fetch_response(session, server + "/article", body_only=True)
+        assert res.truncated and len(res.content) < len(ARTICLE + FOOTER)
@@ -0,0 +1,156 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select, text
+
+from records import ArticleRecord
+from terms import (ALL_SECTIONS, CANDIDATE_DAYS, HASH_BUCKETS, WINDOW_DAYS, TermIndex, backfill, day_of, hashed_id,
+                   term_counts, term_days, term_scores, tokenize)
+
+DAY = "2025-06-10"
+
+
+def shifted(day, days):
+    return (date.fromisoformat(day) + timedelta(days=days)).isoformat()
+
+
+def article(i, day, body, source="ABC News", section="Politics"):
+    return (f"https://abcnews.go.com/{day}/{i}", day, source, section, tokenize(body))
+
+
+def everyday(day, n=4, extra=""):
+    """n articles on `day` that all mention the usual suspects, plus `extra` in each."""
+    return [article(f"{i}{extra}", day, f"Congress debated the budget again. {extra}") for i in range(n)]
+
+
+@pytest.fixture
+def index(engine):
+    return TermIndex(engine)
+
+
+def scores(engine, day, section=ALL_SECTIONS, source="ABC News"):
+    """term -> (df, tfidf, burst) cached for one day."""
+    with engine.connect() as conn:
+        vocab = dict(conn.execute(text("SELECT term_id, term FROM term_vocab")).all())
+        rows = conn.execute(select(term_scores).where(
+            term_scores.c.day == day, term_scores.c.source == source, term_scores.c.section == section)).all()
+    return {vocab[r.term_id]: (r.df, r.tfidf, r.burst) for r in rows}
+
+
+# ——— tokenizing ——
+def test_tokenize():
+    counts = tokenize("The Senate's vote: senators VOTED, and the senate’s rules-committee met. A it on 2025.")
+    assert counts == {"senate": 2, "vote": 1, "senators": 1, "voted": 1, "rules-committee": 1, "met": 1}
+    assert tokenize("") == {}
+
+
+def test_hashed_ids_are_negative_and_stable():
+    ids = {hashed_id(f"term{i}") for i in range(1000)}
+    assert all(-HASH_BUCKETS <= i < 0 for i in ids)
+    assert hashed_id("filibuster") == hashed_id("filibuster")
+
+
+def test_day_of():
+    assert day_of("2025-06-10T14:00:00+00:00", "2025-06-12T00:00:00+00:00") == "2025-06-10"
+    assert day_of(None, "2025-06-12T00:00:00+00:00") == "2025-06-12"
+    assert day_of("June 10, 2025", None) is None
+
+
+# ——— counting ——
+def test_ingest_counts_each_article_once(index, engine):
+    batch = everyday(DAY, n=3) + [article("x", DAY, "A filibuster.", section="US")]
+    assert index.ingest(batch) == 4
+    assert index.ingest(batch) == 0
+    with engine.connect() as conn:
+        days = {(r.section, r.docs, r.tokens) for r in conn.execute(select(term_days))}
+        budget = conn.execute(select(term_counts.c.tf, term_counts.c.df)
+                              .where(term_counts.c.term_id == index.vocab["budget"])).one()
+    assert days == {("Politics", 3, 9), ("US", 1, 1)}
+    assert tuple(budget) == (3, 3)
+    # used by fewer than PROMOTE_MIN_DF articles: counted in a hashed bucket, never scored
+    assert "filibuster" not in index.vocab
+    assert "filibuster" not in scores(engine, DAY, "US")
+
+
+def test_add_flushes_in_batches(engine):
+    index = TermIndex(engine, flush_every=2)
+    records = [ArticleRecord(source_name="ABC News", article_url=f"https://abcnews.go.com/{i}",
+                             article_section="Politics", publication_date=f"{DAY}T12:00:00+00:00")
+               for i in range(3)]
+    index.add(records[0], {"budget": 1})
+    assert scores(engine, DAY) == {}
+    index.add(records[1], {"budget": 1})
+    index.add(records[2], {"budget": 1})
+    index.add(ArticleRecord(source_name="ABC News", article_url="https://abcnews.go.com/undated"), {"budget": 1})
+    index.flush()
+    with engine.connect() as conn:
+        assert conn.execute(select(term_days.c.docs)).scalar() == 3
+
+
+def test_a_trickle_of_articles_promotes_a_new_term(engine):
+    index = TermIndex(engine, flush_every=1)       # one article per ingest, as the poller sends them
+    for i in range(3):
+        index.add(ArticleRecord(source_name="ABC News", article_url=f"https://abcnews.go.com/w{i}",
+                                article_section="US", publication_date=f"{DAY}T0{i}:00:00+00:00"),
+                  {"wildfire": 2, "budget": 1})
+    assert "wildfire" in index.vocab
+    # the articles counted before the promotion moved out of the hashed bucket
+    assert scores(engine, DAY, "US")["wildfire"][0] == 3
+    with engine.connect() as conn:
+        bucket = conn.execute(select(term_counts.c.tf, term_counts.c.df)
+                              .where(term_counts.c.term_id == hashed_id("wildfire"))).one()
+        promoted = conn.execute(select(term_counts.c.tf)
+                                .where(term_counts.c.term_id == index.vocab["wildfire"])).scalar()
+    assert tuple(bucket) == (0, 0) and promoted == 6
+
+
+def test_candidates_older_than_the_window_are_forgotten(index):
+    index.ingest([article("old", shifted(DAY, -CANDIDATE_DAYS - 1), "A filibuster.")])
+    index.ingest([article("a", DAY, "A filibuster.")])
+    index.ingest([article("b", DAY, "A filibuster.")])
+    assert "filibuster" not in index.vocab
+    index.ingest([article("c", shifted(DAY, -1), "A filibuster.")])
+    assert "filibuster" in index.vocab
+
+
+# ——— scores ——
+def test_new_terms_burst_and_perennial_ones_do_not(index, engine):
+    history = [a for d in range(1, 8) for a in everyday(shifted(DAY, -d))]
+    index.ingest(history + everyday(DAY, extra="Wildfire evacuations ordered."))
+    today = scores(engine, DAY)
+    assert today["wildfire"][2] > today["budget"][2]
+    assert today["wildfire"][0] == 4
+    # the same scores per section
+    assert scores(engine, DAY, "Politics").keys() == today.keys()
+
+
+def test_late_articles_rescore_the_days_after_them(index, engine):
+    index.ingest(everyday(DAY, extra="Wildfire evacuations ordered."))
+    before = scores(engine, DAY)["wildfire"][2]
+    # wildfire turns out to have been in the news the day before too
+    index.ingest(everyday(shifted(DAY, -1), extra="Wildfire spreading."))
+    assert scores(engine, DAY)["wildfire"][2] < before
+    # days past the window don't depend on it
+    far = shifted(DAY, WINDOW_DAYS + 1)
+    index.ingest(everyday(far, extra="Wildfire evacuations ordered."))
+    far_before = scores(engine, far)
+    index.ingest(everyday(shifted(DAY, -2), extra="Wildfire warning."))
+    assert scores(engine, far) == far_before
+
+
+def test_backfill_reads_the_articles_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE articles (article_url TEXT, source_name TEXT, article_section TEXT, "
+                          "publication_date TEXT, scrape_date TEXT, article_full_text TEXT)"))
+        conn.execute(text("INSERT INTO articles VALUES (:url, 'ABC News', 'Politics', :day, NULL, :body)"), [
+            {"url": f"https://abcnews.go.com/{i}", "day": shifted(DAY, i % 3) + "T12:00:00+00:00",
+             "body": "Congress debated the budget again."}
+            for i in range(7)
+        ])
+    # pages of three, so the second backfill's articles promote "budget" in one batch
+    index = TermIndex(engine, flush_every=3)
+    assert backfill(index, engine, since=shifted(DAY, 1), until=None) == 4
+    assert backfill(index, engine, since=None, until=None) == 3
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT SUM(docs) FROM term_days")).scalar() == 7
+    assert "budget" in scores(engine, DAY)